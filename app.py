@@ -5,11 +5,21 @@ Run this file to start the GUI application
 
 import sys
 from PyQt6.QtWidgets import QApplication
-from ui.main_window import BioOracleWindow
+from ui.main_window import BioOracleWindow, MODULES_AVAILABLE
 
 
 def main():
     """Main application entry point"""
+    settings_args = {}
+    if MODULES_AVAILABLE:
+        # --config / --set; remaining arguments are left to Qt
+        from modules.settings import settings_argument_parser, settings_from_args
+        parser = settings_argument_parser()
+        args, qt_args = parser.parse_known_args(sys.argv[1:])
+        settings_args = {'settings': settings_from_args(args, parser),
+                         'settings_path': args.config, 'overrides': args.overrides}
+        sys.argv = sys.argv[:1] + qt_args
+    
     app = QApplication(sys.argv)
     
     # Set application metadata
@@ -18,7 +28,7 @@ def main():
     app.setOrganizationName("Bio-Oracle Project")
     
     # Create and show main window
-    window = BioOracleWindow()
+    window = BioOracleWindow(**settings_args)
     window.show()
     
     # Start event loop
@@ -0,0 +1,4 @@
+"""
+Bio-Oracle Benchmarks
+Performance and accuracy benchmarks for the detection pipeline
+"""
@@ -0,0 +1,128 @@
+"""
+Benchmark Metrics
+Box matching and accuracy measures shared by the benchmarks
+"""
+
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Pairwise IoU of two sets of (x1, y1, x2, y2) boxes
+
+    Returns:
+        np.ndarray: len(boxes_a) x len(boxes_b) matrix
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+def match_boxes(predicted, ground_truth, iou_threshold=0.5):
+    """
+    Greedy one-to-one matching by descending IoU
+
+    Returns:
+        list: (predicted index, ground truth index, iou) of matched pairs
+    """
+    if len(predicted) == 0 or len(ground_truth) == 0:
+        return []
+
+    ious = iou_matrix(predicted, ground_truth)
+    pairs = np.argwhere(ious >= iou_threshold)
+    order = np.argsort(-ious[pairs[:, 0], pairs[:, 1]])
+
+    matches = []
+    used_pred, used_gt = set(), set()
+    for p, g in pairs[order]:
+        if p in used_pred or g in used_gt:
+            continue
+        used_pred.add(p)
+        used_gt.add(g)
+        matches.append((int(p), int(g), float(ious[p, g])))
+    return matches
+
+
+def detection_scores(frames_predicted, frames_ground_truth, iou_threshold=0.5):
+    """
+    Precision, recall and mean IoU over a sequence of frames
+
+    Args:
+        frames_predicted: list (per frame) of lists of boxes
+        frames_ground_truth: list (per frame) of lists of boxes
+    """
+    tp = fp = fn = 0
+    ious = []
+    for predicted, ground_truth in zip(frames_predicted, frames_ground_truth):
+        matches = match_boxes(predicted, ground_truth, iou_threshold)
+        tp += len(matches)
+        fp += len(predicted) - len(matches)
+        fn += len(ground_truth) - len(matches)
+        ious.extend(iou for _, _, iou in matches)
+
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        'precision': round(precision, 4),
+        'recall': round(recall, 4),
+        'f1': round(f1, 4),
+        'mean_iou': round(float(np.mean(ious)), 4) if ious else 0.0,
+        'true_positives': tp,
+        'false_positives': fp,
+        'false_negatives': fn
+    }
+
+
+def tracking_scores(frames_predicted, frames_ground_truth, iou_threshold=0.5):
+    """
+    CLEAR-MOT style tracking accuracy
+
+    A ground-truth track matched to a different predicted ID than at its
+    previous match counts as an ID switch.
+
+    Args:
+        frames_predicted: list (per frame) of lists of (track_id, box)
+        frames_ground_truth: list (per frame) of lists of (track_id, box)
+
+    Returns:
+        dict: mota, motp (mean IoU of matches), id_switches, fp, fn and
+              the number of ground-truth boxes
+    """
+    last_match = {}  # ground-truth ID -> predicted ID
+    tp = fp = fn = id_switches = total = 0
+    ious = []
+    for predicted, ground_truth in zip(frames_predicted, frames_ground_truth):
+        matches = match_boxes([box for _, box in predicted], [box for _, box in ground_truth],
+                              iou_threshold)
+        total += len(ground_truth)
+        tp += len(matches)
+        fp += len(predicted) - len(matches)
+        fn += len(ground_truth) - len(matches)
+        for p, g, iou in matches:
+            predicted_id, truth_id = predicted[p][0], ground_truth[g][0]
+            if truth_id in last_match and last_match[truth_id] != predicted_id:
+                id_switches += 1
+            last_match[truth_id] = predicted_id
+            ious.append(iou)
+
+    mota = 1.0 - (fn + fp + id_switches) / total if total else 1.0
+    return {
+        'mota': round(mota, 4),
+        'motp': round(float(np.mean(ious)), 4) if ious else 0.0,
+        'id_switches': id_switches,
+        'true_positives': tp,
+        'false_positives': fp,
+        'false_negatives': fn,
+        'ground_truth': total
+    }
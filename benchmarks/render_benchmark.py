@@ -0,0 +1,115 @@
+"""
+Overlay Render Benchmark
+Render time per frame vs. number of cells for per-cell cv2 drawing, the
+batched OverlayRenderer and an unchanged OverlayLayer (composite only)
+
+Usage:
+    python benchmarks/render_benchmark.py --counts 10,100,1000,5000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from modules.renderer import OverlayRenderer, OverlayLayer
+
+
+STATUSES = ('moving', 'staying', 'unknown')
+COLORS = {
+    'moving': config.COLOR_MOVING,
+    'staying': config.COLOR_STAYING,
+    'unknown': config.COLOR_UNKNOWN
+}
+
+
+def synthetic_cells(count, width, height, seed=0):
+    """Random boxes, track IDs and statuses"""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(20, 60, size=(count, 2))
+    x1 = rng.integers(0, width - 60, size=count)
+    y1 = rng.integers(20, height - 60, size=count)
+    boxes = np.column_stack((x1, y1, x1 + sizes[:, 0], y1 + sizes[:, 1])).tolist()
+    track_ids = rng.permutation(count * 2)[:count].tolist()
+    statuses = [STATUSES[i] for i in rng.integers(0, 3, size=count)]
+    return boxes, track_ids, statuses
+
+
+def draw_per_cell(frame, boxes, track_ids, statuses):
+    """Reference: one rectangle and one putText call per cell"""
+    for (x1, y1, x2, y2), track_id, status in zip(boxes, track_ids, statuses):
+        color = COLORS[status]
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, config.BOX_THICKNESS)
+        cv2.putText(frame, f"ID:{track_id} {status}", (x1, y1 - 10),
+                    config.FONT, config.FONT_SCALE, color, config.FONT_THICKNESS)
+    return frame
+
+
+def time_ms(function, frame, repeats):
+    """Median milliseconds of function(copy of frame)"""
+    timings = []
+    for _ in range(repeats):
+        target = frame.copy()
+        start = time.perf_counter()
+        function(target)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overlay render benchmark")
+    parser.add_argument("--counts", default="10,100,500,1000,5000",
+                        help="Comma separated cell counts")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    frame = np.full((args.height, args.width, 3), 128, dtype=np.uint8)
+    results = []
+
+    for count in [int(value) for value in args.counts.split(",")]:
+        boxes, track_ids, statuses = synthetic_cells(count, args.width, args.height)
+        # One cached label per cell, so the sprite cache must hold all of them
+        renderer = OverlayRenderer(max_sprites=max(4096, 2 * count))
+        layer = OverlayLayer()
+
+        def draw(target):
+            renderer.render_detections(target, boxes, track_ids, statuses)
+
+        # Warm the sprite cache, as after the first frames of a video
+        draw(frame.copy())
+        layer.update(frame.shape, count, draw)
+
+        row = {
+            'cells': count,
+            'per_cell_ms': time_ms(lambda target: draw_per_cell(target, boxes, track_ids, statuses),
+                                   frame, args.repeats),
+            'batched_ms': time_ms(draw, frame, args.repeats),
+            'layer_composite_ms': time_ms(layer.composite, frame, args.repeats)
+        }
+        row['speedup'] = round(row['per_cell_ms'] / row['batched_ms'], 2)
+        results.append(row)
+
+    print(f"{args.width}x{args.height} frames, median of {args.repeats} runs")
+    print(f"{'cells':>6} {'per-cell ms':>12} {'batched ms':>11} {'speedup':>8} {'composite ms':>13}")
+    for row in results:
+        print(f"{row['cells']:>6} {row['per_cell_ms']:>12.3f} {row['batched_ms']:>11.3f} "
+              f"{row['speedup']:>8} {row['layer_composite_ms']:>13.3f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Detection Scheduler Benchmark
+Compares full per-frame YOLO detection with DetectionScheduler at several
+detection intervals: effective fps and accuracy relative to full detection
+
+Usage:
+    python benchmarks/scheduler_benchmark.py video.mp4 --intervals 2,5,10
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from modules.detector import CellDetector
+from modules.scheduler import DetectionScheduler
+from modules.sources import open_source
+from benchmarks.metrics import detection_scores
+
+
+def load_frames(video_path, max_frames):
+    """Decode frames up front so decoding is not part of the timings"""
+    frames = []
+    with open_source(video_path) as source:
+        for frame, _ in source:
+            if len(frames) >= max_frames:
+                break
+            frames.append(frame)
+    return frames
+
+
+def run(detector, frames):
+    """Returns (per-frame boxes, seconds)"""
+    boxes = []
+    start = time.perf_counter()
+    for frame in frames:
+        boxes.append(detector.detect(frame).boxes)
+    return boxes, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection scheduler benchmark")
+    parser.add_argument("video", help="Video file, image directory or TIFF stack")
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--intervals", default="2,3,5,10",
+                        help="Comma separated detection intervals")
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU threshold for a match")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.max_frames)
+    detector = CellDetector(
+        model_path=args.model,
+        confidence_threshold=config.CONFIDENCE_THRESHOLD,
+        device=config.DEVICE
+    )
+
+    # Warm up the model so the first inference does not skew the baseline
+    detector.detect(frames[0])
+
+    reference, seconds = run(detector, frames)
+    results = [{
+        'interval': 1,
+        'fps': round(len(frames) / seconds, 2),
+        'speedup': 1.0,
+        'detector_ratio': 1.0,
+        **detection_scores(reference, reference, args.iou)
+    }]
+
+    for interval in [int(value) for value in args.intervals.split(",")]:
+        scheduler = DetectionScheduler(detector, interval=interval)
+        boxes, scheduled_seconds = run(scheduler, frames)
+        results.append({
+            'interval': interval,
+            'fps': round(len(frames) / scheduled_seconds, 2),
+            'speedup': round(seconds / scheduled_seconds, 2),
+            'detector_ratio': round(scheduler.get_stats()['detector_ratio'], 3),
+            **detection_scores(boxes, reference, args.iou)
+        })
+
+    print(f"{len(frames)} frames of {os.path.basename(args.video)}")
+    print(f"{'interval':>8} {'fps':>8} {'speedup':>8} {'det%':>6} "
+          f"{'prec':>6} {'recall':>6} {'mIoU':>6}")
+    for row in results:
+        print(f"{row['interval']:>8} {row['fps']:>8} {row['speedup']:>8} "
+              f"{row['detector_ratio'] * 100:>5.0f}% {row['precision']:>6} "
+              f"{row['recall']:>6} {row['mean_iou']:>6}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Environment Simulation Benchmark
+Headless what-if runs of the environment simulation: surviving virtual cells
+over time for each toxicity/temperature condition, and the step time
+compared to real time
+
+Usage:
+    python benchmarks/simulation_benchmark.py --cells 100000 --toxicity 0,50,100 --temperature 25,40
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from modules.simulation import EnvironmentSimulation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Environment simulation benchmark")
+    parser.add_argument("--cells", type=int, default=100_000, help="Virtual cells per run")
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--fps", type=float, default=30.0, help="Steps per simulated second")
+    parser.add_argument("--toxicity", default="0,50,100", help="Comma separated toxicity levels (%%)")
+    parser.add_argument("--temperature", default="25", help="Comma separated temperatures (°C)")
+    parser.add_argument("--seed", type=int, default=config.SIMULATION_SEED)
+    parser.add_argument("--output", help="Write results (incl. survival curves) as JSON")
+    args = parser.parse_args()
+
+    dt = 1.0 / args.fps
+    results = []
+    for toxicity, temperature in itertools.product(
+            [float(value) for value in args.toxicity.split(",")],
+            [float(value) for value in args.temperature.split(",")]):
+        simulation = EnvironmentSimulation(toxicity=toxicity, temperature=temperature, seed=args.seed)
+        simulation.spawn(args.cells)
+        start = time.perf_counter()
+        living = simulation.run(args.steps, dt)
+        seconds = time.perf_counter() - start
+        results.append({
+            'toxicity': toxicity,
+            'temperature': temperature,
+            'step_ms': round(seconds / args.steps * 1000, 3),
+            'realtime_factor': round(args.steps * dt / seconds, 2),
+            'survival': round(float(living[-1]) / args.cells, 4),
+            'living': living.tolist()
+        })
+
+    print(f"{args.cells} cells, {args.steps} steps of {dt * 1000:.1f} ms, seed {args.seed}")
+    print(f"{'toxicity':>8} {'temp':>6} {'step ms':>8} {'x realtime':>10} {'survival':>8}")
+    for row in results:
+        print(f"{row['toxicity']:>8} {row['temperature']:>6} {row['step_ms']:>8} "
+              f"{row['realtime_factor']:>10} {row['survival'] * 100:>7.1f}%")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Benchmark Suite
+Throughput, latency percentiles, memory and tracking accuracy of the
+classical detector, find_cell and the GUI-less detect/track/log pipeline
+on synthetic cell videos with ground truth
+
+Usage:
+    python benchmarks/suite.py --cells 20 --frames 300 --output results.json
+    python benchmarks/suite.py --targets pipeline --pipeline-detector yolo --model best.pt
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'computer-vision-module'))
+
+from benchmarks.synthetic import SyntheticVideo
+from modules.detections import DetectionBatch
+from benchmarks.metrics import detection_scores, match_boxes, tracking_scores
+
+
+TARGETS = ('detector', 'find_cell', 'pipeline')
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None if unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def timing_stats(latencies_ns):
+    """Throughput and latency percentiles of per-item timings"""
+    latencies = np.asarray(latencies_ns, dtype=np.float64) / 1e6
+    total = latencies.sum() / 1000
+    return {
+        'items': len(latencies),
+        'throughput_per_s': round(len(latencies) / total, 2) if total else 0.0,
+        'mean_ms': round(float(latencies.mean()), 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p90_ms': round(float(np.percentile(latencies, 90)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'max_ms': round(float(latencies.max()), 3)
+    }
+
+
+def bench_detector(video, options):
+    """Classical CellDetector.process (detection, tracking and drawing)"""
+    from detector import CellDetector
+
+    detector = CellDetector()
+    detector.verbose = False
+    latencies, detections, tracks = [], [], []
+    for index, frame in enumerate(video.frames()):
+        # Same as process(), split to keep the candidate cells
+        start = time.perf_counter_ns()
+        search_mask, filtered_cells = detector.detect(frame, index)
+        detector.draw(frame, search_mask, filtered_cells)
+        latencies.append(time.perf_counter_ns() - start)
+
+        # Locked cells carry IDs, candidates do not
+        locked = [(cell_id, (x, y, x + w, y + h)) for x, y, w, h, cell_id in detector.locked_cells]
+        candidates = filtered_cells.boxes.tolist()
+        tracks.append(locked)
+        detections.append([box for _, box in locked] + candidates)
+
+    truth = [video.ground_truth(index) for index in range(video.num_frames)]
+    return {
+        **timing_stats(latencies),
+        'detection': detection_scores(detections, [[box for _, box in gt] for gt in truth], options.iou),
+        'tracking': tracking_scores(tracks, truth, options.iou)
+    }
+
+
+def bench_find_cell(video, options):
+    """find_cell.return_coordinates on frames saved as PNG (includes imread)"""
+    from find_cell import return_coordinates
+
+    latencies, hits = [], 0
+    with tempfile.TemporaryDirectory() as directory:
+        paths = video.write_images(directory, limit=options.find_cell_images)
+        for index, path in enumerate(paths):
+            start = time.perf_counter_ns()
+            coordinates = return_coordinates(path)
+            latencies.append(time.perf_counter_ns() - start)
+
+            if coordinates is not None:
+                x, y, w, h = coordinates
+                truth = [box for _, box in video.ground_truth(index)]
+                hits += bool(match_boxes([(x, y, x + w, y + h)], truth, options.iou))
+
+    return {
+        **timing_stats(latencies),
+        # Fraction of images whose returned box matches one of the cells
+        'localization_rate': round(hits / len(latencies), 4) if latencies else 0.0
+    }
+
+
+class ClassicalDetections:
+    """detect() adapter returning the classical detector's cells as a DetectionBatch"""
+
+    def __init__(self):
+        from detector import CellDetector
+        self.detector = CellDetector()
+        self.detector.verbose = False
+        self.frame_index = 0
+
+    def detect(self, frame):
+        _, filtered_cells = self.detector.detect(frame, self.frame_index)
+        self.frame_index += 1
+        locked = DetectionBatch.from_boxes(
+            [(x, y, x + w, y + h) for x, y, w, h, _ in self.detector.locked_cells])
+        return DetectionBatch.concatenate([locked, filtered_cells])
+
+
+def bench_pipeline(video, options):
+    """GUI-less pipeline: detector -> CellTracker -> DataLogger"""
+    from modules.tracker import CellTracker
+    from modules.logger import DataLogger
+
+    if options.pipeline_detector == 'yolo':
+        from modules.detector import CellDetector
+        detector = CellDetector(model_path=options.model)
+    else:
+        detector = ClassicalDetections()
+    tracker = CellTracker()
+
+    latencies, tracks = [], []
+    with tempfile.TemporaryDirectory() as logs_dir:
+        logger = DataLogger(logs_dir=logs_dir)
+        for index, frame in enumerate(video.frames()):
+            start = time.perf_counter_ns()
+            detections = detector.detect(frame)
+            tracked = tracker.update(detections)
+            logger.log_batch(index, detections, tracker.get_counts())
+            latencies.append(time.perf_counter_ns() - start)
+            tracks.append(list(zip(tracked.track_ids.tolist(), tracked.boxes.tolist())))
+        logger.close()
+
+    truth = [video.ground_truth(index) for index in range(video.num_frames)]
+    return {
+        **timing_stats(latencies),
+        'detector': options.pipeline_detector,
+        'tracking': tracking_scores(tracks, truth, options.iou)
+    }
+
+
+def run_target(target, video_params, options):
+    """Runs in a fresh process so the peak memory belongs to one target"""
+    video = SyntheticVideo(**video_params)
+    baseline = peak_rss_mb()
+    result = {'find_cell': bench_find_cell, 'detector': bench_detector,
+              'pipeline': bench_pipeline}[target](video, options)
+    result['peak_rss_mb'] = peak_rss_mb()
+    result['baseline_rss_mb'] = baseline
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bio-Oracle benchmark suite")
+    parser.add_argument("--targets", default=",".join(TARGETS),
+                        help=f"Comma separated subset of {', '.join(TARGETS)}")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--cells", type=int, default=20)
+    parser.add_argument("--min-radius", type=float, default=17)
+    parser.add_argument("--max-radius", type=float, default=24)
+    parser.add_argument("--max-speed", type=float, default=3.0, help="px/frame")
+    parser.add_argument("--moving-fraction", type=float, default=0.5)
+    parser.add_argument("--noise", type=float, default=8.0, help="Noise standard deviation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU threshold for a match")
+    parser.add_argument("--find-cell-images", type=int, default=50,
+                        help="Frames used for the find_cell benchmark")
+    parser.add_argument("--pipeline-detector", choices=("classical", "yolo"), default="classical")
+    parser.add_argument("--model", default=None, help="YOLO weights for --pipeline-detector yolo")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"Unknown targets: {', '.join(sorted(unknown))}")
+    if args.pipeline_detector == 'yolo' and args.model is None:
+        import config
+        args.model = config.MODEL_PATH
+
+    video_params = {
+        'num_frames': args.frames, 'width': args.width, 'height': args.height,
+        'cells': args.cells, 'radius_range': (args.min_radius, args.max_radius),
+        'max_speed': args.max_speed, 'moving_fraction': args.moving_fraction,
+        'noise': args.noise, 'seed': args.seed
+    }
+
+    results = {}
+    for target in targets:
+        print(f"Running {target}...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            results[target] = pool.submit(run_target, target, video_params, args).result()
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'video': SyntheticVideo(**video_params).params,
+        'results': results
+    }
+
+    print(f"\n{'target':<10} {'items/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'peak MB':>8} "
+          f"{'MOTA':>7} {'ID sw':>6}")
+    for target, result in results.items():
+        tracking = result.get('tracking', {})
+        print(f"{target:<10} {result['throughput_per_s']:>9} {result['p50_ms']:>8} "
+              f"{result['p99_ms']:>8} {str(result['peak_rss_mb']):>8} "
+              f"{str(tracking.get('mota', '-')):>7} {str(tracking.get('id_switches', '-')):>6}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Synthetic Cell Videos
+Microscopy-like frames of moving cells with ground-truth tracks
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+
+class SyntheticVideo:
+    """
+    Deterministic synthetic video
+
+    Cells are dark ellipses with a bright halo on an unevenly lit background
+    with sensor noise. A fraction of the cells stays in place, the others
+    move with constant speed and bounce off the borders. Frames are rendered
+    on demand (frames() can be iterated any number of times with identical
+    output), the ground truth is computed up front.
+    """
+
+    def __init__(self, num_frames=200, width=640, height=480, cells=20,
+                 radius_range=(17, 24), max_speed=3.0, moving_fraction=0.5,
+                 noise=8.0, seed=0):
+        """
+        Args:
+            num_frames (int): Video length
+            width, height (int): Resolution
+            cells (int): Number of cells
+            radius_range (tuple): Min/max cell radius in pixels
+            max_speed (float): Maximum speed of moving cells (px/frame)
+            moving_fraction (float): Fraction of cells that move
+            noise (float): Standard deviation of the Gaussian sensor noise
+            seed (int): Random seed (same seed = same video)
+        """
+        self.num_frames = num_frames
+        self.width = width
+        self.height = height
+        self.noise = noise
+        self.seed = seed
+        self.params = {
+            'num_frames': num_frames, 'width': width, 'height': height, 'cells': cells,
+            'radius_range': list(radius_range), 'max_speed': max_speed,
+            'moving_fraction': moving_fraction, 'noise': noise, 'seed': seed
+        }
+
+        rng = np.random.default_rng(seed)
+        self.radii = rng.uniform(radius_range[0], radius_range[1], size=(cells, 2))
+        self.angles = rng.uniform(0, 180, size=cells)
+        margin = radius_range[1] + 2
+        start = rng.uniform([margin, margin], [width - margin, height - margin], size=(cells, 2))
+        speed = rng.uniform(0.3, 1.0, size=cells) * max_speed
+        direction = rng.uniform(0, 2 * np.pi, size=cells)
+        velocity = np.stack([np.cos(direction), np.sin(direction)], axis=1) * speed[:, None]
+        velocity[rng.random(cells) >= moving_fraction] = 0
+
+        # Positions of every frame, bouncing off the borders
+        self.positions = np.empty((num_frames, cells, 2))
+        position = start.copy()
+        low = np.array([margin, margin])
+        high = np.array([width - margin, height - margin])
+        for index in range(num_frames):
+            self.positions[index] = position
+            position = position + velocity
+            bounce = (position < low) | (position > high)
+            velocity[bounce] *= -1
+            position = np.clip(position, low, high)
+
+        self.moving = np.any(velocity != 0, axis=1)
+
+        # Unevenly lit background (brighter in the middle)
+        ys, xs = np.mgrid[0:height, 0:width]
+        distance = np.hypot((xs - width / 2) / width, (ys - height / 2) / height)
+        self.background = (205 - 60 * distance).astype(np.float32)
+
+    def ground_truth(self, index):
+        """
+        Ground truth of one frame
+
+        Returns:
+            list: (track_id, (x1, y1, x2, y2)) per cell, track IDs start at 1
+        """
+        boxes = []
+        for cell, (cx, cy) in enumerate(self.positions[index]):
+            half_w, half_h = self._half_extent(cell)
+            boxes.append((cell + 1, (int(round(cx - half_w)), int(round(cy - half_h)),
+                                     int(round(cx + half_w)), int(round(cy + half_h)))))
+        return boxes
+
+    def _half_extent(self, cell):
+        """Half width/height of the rotated ellipse's bounding box"""
+        a, b = self.radii[cell]
+        theta = np.deg2rad(self.angles[cell])
+        half_w = np.sqrt((a * np.cos(theta)) ** 2 + (b * np.sin(theta)) ** 2)
+        half_h = np.sqrt((a * np.sin(theta)) ** 2 + (b * np.cos(theta)) ** 2)
+        return half_w, half_h
+
+    def frame(self, index):
+        """Render one BGR frame"""
+        image = self.background.copy()
+        for cell, (cx, cy) in enumerate(self.positions[index]):
+            center = (int(round(cx)), int(round(cy)))
+            a, b = self.radii[cell]
+            # Bright halo, then the dark cell body
+            cv2.ellipse(image, center, (int(a + 3), int(b + 3)), self.angles[cell], 0, 360, 235, -1)
+            cv2.ellipse(image, center, (int(a), int(b)), self.angles[cell], 0, 360, 70, -1)
+
+        image = cv2.GaussianBlur(image, (5, 5), 0)
+        rng = np.random.default_rng((self.seed, index))
+        image += rng.normal(0, self.noise, size=image.shape).astype(np.float32)
+        gray = np.clip(image, 0, 255).astype(np.uint8)
+        return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+    def frames(self):
+        """Iterate over all frames"""
+        for index in range(self.num_frames):
+            yield self.frame(index)
+
+    def write_video(self, path, fps=30):
+        """Encode the frames to a video file (mp4v)"""
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (self.width, self.height))
+        for image in self.frames():
+            writer.write(image)
+        writer.release()
+        return path
+
+    def write_images(self, directory, limit=None):
+        """Write frames as PNG files, returns their paths"""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for index in range(self.num_frames if limit is None else min(limit, self.num_frames)):
+            path = os.path.join(directory, f"frame_{index:06d}.png")
+            cv2.imwrite(path, self.frame(index))
+            paths.append(path)
+        return paths
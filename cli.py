@@ -0,0 +1,340 @@
+"""
+Bio-Oracle Headless Pipeline
+Runs source -> detector -> tracker -> logger without a display, for servers,
+cron jobs and containers (no X server or Qt platform plugin needed)
+
+Usage:
+    python cli.py video.mp4
+    python cli.py recordings/*.mp4 --workers 4 --format csv --output-dir results
+    python cli.py video.mp4 --export-dir annotated --export-scale 0.5 --export-every 2
+    python cli.py stack.tif --config run.toml --set detection.interval=3
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import config
+from modules.detector import CellDetector
+from modules.exporter import VideoExporter
+from modules.logger import DataLogger
+from modules.profiling import profiler
+from modules.scheduler import DetectionScheduler
+from modules.settings import add_settings_arguments, settings_from_args
+from modules.sources import open_source, source_name
+from modules.tracker import CellTracker
+
+
+# Per-frame output formats: DataLogger text logs, CSV rows or JSON lines
+FORMATS = ('text', 'csv', 'json')
+
+FRAME_FIELDS = ('frame', 'timestamp', 'detections', 'total', 'moving', 'staying', 'unknown')
+
+
+def build_detector(settings):
+    """CellDetector from the detection settings, behind a DetectionScheduler for interval > 1"""
+    detection = settings.detection
+    detector = CellDetector(
+        model_path=detection.model_path,
+        confidence_threshold=detection.confidence_threshold,
+        device=detection.device,
+        img_size=detection.img_size,
+        min_area=detection.min_area,
+        max_area=detection.max_area
+    )
+    if detection.interval > 1:
+        detector = DetectionScheduler(detector, interval=detection.interval)
+    return detector
+
+
+def build_tracker(settings):
+    tracking = settings.tracking
+    return CellTracker(
+        movement_threshold=tracking.movement_threshold,
+        staying_frame_count=tracking.staying_frame_count,
+        max_history=tracking.max_history,
+        max_match_distance=tracking.max_match_distance,
+        max_missed_frames=tracking.max_missed_frames
+    )
+
+
+class FrameWriter:
+    """Per-frame counts as DataLogger text logs, CSV or JSON lines"""
+
+    def __init__(self, fmt, output_dir, name):
+        self.fmt = fmt
+        self.logger = None
+        self.file = None
+        if fmt == 'text':
+            self.logger = DataLogger(logs_dir=os.path.join(output_dir, name),
+                                     date_format=config.LOG_DATE_FORMAT,
+                                     time_format=config.LOG_TIME_FORMAT)
+            self.path = self.logger.counts_path
+        elif fmt == 'csv':
+            self.path = os.path.join(output_dir, f"{name}_frames.csv")
+            self.file = open(self.path, 'w', newline='')
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(FRAME_FIELDS)
+        else:
+            self.path = os.path.join(output_dir, f"{name}_frames.jsonl")
+            self.file = open(self.path, 'w')
+
+    def write(self, frame_number, timestamp, detections, counts):
+        if self.logger:
+            self.logger.log_batch(frame_number, detections, counts)
+            return
+        row = (frame_number, timestamp, len(detections), counts['total'],
+               counts['moving'], counts['staying'], counts['unknown'])
+        if self.fmt == 'csv':
+            self.csv.writerow(row)
+        else:
+            self.file.write(json.dumps(dict(zip(FRAME_FIELDS, row))) + "\n")
+
+    def close(self, summary=None):
+        """Finish the output, the summary is logged in 'text' format (None = run failed)"""
+        if self.logger:
+            if summary is not None:
+                self.logger.log_summary(summary)
+            self.logger.close()
+        else:
+            self.file.close()
+
+
+class Progress:
+    """
+    Progress on stderr
+
+    'bar' redraws one line (terminals), 'log' prints a line every `interval`
+    seconds (cron and container logs), 'none' stays quiet.
+    """
+
+    def __init__(self, name, total, mode='log', interval=10.0):
+        self.name = name
+        self.total = total
+        self.mode = mode
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last = self.start
+
+    def update(self, frames):
+        if self.mode == 'none':
+            return
+        now = time.perf_counter()
+        if self.mode == 'bar':
+            if now - self.last < 0.2:
+                return
+        elif now - self.last < self.interval:
+            return
+        self.last = now
+        self._report(frames, now)
+
+    def finish(self, frames):
+        if self.mode == 'none':
+            return
+        self._report(frames, time.perf_counter())
+        if self.mode == 'bar':
+            sys.stderr.write("\n")
+        sys.stderr.flush()
+
+    def _report(self, frames, now):
+        elapsed = now - self.start
+        fps = frames / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            done = f"{frames}/{self.total} frames ({100 * frames / self.total:.0f}%)"
+        else:
+            done = f"{frames} frames"
+        line = f"{self.name}: {done}, {fps:.1f} fps, {elapsed:.0f}s"
+        if self.mode == 'bar':
+            width = 30
+            filled = int(width * frames / self.total) if self.total else 0
+            sys.stderr.write(f"\r[{'#' * filled}{'.' * (width - filled)}] {line}")
+        else:
+            sys.stderr.write(f"[{time.strftime(config.LOG_TIME_FORMAT)}] {line}\n")
+        sys.stderr.flush()
+
+
+def process_source(source, settings, output_dir, fmt='text', export_dir=None,
+                   max_frames=None, progress='log', progress_interval=10.0, export_options=None):
+    """
+    Run the full pipeline over one source, returns a summary dict
+
+    Args:
+        source (str): Video file, image directory, TIFF/NPY stack or camera index
+        settings (Settings): Pipeline settings
+        output_dir (str): Directory for the per-frame output
+        fmt (str): Per-frame output format (FORMATS)
+        export_dir (str): Write the annotated video here (None = no export)
+        max_frames (int): Stop after this many frames (None = whole source)
+        progress (str): 'bar', 'log' or 'none'
+        progress_interval (float): Seconds between 'log' progress lines
+        export_options (dict): VideoExporter arguments (scale, every_n, only_changed, backend)
+    """
+    # Unique per source directory, same-named sources do not share output files
+    name = source_name(source)
+    frame_source = open_source(source, prefetch=settings.input.frame_prefetch,
+                               grayscale=settings.input.grayscale)
+    writer = None
+    exporter = None
+    summary = None
+    try:
+        detector = build_detector(settings)
+        tracker = build_tracker(settings)
+        writer = FrameWriter(fmt, output_dir, name)
+        if export_dir:
+            # Drawing and encoding run in the exporter's writer thread
+            exporter = VideoExporter(os.path.join(export_dir, f"{name}_annotated.mp4"),
+                                     fps=frame_source.metadata.get('fps') or 30.0,
+                                     **(export_options or {}))
+
+        total = len(frame_source)
+        if max_frames:
+            total = min(total, max_frames) if total else max_frames
+        reporter = Progress(name, total, progress, progress_interval)
+        if profiler.enabled:
+            profiler.reset()
+
+        frames = 0
+        detections_total = 0
+        max_cells = 0
+        start = time.perf_counter()
+        for frame, info in frame_source:
+            if max_frames and frames >= max_frames:
+                break
+            with profiler.stage('detect'):
+                detections = detector.detect(frame)
+            with profiler.stage('track'):
+                tracked = tracker.update(detections)
+            counts = tracker.get_counts()
+            with profiler.stage('log'):
+                writer.write(info['index'], info['timestamp'], detections, counts)
+
+            if exporter is not None:
+                with profiler.stage('export'):
+                    exporter.write(frame, tracked)
+
+            frames += 1
+            detections_total += len(detections)
+            max_cells = max(max_cells, counts['total'])
+            reporter.update(frames)
+
+        if exporter is not None:
+            exporter.close()  # Waits for the queued frames
+        elapsed = time.perf_counter() - start
+
+        reporter.finish(frames)
+        summary = {
+            'source': str(source),
+            'frames': frames,
+            'detections': detections_total,
+            'mean_detections': round(detections_total / max(frames, 1), 3),
+            'max_cells': max_cells,
+            'tracks': tracker.next_track_id - 1,
+            'seconds': round(elapsed, 2),
+            'fps': round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+            'output': writer.path,
+            'export': exporter.path if exporter else None,
+        }
+        if exporter is not None:
+            summary['exported_frames'] = exporter.frames_written
+        if profiler.enabled:
+            summary['timing'] = {
+                stage: {'p50_ms': round(stats['p50_ms'], 3), 'p99_ms': round(stats['p99_ms'], 3)}
+                for stage, stats in profiler.summary().items()
+            }
+    finally:
+        frame_source.close()
+        if summary is None and exporter is not None:
+            # Failed run: stop the writer thread, the original error is reported
+            with contextlib.suppress(IOError):
+                exporter.close()
+        if writer is not None:
+            writer.close(None if summary is None else
+                         {key: value for key, value in summary.items() if key != 'timing'})
+    return summary
+
+
+def _run_one(source, settings, args, progress):
+    """Returns (source, summary or None, error or None) so failures never stop the run"""
+    try:
+        export_options = {'scale': args.export_scale, 'every_n': args.export_every,
+                          'only_changed': args.export_changed, 'backend': args.export_backend}
+        summary = process_source(source, settings, args.output_dir, args.format,
+                                 args.export_dir, args.max_frames, progress,
+                                 args.progress_interval, export_options)
+        return source, summary, None
+    except Exception as e:
+        return source, None, f"{type(e).__name__}: {e}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless cell detection and tracking")
+    parser.add_argument("sources", nargs="+",
+                        help="Video files, image directories, TIFF/NPY stacks or camera indices")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Sources processed in parallel (one process and model each)")
+    parser.add_argument("--output-dir", default=config.LOGS_DIR)
+    parser.add_argument("--format", choices=FORMATS, default='text',
+                        help="Per-frame output: DataLogger text logs, CSV or JSON lines")
+    parser.add_argument("--export-dir", help="Write annotated videos to this directory")
+    parser.add_argument("--export-scale", type=float, default=1.0,
+                        help="Downscale factor of the exported video (e.g. 0.5)")
+    parser.add_argument("--export-every", type=int, default=1, help="Export every Nth frame")
+    parser.add_argument("--export-changed", action="store_true",
+                        help="Only export frames whose overlay changed")
+    parser.add_argument("--export-backend", choices=['opencv', 'ffmpeg'], default=config.EXPORT_BACKEND)
+    parser.add_argument("--max-frames", type=int, help="Stop each source after N frames")
+    parser.add_argument("--progress", choices=['auto', 'bar', 'log', 'none'], default='auto',
+                        help="'auto' draws a bar on terminals and logs lines otherwise")
+    parser.add_argument("--progress-interval", type=float, default=10.0,
+                        help="Seconds between progress lines in 'log' mode")
+    add_settings_arguments(parser)
+    args = parser.parse_args(argv)
+    settings = settings_from_args(args, parser)
+
+    progress = args.progress
+    if progress == 'auto':
+        progress = 'bar' if sys.stderr.isatty() else 'log'
+    workers = max(1, min(args.workers, len(args.sources)))
+    if workers > 1 and progress == 'bar':
+        progress = 'log'  # Bars of parallel workers would overwrite each other
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.export_dir:
+        os.makedirs(args.export_dir, exist_ok=True)
+
+    results = []
+    if workers == 1:
+        for source in args.sources:
+            results.append(_run_one(source, settings, args, progress))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_one, source, settings, args, progress)
+                       for source in args.sources]
+            for future in as_completed(futures):
+                results.append(future.result())
+
+    summaries, failures = [], []
+    for source, summary, error in results:
+        if error is None:
+            summaries.append(summary)
+            print(f"Done: {source} ({summary['frames']} frames, {summary['fps']} fps)")
+        else:
+            failures.append({'source': source, 'error': error})
+            print(f"Failed: {source}: {error}", file=sys.stderr)
+
+    summary_path = os.path.join(args.output_dir, "summary.json")
+    with open(summary_path, 'w') as f:
+        json.dump({'sources': summaries, 'failures': failures}, f, indent=2)
+    print(f"{len(summaries)} processed, {len(failures)} failed, summary saved to {summary_path}")
+
+    # Non-zero exit status for cron and job schedulers
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Background models for CellDetector
+Running background estimates that produce the foreground mask directly
+instead of per-frame adaptive thresholding
+"""
+import cv2
+import numpy as np
+
+
+class RunningMedianBackground:
+    """
+    Approximate running median background
+
+    Each pixel of the background moves one grey level towards the current
+    frame per update, which converges to the temporal median in O(1) per
+    pixel and frame without storing a frame history.
+    """
+
+    def __init__(self, threshold=25, update_interval=1, warmup_frames=10):
+        self.threshold = threshold
+        self.update_interval = update_interval
+        self.warmup_frames = warmup_frames  # Frames updated at full rate after init
+        self.background = None
+        self.frame_count = 0
+
+    def params(self):
+        return {"model": "median", "threshold": self.threshold,
+                "update_interval": self.update_interval,
+                "warmup_frames": self.warmup_frames}
+
+    def reset(self):
+        self.background = None
+        self.frame_count = 0
+
+    def apply(self, gray):
+        """Update the model with a grayscale frame and return its foreground mask"""
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.copy()
+            self.frame_count = 0
+
+        if self.frame_count < self.warmup_frames:
+            # Converge quickly: blend towards the frame during warmup
+            cv2.addWeighted(self.background, 0.5, gray, 0.5, 0, dst=self.background)
+        elif self.frame_count % self.update_interval == 0:
+            self.background += (gray > self.background).astype(np.uint8)
+            self.background -= (gray < self.background).astype(np.uint8)
+        self.frame_count += 1
+
+        diff = cv2.absdiff(gray, self.background)
+        _, foreground = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
+        return foreground
+
+
+class MOG2Background:
+    """OpenCV Gaussian-mixture background subtractor (MOG2)"""
+
+    def __init__(self, history=500, var_threshold=16, learning_rate=-1):
+        self.history = history
+        self.var_threshold = var_threshold
+        self.learning_rate = learning_rate
+        self.reset()
+
+    def params(self):
+        return {"model": "mog2", "history": self.history,
+                "var_threshold": self.var_threshold,
+                "learning_rate": self.learning_rate}
+
+    def reset(self):
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=self.history, varThreshold=self.var_threshold, detectShadows=False)
+
+    def apply(self, gray):
+        """Update the model with a grayscale frame and return its foreground mask"""
+        return self.subtractor.apply(gray, learningRate=self.learning_rate)
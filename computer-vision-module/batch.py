@@ -0,0 +1,319 @@
+"""
+Headless batch analysis for CellDetector
+Consumes a directory or manifest of videos, schedules them across worker
+processes through a persistent SQLite job queue and writes per-video summaries
+
+Usage:
+    python batch.py recordings/ --workers 4 --output-dir batch_results
+    python batch.py manifest.txt --workers 8
+    python batch.py recordings/ --config run.toml --set classical.min_area=600
+    python batch.py slides/ --resize none --tile-size 2048 --overlap 128
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from background import MOG2Background, RunningMedianBackground
+from detector import CellDetector
+from motion import MotionGate
+from roi import load_roi
+from tiling import TiledCellDetector
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.settings import add_settings_arguments, settings_from_args
+from modules.sources import open_source, source_name
+
+
+# Videos and time-lapse stacks (TIFF/NPY are memory-mapped when uncompressed)
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".tif", ".tiff", ".npy")
+
+# Frames decoded ahead by a background thread while the detector runs
+PREFETCH_FRAMES = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    started_at REAL,
+    finished_at REAL,
+    summary TEXT,
+    error TEXT
+)
+"""
+
+
+class JobQueue:
+    """Persistent on-disk video job queue (pending -> running -> done/failed)"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, path):
+        """Queue a video; completed videos are skipped unless the file changed"""
+        stat = os.stat(path)
+        row = self.conn.execute(
+            "SELECT size, mtime, status FROM jobs WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            self.conn.execute(
+                "INSERT INTO jobs (path, size, mtime) VALUES (?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime))
+            return True
+        size, mtime, status = row
+        if (size, mtime) != (stat.st_size, stat.st_mtime):
+            self.conn.execute(
+                "UPDATE jobs SET size = ?, mtime = ?, status = 'pending', attempts = 0, "
+                "error = NULL WHERE path = ?", (stat.st_size, stat.st_mtime, path))
+            return True
+        return status == "pending"
+
+    def reset_stale(self):
+        """Requeue jobs left 'running' by an interrupted run"""
+        self.conn.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'")
+
+    def retry_failed(self, max_attempts):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'pending' WHERE status = 'failed' AND attempts < ?",
+            (max_attempts,))
+
+    def claim(self):
+        """Atomically take the next pending job, returns its path or None"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT path FROM jobs WHERE status = 'pending' ORDER BY path LIMIT 1").fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+                "started_at = ? WHERE path = ?", (time.time(), row[0]))
+            self.conn.execute("COMMIT")
+            return row[0]
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def complete(self, path, summary):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'done', finished_at = ?, summary = ? WHERE path = ?",
+            (time.time(), json.dumps(summary), path))
+
+    def fail(self, path, error):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE path = ?",
+            (time.time(), error, path))
+
+    def counts(self):
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        return dict(rows.fetchall())
+
+    def summaries(self):
+        rows = self.conn.execute(
+            "SELECT path, summary FROM jobs WHERE status = 'done' ORDER BY path")
+        return [json.loads(summary) for _, summary in rows.fetchall()]
+
+
+def collect_videos(source):
+    """List videos from a directory or a manifest file (one path per line)"""
+    if os.path.isdir(source):
+        return sorted(
+            os.path.abspath(os.path.join(source, name))
+            for name in os.listdir(source)
+            if name.lower().endswith(VIDEO_EXTENSIONS))
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    videos = []
+    with open(source) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                videos.append(os.path.abspath(os.path.join(base_dir, line)))
+    return videos
+
+
+def analyze_video(video_path, output_dir, resize=(1024, 768), roi_path=None,
+                  incremental=False, background=None, settings=None, tile_size=None,
+                  overlap=128):
+    """
+    Run CellDetector over a whole video without display, returns a summary dict
+
+    `video_path` can be any frame source (video, image directory, TIFF stack);
+    `settings` (modules.settings.Settings) configures the detector. With
+    `tile_size` frames are processed in overlapping tiles (TiledCellDetector).
+    """
+    # Detection only needs the gray image, so decode straight to one channel
+    source = open_source(video_path, prefetch=PREFETCH_FRAMES, grayscale=True)
+
+    detector = CellDetector(settings.classical if settings is not None else None)
+    detector.verbose = False
+    if incremental:
+        detector.motion_gate = MotionGate()
+    if background == "median":
+        detector.background = RunningMedianBackground()
+    elif background == "mog2":
+        detector.background = MOG2Background()
+
+    tiled = TiledCellDetector(detector, tile_size, overlap) if tile_size else None
+
+    # Same-named videos from different directories get their own results file
+    name = source_name(video_path)
+    results_path = os.path.join(output_dir, f"{name}_results.txt")
+
+    frame_number = 0
+    locked_total = 0
+    max_locked = 0
+    start = time.perf_counter()
+
+    with open(results_path, "w") as f:
+        f.write(f"Video Tracking Results: {os.path.basename(video_path)}\n")
+        f.write("=" * 60 + "\n\n")
+
+        for frame, _ in source:
+            if resize:
+                frame = cv2.resize(frame, resize)
+            if roi_path and detector.roi_mask is None:
+                detector.set_roi(load_roi(roi_path, frame.shape))
+
+            if tiled is None:
+                _, filtered_cells = detector.detect(frame, frame_number)
+            else:
+                filtered_cells, _, _ = tiled.process(frame, frame_number)
+            locked_count = len(detector.locked_cells)
+
+            f.write(f"Frame {frame_number}: {locked_count} locked, "
+                    f"{len(filtered_cells)} candidates\n")
+
+            locked_total += locked_count
+            max_locked = max(max_locked, locked_count)
+            frame_number += 1
+
+        f.write(f"\nVideo processing completed at frame {frame_number}\n")
+
+    source.close()
+    if tiled is not None:
+        tiled.close()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "video": video_path,
+        "frames": frame_number,
+        "mean_locked": round(locked_total / max(frame_number, 1), 3),
+        "max_locked": max_locked,
+        "final_locked": len(detector.locked_cells),
+        "cells_detected": detector.next_cell_id - 1,
+        "seconds": round(elapsed, 2),
+        "fps": round(frame_number / elapsed, 2) if elapsed > 0 else 0.0,
+        "results_file": results_path,
+    }
+
+
+def worker(db_path, output_dir, resize, roi_path=None, incremental=False,
+           background=None, settings=None, tile_size=None, overlap=128):
+    """Worker process loop: claim jobs until the queue is empty"""
+    queue = JobQueue(db_path)
+    processed = 0
+    try:
+        while True:
+            path = queue.claim()
+            if path is None:
+                break
+            try:
+                summary = analyze_video(path, output_dir, resize, roi_path, incremental,
+                                        background, settings, tile_size, overlap)
+                queue.complete(path, summary)
+                print(f"  Done: {os.path.basename(path)} "
+                      f"({summary['frames']} frames, {summary['fps']} fps)")
+            except Exception as e:
+                queue.fail(path, str(e))
+                print(f"  Failed: {os.path.basename(path)}: {e}")
+            processed += 1
+    finally:
+        queue.close()
+    return processed
+
+
+def write_summary(summaries, output_path):
+    with open(output_path, "w") as f:
+        json.dump(summaries, f, indent=2)
+
+
+def parse_size(text):
+    if text.lower() == "none":
+        return None
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless batch cell tracking")
+    parser.add_argument("source", help="Directory of videos or manifest file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output-dir", default="batch_results")
+    parser.add_argument("--queue", help="SQLite job queue (default <output-dir>/jobs.sqlite)")
+    parser.add_argument("--resize", type=parse_size, default=(1024, 768),
+                        help="Resize frames to WxH, or 'none' (default 1024x768)")
+    parser.add_argument("--roi", help="ROI file (JSON polygons or mask image)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-segment regions that changed between frames")
+    parser.add_argument("--background", choices=["median", "mog2"],
+                        help="Segment with a running background model")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="Retry failed videos up to this many attempts")
+    parser.add_argument("--tile-size", type=int,
+                        help="Process frames in overlapping tiles of this size "
+                             "(for large frames, usually with --resize none)")
+    parser.add_argument("--overlap", type=int, default=128,
+                        help="Tile overlap in px, larger than the biggest cell (default 128)")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+    settings = settings_from_args(args, parser)
+    if args.tile_size and args.incremental:
+        parser.error("--incremental cannot be combined with --tile-size")
+    if args.tile_size and args.overlap >= args.tile_size:
+        parser.error("--overlap must be smaller than --tile-size")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    db_path = args.queue or os.path.join(args.output_dir, "jobs.sqlite")
+
+    queue = JobQueue(db_path)
+    queue.reset_stale()
+    queue.retry_failed(args.max_attempts)
+    videos = collect_videos(args.source)
+    queued = sum(queue.add(video) for video in videos)
+    print(f"Found {len(videos)} videos, {queued} queued, "
+          f"{len(videos) - queued} already completed or out of retries")
+
+    if queued:
+        workers = max(1, min(args.workers, queued))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(worker, db_path, args.output_dir, args.resize, args.roi,
+                                   args.incremental, args.background, settings,
+                                   args.tile_size, args.overlap)
+                       for _ in range(workers)]
+            for future in futures:
+                future.result()
+
+    summary_path = os.path.join(args.output_dir, "summary.json")
+    write_summary(queue.summaries(), summary_path)
+    print(f"Queue status: {queue.counts()}")
+    print(f"Summary saved to {summary_path}")
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,303 @@
 import cv2
 import numpy as np
 import math
+import hashlib
+import os
+import sys
+
+from roi import roi_rects
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.detections import DetectionBatch
+from modules.exporter import VideoExporter
+from modules.renderer import OverlayRenderer, box_corners
+from modules.profiling import profiler
+from modules.sources import open_source
+from modules.settings import (ClassicalSettings, PREPROCESSING_FIELDS, SettingsWatcher,
+                              add_settings_arguments, settings_from_args)
 
 
 class CellDetector:
-    def __init__(self):
-        self.min_area = 800
-        self.max_area = 2000
+    def __init__(self, settings=None, mask_cache=None):
         self.locked_cells = []  # (x, y, w, h, cell_id)
         self.next_cell_id = 1
         self.candidate_cells = {}
-        self.stability_threshold = 3
         self.removed_cells = set()  # Track removed cell IDs to never reuse
         self.cell_velocities = {}  # Track velocity for each cell: {cell_id: (vx, vy)}
         self.cell_positions = {}  # Track position history: {cell_id: [(cx, cy), ...]}
+        self.verbose = True  # Print cell lock/removal events
+        self.renderer = OverlayRenderer(font=cv2.FONT_HERSHEY_SIMPLEX, font_scale=0.6, font_thickness=2)
+        
+        # Area range, contour filtering, tracking and preprocessing parameters
+        # (min_area, search_radius, blur_size...) are attributes set from ClassicalSettings
+        self.settings = None
+        self.configure(settings or ClassicalSettings())
+        self.mask_cache = mask_cache  # Optional MaskCache shared across runs
+        
+        # Optional region of interest (processing is restricted to its sub-rectangles)
+        self.roi_mask = None
+        self.roi_rects = []  # (x1, y1, x2, y2)
+        self.roi_key = None
+        
+        # Optional MotionGate for incremental mode (only changed regions are re-segmented)
+        self.motion_gate = None
+        self.last_mask = None
+        self.last_search_mask = None
+        self.last_cells = None
+        
+        # Optional background model (RunningMedianBackground or MOG2Background) that
+        # replaces adaptive thresholding with background subtraction
+        self.background = None
+    
+    def configure(self, settings):
+        """
+        Apply ClassicalSettings between frames, keeping locked cells and candidates
+        
+        The incremental-mode mask is dropped when a preprocessing parameter
+        changed, so the next frame is fully re-segmented.
+        """
+        previous = self.settings
+        for name, value in vars(settings).items():
+            setattr(self, name, value)
+        self.settings = settings
+        if previous is not None and any(getattr(previous, name) != getattr(settings, name)
+                                        for name in PREPROCESSING_FIELDS):
+            self.last_mask = None
+    
+    def set_roi(self, roi_mask, margin=16):
+        """Restrict preprocessing and contour search to a region of interest"""
+        if roi_mask is None:
+            self.roi_mask = None
+            self.roi_rects = []
+            self.roi_key = None
+            return
+        
+        self.roi_mask = np.where(roi_mask > 0, 255, 0).astype(np.uint8)
+        self.roi_rects = roi_rects(self.roi_mask, margin)
+        self.roi_key = hashlib.sha1(self.roi_mask.tobytes()).hexdigest()[:16]
+    
+    def preprocessing_params(self):
+        """Parameters the binary mask depends on (used as the cache key)"""
+        return {
+            "blur_size": self.blur_size,
+            "clahe_clip_limit": self.clahe_clip_limit,
+            "clahe_grid_size": self.clahe_grid_size,
+            "threshold_block_size": self.threshold_block_size,
+            "threshold_c": self.threshold_c,
+            "morph_kernel_size": self.morph_kernel_size,
+            "roi": self.roi_key,
+            "background": self.background.params() if self.background is not None else None,
+        }
+    
+    @profiler.timed('preprocess')
+    def preprocess(self, frame):
+        """Binary mask of a frame, only computed inside the ROI if one is set"""
+        if self.background is not None:
+            mask = self.segment_foreground(frame)
+            if self.roi_mask is not None:
+                mask = cv2.bitwise_and(mask, self.roi_mask)
+            return mask
         
-    def process(self, frame):
-        output_frame = frame.copy()
+        if self.roi_mask is None:
+            return self.segment(frame)
         
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+        for x1, y1, x2, y2 in self.roi_rects:
+            region = self.segment(frame[y1:y2, x1:x2])
+            mask[y1:y2, x1:x2] = cv2.bitwise_and(region, self.roi_mask[y1:y2, x1:x2])
+        return mask
+    
+    def segment(self, frame):
+        """gray -> blur -> CLAHE -> adaptive threshold -> morphology"""
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        blurred = cv2.GaussianBlur(gray, (self.blur_size, self.blur_size), 0)
         
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        clahe = cv2.createCLAHE(clipLimit=self.clahe_clip_limit,
+                                tileGridSize=(self.clahe_grid_size, self.clahe_grid_size))
         enhanced = clahe.apply(blurred)
         
         # Simple adaptive threshold - more reliable
         binary = cv2.adaptiveThreshold(
             enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY_INV, 11, 2)
+            cv2.THRESH_BINARY_INV, self.threshold_block_size, self.threshold_c)
         
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        kernel = cv2.getStructuringElement(
+            cv2.MORPH_ELLIPSE, (self.morph_kernel_size, self.morph_kernel_size))
         opening = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel, iterations=1)
         closing = cv2.morphologyEx(opening, cv2.MORPH_CLOSE, kernel, iterations=1)
+        return closing
+    
+    def segment_foreground(self, frame):
+        """gray -> blur -> background subtraction -> morphology"""
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        blurred = cv2.GaussianBlur(gray, (self.blur_size, self.blur_size), 0)
+        foreground = self.background.apply(blurred)
+        
+        kernel = cv2.getStructuringElement(
+            cv2.MORPH_ELLIPSE, (self.morph_kernel_size, self.morph_kernel_size))
+        opening = cv2.morphologyEx(foreground, cv2.MORPH_OPEN, kernel, iterations=1)
+        closing = cv2.morphologyEx(opening, cv2.MORPH_CLOSE, kernel, iterations=1)
+        return closing
+    
+    def get_mask(self, frame, frame_index=None):
+        """Return the binary mask for a frame, reusing the mask cache when possible"""
+        if self.mask_cache is None or frame_index is None:
+            return self.preprocess(frame)
+        
+        params = self.preprocessing_params()
+        mask = self.mask_cache.get(frame_index, params)
+        if mask is None:
+            mask = self.preprocess(frame)
+            self.mask_cache.put(frame_index, params, mask)
+        return mask
+    
+    def process(self, frame, frame_index=None):
+        search_mask, filtered_cells = self.detect(frame, frame_index)
+        return self.draw(frame, search_mask, filtered_cells)
+    
+    def detect(self, frame, frame_index=None):
+        """Detection and tracking without drawing, returns (search_mask, filtered_cells)"""
+        # Background models need every full frame, so they bypass the motion gate
+        if self.motion_gate is not None and self.background is None:
+            return self.update_incremental(frame)
+        closing = self.get_mask(frame, frame_index)
+        return self.update(closing)
+    
+    def update_incremental(self, frame):
+        """
+        Motion-gated update: only regions that changed are re-segmented
+        
+        When nothing changed the contours of the previous frame are carried
+        forward and only tracking runs, so static cells still get locked.
+        """
+        rects = self.motion_gate.changed_rects(frame)
+        
+        if rects is None or self.last_mask is None or self.last_mask.shape != frame.shape[:2]:
+            self.last_mask = self.preprocess(frame)
+        elif rects:
+            height, width = frame.shape[:2]
+            margin = self.motion_gate.margin
+            for x1, y1, x2, y2 in rects:
+                # Segment with some context around the region, paste only the region
+                px1, py1 = max(0, x1 - margin), max(0, y1 - margin)
+                px2, py2 = min(width, x2 + margin), min(height, y2 + margin)
+                region = self.segment(frame[py1:py2, px1:px2])
+                region = region[y1 - py1:y2 - py1, x1 - px1:x2 - px1]
+                if self.roi_mask is not None:
+                    region = cv2.bitwise_and(region, self.roi_mask[y1:y2, x1:x2])
+                self.last_mask[y1:y2, x1:x2] = region
+        else:
+            filtered_cells = self.track(self.last_cells)
+            return self.last_search_mask, filtered_cells
+        
+        return self.update(self.last_mask)
+    
+    def update(self, closing):
+        """
+        Run contour filtering and tracking on a binary mask
+        
+        Returns the search mask (locked cells removed) and the filtered
+        candidate cells of this frame.
+        """
+        with profiler.stage('contours'):
+            search_mask = self.mask_locked(closing)
+            if self.roi_mask is None:
+                cells = self.extract_cells(search_mask)
+            else:
+                cells = DetectionBatch.concatenate([
+                    self.extract_cells(search_mask[y1:y2, x1:x2], offset=(x1, y1))
+                    for x1, y1, x2, y2 in self.roi_rects
+                ])
+        
+        # Kept for incremental mode
+        self.last_search_mask = search_mask
+        self.last_cells = cells
         
-        # Mask out locked cells from the binary image
+        filtered_cells = self.track(cells)
+        return search_mask, filtered_cells
+    
+    def mask_locked(self, closing, offset=(0, 0)):
+        """
+        Mask out locked cells from the binary image
+        
+        offset is the (x, y) position of the mask inside the full frame
+        when only a tile of the frame is processed.
+        """
         search_mask = closing.copy()
-        for locked_x, locked_y, locked_w, locked_h, _ in self.locked_cells:
-            # Create a larger exclusion zone to avoid re-detecting near locked cells
-            padding = 10
-            x1 = max(0, locked_x - padding)
-            y1 = max(0, locked_y - padding)
-            x2 = min(search_mask.shape[1], locked_x + locked_w + padding)
-            y2 = min(search_mask.shape[0], locked_y + locked_h + padding)
+        for x1, y1, x2, y2 in self.exclusion_boxes(closing.shape, offset):
             cv2.rectangle(search_mask, (x1, y1), (x2, y2), 0, -1)
+        return search_mask
+    
+    def exclusion_boxes(self, shape, offset=(0, 0)):
+        """Padded locked-cell boxes (x1, y1, x2, y2) overlapping the mask, clipped to it"""
+        if not self.locked_cells:
+            return []
+        
+        # Create a larger exclusion zone to avoid re-detecting near locked cells
+        boxes = np.array([cell[:4] for cell in self.locked_cells], dtype=np.int32)
+        boxes[:, 2:] += boxes[:, :2]
+        boxes[:, :2] -= self.lock_padding
+        boxes[:, 2:] += self.lock_padding
+        boxes -= np.array(offset * 2, dtype=np.int32)
+        # Test before clipping, boxes outside the mask would collapse onto its border
+        height, width = shape[:2]
+        visible = ((boxes[:, 2] > 0) & (boxes[:, 0] < width) &
+                   (boxes[:, 3] > 0) & (boxes[:, 1] < height))
+        boxes = boxes[visible]
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, width)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, height)
+        return boxes.tolist()
+    
+    def extract_cells(self, search_mask, offset=(0, 0)):
+        """
+        Find contours within the area range
         
-        contours, _ = cv2.findContours(search_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        Returns a DetectionBatch (box, center, area, perimeter) in full frame
+        coordinates; the contours are dropped once their features are read.
+        """
+        contours, _ = cv2.findContours(search_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                       offset=offset)
         
-        # First, find all current frame cells
-        current_frame_cells = []
+        boxes, centers, areas, perimeters = [], [], [], []
         for cnt in contours:
             area = cv2.contourArea(cnt)
             if self.min_area < area < self.max_area:
-                x, y, w, h = cv2.boundingRect(cnt)
-                aspect_ratio = float(w) / h if h > 0 else 0
-                if 0.2 < aspect_ratio < 6.0:
-                    M = cv2.moments(cnt)
-                    if M["m00"] != 0:
-                        cx = int(M["m10"] / M["m00"])
-                        cy = int(M["m01"] / M["m00"])
-                        current_frame_cells.append((x, y, w, h, cx, cy, area))
+                M = cv2.moments(cnt)
+                if M["m00"] != 0:
+                    x, y, w, h = cv2.boundingRect(cnt)
+                    boxes.append((x, y, x + w, y + h))
+                    centers.append((int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"])))
+                    areas.append(area)
+                    perimeters.append(cv2.arcLength(cnt, True))
+        return DetectionBatch.from_boxes(boxes, centers=np.reshape(centers, (-1, 2)),
+                                         area=areas, perimeter=perimeters)
+    
+    @staticmethod
+    def cell_rows(cells):
+        """(x, y, w, h, cx, cy, area, perimeter) tuples of a DetectionBatch for the per-cell loops"""
+        boxes = cells.boxes
+        sizes = boxes[:, 2:] - boxes[:, :2]
+        centers = cells.centers.astype(np.int32)
+        return list(zip(boxes[:, 0].tolist(), boxes[:, 1].tolist(),
+                        sizes[:, 0].tolist(), sizes[:, 1].tolist(),
+                        centers[:, 0].tolist(), centers[:, 1].tolist(),
+                        cells.areas.tolist(), cells.perimeters.tolist()))
+    
+    @profiler.timed('track')
+    def track(self, cells):
+        """
+        Update locked cells and candidates with the cells of the current frame
+        
+        Returns the filtered candidate cells of this frame (DetectionBatch).
+        """
+        rows = self.cell_rows(cells)
+        
+        # First, find all current frame cells
+        current_frame_cells = []
+        for x, y, w, h, cx, cy, area, perimeter in rows:
+            aspect_ratio = float(w) / h if h > 0 else 0
+            if self.min_track_aspect < aspect_ratio < self.max_track_aspect:
+                current_frame_cells.append((x, y, w, h, cx, cy, area))
         
         # Update locked cell positions with motion prediction
         updated_locked_cells = []
@@ -80,14 +319,14 @@ class CellDetector:
             # Search for cell near predicted position (within search radius)
             found_center = None
             min_distance = float('inf')
-            search_radius = 150  # Large radius for fast-moving cells
+            search_radius = self.search_radius  # Large radius for fast-moving cells
             
             for x, y, w, h, cx, cy, area in current_frame_cells:
                 dist = math.sqrt((cx - predicted_cx)**2 + (cy - predicted_cy)**2)
                 if dist < min_distance and dist < search_radius:
                     # Also check area similarity
                     area_ratio = min(area, locked_w * locked_h) / max(area, locked_w * locked_h)
-                    if area_ratio > 0.4:  # Similar size
+                    if area_ratio > self.min_area_ratio:  # Similar size
                         min_distance = dist
                         found_center = (cx, cy)
             
@@ -123,44 +362,33 @@ class CellDetector:
                     del self.cell_velocities[cell_id]
                 if cell_id in self.cell_positions:
                     del self.cell_positions[cell_id]
-                print(f"Cell #{cell_id} REMOVED (left frame)")
+                if self.verbose:
+                    print(f"Cell #{cell_id} REMOVED (left frame)")
         
         self.locked_cells = updated_locked_cells
         
         valid_cells = []
         
-        for cnt in contours:
-            area = cv2.contourArea(cnt)
-            
-            if self.min_area < area < self.max_area:
-                x, y, w, h = cv2.boundingRect(cnt)
+        for index, (x, y, w, h, cx, cy, area, perimeter) in enumerate(rows):
+            aspect_ratio = float(w) / h if h > 0 else 0
+            if self.min_candidate_aspect < aspect_ratio < self.max_candidate_aspect:
                 
-                aspect_ratio = float(w) / h if h > 0 else 0
-                if 0.1 < aspect_ratio < 10.0:
+                # Very permissive circularity check
+                if perimeter > 0:
+                    circularity = 4 * np.pi * area / (perimeter * perimeter)
                     
-                    # Very permissive circularity check
-                    perimeter = cv2.arcLength(cnt, True)
-                    if perimeter > 0:
-                        circularity = 4 * np.pi * area / (perimeter * perimeter)
-                        
-                        if circularity > 0.05:  # Much more permissive
-                            M = cv2.moments(cnt)
-                            if M["m00"] != 0:
-                                cx = int(M["m10"] / M["m00"])
-                                cy = int(M["m01"] / M["m00"])
-                                valid_cells.append((cnt, x, y, w, h, cx, cy, area))
+                    if circularity > self.min_circularity:  # Much more permissive
+                        valid_cells.append(index)
         
-        valid_cells.sort(key=lambda x: x[7], reverse=True)
+        valid_cells.sort(key=lambda index: rows[index][6], reverse=True)
         
         filtered_cells = []
-        for cell in valid_cells:
-            cnt, x, y, w, h, cx, cy, area = cell
+        for index in valid_cells:
+            x, y, w, h, cx, cy, area, _ = rows[index]
             
             is_duplicate = False
             for existing in filtered_cells:
-                ex_x, ex_y, ex_w, ex_h = existing[1], existing[2], existing[3], existing[4]
-                ex_cx, ex_cy = existing[5], existing[6]
-                ex_area = existing[7]
+                ex_x, ex_y, ex_w, ex_h, ex_cx, ex_cy, ex_area, _ = rows[existing]
                 
                 # Calculate intersection area
                 x1_inter = max(x, ex_x)
@@ -194,20 +422,20 @@ class CellDetector:
                 # 2. Current cell is completely inside an existing cell
                 # 3. Centers are very close
                 # 4. Intersection covers more than 40% of the smaller cell
-                if (iou > 0.3 or 
+                if (iou > self.duplicate_iou or 
                     inside_existing or 
-                    distance < 30 or 
-                    intersection_area > 0.4 * min(current_area, ex_area)):
+                    distance < self.duplicate_distance or 
+                    intersection_area > self.duplicate_overlap * min(current_area, ex_area)):
                     is_duplicate = True
                     break
             
             if not is_duplicate:
-                filtered_cells.append(cell)
+                filtered_cells.append(index)
         
         # Track candidates across frames and lock stable cells
         current_candidates = {}
-        for cell in filtered_cells:
-            cnt, x, y, w, h, cx, cy, area = cell
+        for index in filtered_cells:
+            x, y, w, h, cx, cy, area, _ = rows[index]
             cell_key = f"{cx}_{cy}"
             
             # Check if this cell is near any locked cell (skip if too close)
@@ -216,7 +444,7 @@ class CellDetector:
                 lcx = lx + lw // 2
                 lcy = ly + lh // 2
                 ldist = math.sqrt((cx - lcx)**2 + (cy - lcy)**2)
-                if ldist < 50:
+                if ldist < self.lock_distance:
                     near_locked = True
                     break
             
@@ -230,7 +458,7 @@ class CellDetector:
                 prev_cy = prev_y + prev_h // 2
                 distance = math.sqrt((cx - prev_cx)**2 + (cy - prev_cy)**2)
                 
-                if distance < 50:  # Same cell if center moved less than 50 pixels
+                if distance < self.lock_distance:  # Same cell if center moved less than lock_distance
                     current_candidates[key] = (count + 1, x, y, w, h)
                     matched = True
                     
@@ -243,7 +471,8 @@ class CellDetector:
                         self.locked_cells.append((x, y, w, h, self.next_cell_id))
                         self.cell_positions[self.next_cell_id] = [(cx, cy)]
                         self.cell_velocities[self.next_cell_id] = (0, 0)
-                        print(f"Cell #{self.next_cell_id} DETECTED at ({x}, {y})")
+                        if self.verbose:
+                            print(f"Cell #{self.next_cell_id} DETECTED at ({x}, {y})")
                         self.next_cell_id += 1
                     break
             
@@ -253,58 +482,40 @@ class CellDetector:
         
         self.candidate_cells = current_candidates
         
+        return cells[np.array(filtered_cells, dtype=np.intp)]
+    
+    @profiler.timed('draw')
+    def draw(self, frame, search_mask, filtered_cells):
+        """Draw locked and candidate cells next to the mask view"""
+        # Single-channel frames only get color here, for the overlays
+        output_frame = frame.copy() if frame.ndim == 3 else cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
         mask_visual = cv2.cvtColor(search_mask, cv2.COLOR_GRAY2BGR)
+        renderer = self.renderer
         
         # Draw locked cells first (in blue to show they're locked)
-        for locked_x, locked_y, locked_w, locked_h, cell_id in self.locked_cells:
-            cv2.rectangle(output_frame, (locked_x, locked_y), (locked_x + locked_w, locked_y + locked_h), (255, 0, 0), 3)
-            cv2.rectangle(mask_visual, (locked_x, locked_y), (locked_x + locked_w, locked_y + locked_h), (255, 0, 0), 3)
-            
-            # Corner markers
-            cv2.circle(output_frame, (locked_x, locked_y), 5, (255, 0, 0), -1)
-            cv2.circle(output_frame, (locked_x + locked_w, locked_y), 5, (255, 0, 0), -1)
-            cv2.circle(output_frame, (locked_x, locked_y + locked_h), 5, (255, 0, 0), -1)
-            cv2.circle(output_frame, (locked_x + locked_w, locked_y + locked_h), 5, (255, 0, 0), -1)
-            
-            # Locked label
-            label = f"#{cell_id}"
-            label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-            cv2.rectangle(output_frame, (locked_x, locked_y-label_size[1]-10), (locked_x+label_size[0]+6, locked_y), (255, 0, 0), -1)
-            cv2.putText(output_frame, label, (locked_x+3, locked_y - 5),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            
-            cv2.putText(mask_visual, f"#{cell_id} LOCKED", (locked_x+3, locked_y + 20),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-            
-            # Center point
-            locked_cx = locked_x + locked_w // 2
-            locked_cy = locked_y + locked_h // 2
-            cv2.circle(output_frame, (locked_cx, locked_cy), 5, (0, 0, 255), -1)
+        locked = np.array([cell[:4] for cell in self.locked_cells], dtype=np.int32).reshape(-1, 4)
+        locked_boxes = np.column_stack((locked[:, :2], locked[:, :2] + locked[:, 2:]))
+        locked_ids = [cell[4] for cell in self.locked_cells]
+        renderer.draw_boxes(output_frame, locked_boxes, (255, 0, 0), 3)
+        renderer.draw_boxes(mask_visual, locked_boxes, (255, 0, 0), 3)
+        renderer.draw_points(output_frame, box_corners(locked_boxes), (255, 0, 0))
+        renderer.draw_labels(output_frame, locked_boxes[:, :2], [f"#{cell_id}" for cell_id in locked_ids],
+                             (255, 255, 255), background=(255, 0, 0))
+        renderer.draw_labels(mask_visual, locked_boxes[:, :2], [f"#{cell_id} LOCKED" for cell_id in locked_ids],
+                             (255, 0, 0), offset=(3, 20))
+        renderer.draw_points(output_frame, locked[:, :2] + locked[:, 2:] // 2, (0, 0, 255))
         
         # Draw candidate cells (in green - not yet locked)
-        candidate_count = 0
-        for cell in filtered_cells:
-            cnt, x, y, w, h, cx, cy, area = cell
-            candidate_count += 1
-            
-            cv2.rectangle(output_frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            cv2.rectangle(mask_visual, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            
-            cv2.circle(output_frame, (x, y), 5, (255, 0, 0), -1)
-            cv2.circle(output_frame, (x + w, y), 5, (255, 0, 0), -1)
-            cv2.circle(output_frame, (x, y + h), 5, (255, 0, 0), -1)
-            cv2.circle(output_frame, (x + w, y + h), 5, (255, 0, 0), -1)
-            
-            label = f"Waiting..."
-            label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-            cv2.rectangle(output_frame, (x, y-label_size[1]-10), (x+label_size[0]+6, y), (0, 255, 0), -1)
-            cv2.putText(output_frame, label, (x+3, y - 5),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
-            
-            cv2.putText(mask_visual, "Candidate", (x+3, y + 20),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-            
-            cv2.circle(output_frame, (cx, cy), 5, (0, 0, 255), -1)
+        candidate_count = len(filtered_cells)
+        candidate_boxes = filtered_cells.boxes
+        renderer.draw_boxes(output_frame, candidate_boxes, (0, 255, 0), 2)
+        renderer.draw_boxes(mask_visual, candidate_boxes, (0, 255, 0), 2)
+        renderer.draw_points(output_frame, box_corners(candidate_boxes), (255, 0, 0))
+        renderer.draw_labels(output_frame, candidate_boxes[:, :2], ["Waiting..."] * candidate_count,
+                             (0, 0, 0), background=(0, 255, 0))
+        renderer.draw_labels(mask_visual, candidate_boxes[:, :2], ["Candidate"] * candidate_count,
+                             (0, 255, 0), offset=(3, 20))
+        renderer.draw_points(output_frame, filtered_cells.centers, (0, 0, 255))
         
         cv2.rectangle(output_frame, (10, 10), (320, 85), (0, 0, 0), -1)
         cv2.putText(output_frame, f"Locked: {len(self.locked_cells)}", (20, 35),
@@ -322,15 +533,49 @@ class CellDetector:
     
 
 if __name__ == "__main__":
+    import argparse
+    
     video_path = "video2.mp4"
     output_file = "video_test_results.txt"
     
-    cap = cv2.VideoCapture(video_path)
-    detector = CellDetector()
-
-    if not cap.isOpened():
+    parser = argparse.ArgumentParser(description="Classical cell detection and tracking")
+    parser.add_argument("source", nargs="?", default=video_path,
+                        help="Video file, image directory, TIFF stack or camera index")
+    parser.add_argument("--export", help="Write the annotated video to this file")
+    parser.add_argument("--export-scale", type=float, default=1.0,
+                        help="Downscale factor of the exported video")
+    parser.add_argument("--export-every", type=int, default=1, help="Export every Nth frame")
+    parser.add_argument("--export-changed", action="store_true",
+                        help="Only export frames whose locked cells changed")
+    parser.add_argument("--tile-size", type=int,
+                        help="Process full-resolution frames in overlapping tiles of this size")
+    parser.add_argument("--overlap", type=int, default=128,
+                        help="Tile overlap in px, larger than the biggest cell (default 128)")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+    settings = settings_from_args(args, parser)
+    if args.tile_size and args.overlap >= args.tile_size:
+        parser.error("--overlap must be smaller than --tile-size")
+    
+    try:
+        source = open_source(args.source, prefetch=settings.input.frame_prefetch,
+                             grayscale=settings.input.grayscale)
+    except IOError:
         print("Error: Video file not found!")
         exit()
+    detector = CellDetector(settings.classical)
+    tiled = None
+    if args.tile_size:
+        from tiling import TiledCellDetector
+        tiled = TiledCellDetector(detector, args.tile_size, args.overlap)
+    # Edits to the settings file are applied between frames
+    watcher = SettingsWatcher(args.config, args.overrides, settings=settings) if args.config else None
+    # Encoding runs in the exporter's writer thread
+    exporter = None
+    if args.export:
+        exporter = VideoExporter(args.export, fps=source.metadata.get('fps') or 30.0,
+                                 scale=args.export_scale, every_n=args.export_every,
+                                 only_changed=args.export_changed)
 
     print("Processing video... Press 'q' to quit.")
     
@@ -341,19 +586,41 @@ if __name__ == "__main__":
         frame_number = 0
         
         while True:
-            ret, frame = cap.read()
-            if not ret:
+            with profiler.stage('decode'):
+                frame, _ = source.read()
+            if frame is None:
                 print("Video ended.")
                 f.write(f"\nVideo processing completed at frame {frame_number}\n")
                 break
 
-            frame = cv2.resize(frame, (1024, 768)) 
+            if tiled is None:
+                frame = cv2.resize(frame, (1024, 768))  # Tiled mode keeps the full resolution
+            
+            if watcher is not None:
+                new_settings = watcher.poll()
+                if new_settings is not None:
+                    detector.configure(new_settings.classical)
+                    print("Settings reloaded")
+                elif watcher.error:
+                    print(f"Settings not reloaded: {watcher.error}")
+                    watcher.error = None
 
-            processed_frame, locked_count, candidate_count = detector.process(frame)
+            if tiled is None:
+                processed_frame, locked_count, candidate_count = detector.process(frame, frame_number)
+            else:
+                filtered_cells, _, _ = tiled.process(frame, frame_number)
+                # There is no whole-frame search mask in tiled mode, the mask view stays blank
+                processed_frame, locked_count, candidate_count = detector.draw(
+                    frame, np.zeros(frame.shape[:2], dtype=np.uint8), filtered_cells)
             
             f.write(f"Frame {frame_number}: {locked_count} locked, {candidate_count} candidates\n")
             
-            cv2.imshow("Bio-Oracle: Cell Tracking System", processed_frame)
+            if exporter is not None:
+                with profiler.stage('export'):
+                    exporter.write(processed_frame, key=tuple(detector.locked_cells))
+            
+            with profiler.stage('display'):
+                cv2.imshow("Bio-Oracle: Cell Tracking System", processed_frame)
 
             frame_number += 1
             
@@ -361,6 +628,15 @@ if __name__ == "__main__":
                 f.write(f"\nUser stopped at frame {frame_number}\n")
                 break
 
-    cap.release()
+    source.close()
+    if tiled is not None:
+        tiled.close()
     cv2.destroyAllWindows()
-    print(f"Results saved to {output_file}")
\ No newline at end of file
+    print(f"Results saved to {output_file}")
+    if exporter is not None:
+        exporter.close()
+        print(f"Annotated video saved to {args.export} ({exporter.frames_written} frames)")
+    
+    if profiler.enabled:
+        print(profiler.report())
+        profiler.dump_json("video_test_profile.json")
\ No newline at end of file
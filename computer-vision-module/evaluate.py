@@ -0,0 +1,284 @@
+"""
+Accuracy-vs-speed evaluation of the find_cell pipelines
+Runs return_coordinates (and alternative pipelines) over an annotated image
+set such as EMDS5-Original in a process pool and reports IoU,
+precision/recall and images/sec per pipeline
+
+Ground truth is read from an annotation file keyed by image file name, with
+boxes in the (x, y, w, h) convention of return_coordinates:
+
+    JSON: {"EMDS5-g01-01.png": [[x, y, w, h], ...],
+           "EMDS5-g01-02.png": {"mask": "masks/EMDS5-g01-02-GTM.png"},
+           "EMDS5-g01-03.png": []}                 (no cell in the image)
+    CSV:  image,x,y,w,h  (one row per box, empty x/y/w/h = no cell)
+
+or from a folder of ground-truth masks (--masks) named like the images,
+optionally with a -GTM suffix (EMDS5-g01-01-GTM.png). Every connected
+component of a mask becomes one box. Images without ground truth are skipped.
+
+Usage:
+    python evaluate.py --masks EMDS5-GTM --write-annotations emds5_boxes.json
+    python evaluate.py --annotations emds5_boxes.json --workers 4 --output eval.json
+    python evaluate.py --annotations emds5_boxes.json --pipeline fast=my_module:find_boxes
+"""
+import argparse
+import csv
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.metrics import detection_scores, iou_matrix
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp')
+
+# name -> "module:function"; a pipeline takes an image path and returns an
+# (x, y, w, h) box, a list of boxes or None
+PIPELINES = {
+    'return_coordinates': 'find_cell:return_coordinates',
+    'return_coordinates_tiled': 'find_cell:return_coordinates_tiled',
+}
+
+
+def mask_boxes(mask_path, min_area=50):
+    """Boxes (x, y, w, h) of the connected components of a ground-truth mask"""
+    mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
+    if mask is None:
+        raise FileNotFoundError(f"Cannot read mask: {mask_path}")
+    count, _, stats, _ = cv2.connectedComponentsWithStats((mask > 0).astype(np.uint8))
+    return [tuple(int(v) for v in stats[label, :4])
+            for label in range(1, count) if stats[label, cv2.CC_STAT_AREA] >= min_area]
+
+
+def load_annotations(path, min_area=50):
+    """
+    Read a JSON or CSV annotation file
+
+    Returns:
+        dict: image file name -> list of (x, y, w, h) boxes
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    annotations = {}
+
+    if path.lower().endswith('.csv'):
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                boxes = annotations.setdefault(row['image'], [])
+                if row.get('x') not in (None, ''):
+                    boxes.append(tuple(int(float(row[key])) for key in ('x', 'y', 'w', 'h')))
+        return annotations
+
+    with open(path) as f:
+        data = json.load(f)
+    for image, entry in data.items():
+        if isinstance(entry, dict):
+            boxes = [tuple(box) for box in entry.get('boxes', [])]
+            if entry.get('mask'):
+                boxes += mask_boxes(os.path.join(base, entry['mask']), min_area)
+        else:
+            boxes = [tuple(box) for box in entry]
+        annotations[image] = boxes
+    return annotations
+
+
+def masks_to_annotations(images, masks_dir, min_area=50):
+    """Annotations from a mask folder (<stem>-GTM.png or <stem>.png per image)"""
+    annotations = {}
+    for image in images:
+        stem = os.path.splitext(image)[0]
+        for name in (f"{stem}-GTM.png", f"{stem}.png"):
+            mask_path = os.path.join(masks_dir, name)
+            if os.path.exists(mask_path):
+                annotations[image] = mask_boxes(mask_path, min_area)
+                break
+    return annotations
+
+
+def _normalize(result):
+    """Pipeline output -> list of (x, y, w, h) boxes"""
+    if result is None or result is False:
+        return []
+    if len(result) == 4 and np.isscalar(result[0]):
+        return [tuple(int(v) for v in result)]
+    return [tuple(int(v) for v in box) for box in result]
+
+
+_resolved = {}
+
+
+def resolve_pipeline(spec):
+    """'module:function' -> callable (cached per worker process)"""
+    function = _resolved.get(spec)
+    if function is None:
+        module_name, function_name = spec.split(':')
+        function = _resolved[spec] = getattr(importlib.import_module(module_name), function_name)
+    return function
+
+
+def _warm_up(spec):
+    resolve_pipeline(spec)
+
+
+def run_image(job):
+    """Worker: run one pipeline on one image, returns (boxes, latency in ns)"""
+    spec, image_path = job
+    function = resolve_pipeline(spec)
+    start = time.perf_counter_ns()
+    result = function(image_path)
+    elapsed = time.perf_counter_ns() - start
+    return _normalize(result), elapsed
+
+
+def _corners(boxes):
+    return [(x, y, x + w, y + h) for x, y, w, h in boxes]
+
+
+def score(predictions, truth, iou_threshold=0.5):
+    """
+    Accuracy of one pipeline
+
+    Besides precision/recall of the one-to-one box matches, `best_iou` is the
+    mean over annotated images of the best IoU between any prediction and
+    any ground-truth box (0 when nothing or no cell was found), and
+    `localization_rate` the fraction of images with a cell whose best IoU
+    reaches the threshold.
+    """
+    predicted = [_corners(boxes) for boxes in predictions]
+    ground_truth = [_corners(boxes) for boxes in truth]
+    scores = detection_scores(predicted, ground_truth, iou_threshold)
+
+    best = [float(iou_matrix(p, g).max()) if p and g else 0.0
+            for p, g in zip(predicted, ground_truth) if g]
+    scores['best_iou'] = round(float(np.mean(best)), 4) if best else 0.0
+    scores['localization_rate'] = (round(sum(iou >= iou_threshold for iou in best) / len(best), 4)
+                                   if best else 0.0)
+    # Images without cells where the pipeline still reported one
+    scores['false_alarms'] = sum(1 for p, g in zip(predicted, ground_truth) if p and not g)
+    return scores
+
+
+def evaluate(pipelines, image_dir, annotations, workers=None, chunk_size=4, iou_threshold=0.5):
+    """
+    Run every pipeline over the annotated images
+
+    Args:
+        pipelines (dict): name -> "module:function"
+        image_dir (str): Folder with the images
+        annotations (dict): image file name -> list of (x, y, w, h) boxes
+        workers (int): Worker processes (None = CPU count)
+        chunk_size (int): Images per task sent to a worker
+
+    Returns:
+        dict: name -> scores, images, images_per_s and latency statistics
+    """
+    images = sorted(annotations)
+    paths = [os.path.join(image_dir, image) for image in images]
+    truth = [annotations[image] for image in images]
+
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name, spec in pipelines.items():
+            # Warm up every worker (imports) outside the timed run
+            list(pool.map(_warm_up, [spec] * (workers * 2)))
+
+            start = time.perf_counter()
+            outputs = list(pool.map(run_image, [(spec, path) for path in paths],
+                                    chunksize=chunk_size))
+            wall = time.perf_counter() - start
+
+            predictions = [boxes for boxes, _ in outputs]
+            latencies = np.array([elapsed for _, elapsed in outputs], dtype=np.float64) / 1e6
+            results[name] = {
+                'images': len(paths),
+                'images_per_s': round(len(paths) / wall, 2) if wall else 0.0,
+                'latency_mean_ms': round(float(latencies.mean()), 3) if len(latencies) else 0.0,
+                'latency_p50_ms': round(float(np.percentile(latencies, 50)), 3) if len(latencies) else 0.0,
+                'latency_p99_ms': round(float(np.percentile(latencies, 99)), 3) if len(latencies) else 0.0,
+                **score(predictions, truth, iou_threshold)
+            }
+    return results
+
+
+def parse_pipeline(value):
+    """'name=module:function' or 'module:function'"""
+    name, _, spec = value.rpartition('=')
+    if ':' not in spec:
+        raise argparse.ArgumentTypeError(f"Expected [name=]module:function, got {value}")
+    return name or spec, spec
+
+
+def main():
+    parser = argparse.ArgumentParser(description="find_cell accuracy-vs-speed evaluation")
+    parser.add_argument("--images", default="EMDS5-Original", help="Image folder")
+    parser.add_argument("--annotations", help="Annotation file (JSON or CSV)")
+    parser.add_argument("--masks", help="Folder of ground-truth masks (used without --annotations)")
+    parser.add_argument("--min-area", type=int, default=50,
+                        help="Smallest mask component counted as a cell (pixels)")
+    parser.add_argument("--write-annotations",
+                        help="Save the loaded ground truth as a JSON annotation file")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES),
+                        help=f"Comma separated built-in pipelines ({', '.join(PIPELINES)})")
+    parser.add_argument("--pipeline", action="append", default=[], type=parse_pipeline,
+                        help="Additional pipeline as [name=]module:function")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--chunk-size", type=int, default=4)
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU threshold for a match")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    images = sorted(f for f in os.listdir(args.images) if f.lower().endswith(IMAGE_EXTENSIONS))
+    if args.annotations:
+        annotations = load_annotations(args.annotations, args.min_area)
+    elif args.masks:
+        annotations = masks_to_annotations(images, args.masks, args.min_area)
+    else:
+        parser.error("Ground truth required: --annotations or --masks")
+
+    missing = sorted(set(annotations) - set(images))
+    if missing:
+        print(f"Warning: {len(missing)} annotated images not found in {args.images}")
+        annotations = {image: boxes for image, boxes in annotations.items() if image in images}
+    if not annotations:
+        parser.error(f"No annotated images in {args.images}")
+    print(f"Evaluating {len(annotations)} of {len(images)} images "
+          f"({sum(len(boxes) for boxes in annotations.values())} ground-truth boxes)")
+
+    if args.write_annotations:
+        with open(args.write_annotations, 'w') as f:
+            json.dump({image: [list(box) for box in boxes] for image, boxes in annotations.items()},
+                      f, indent=1)
+        print(f"Annotations saved to {args.write_annotations}")
+
+    pipelines = {}
+    for name in filter(None, (name.strip() for name in args.pipelines.split(","))):
+        if name not in PIPELINES:
+            parser.error(f"Unknown pipeline: {name}")
+        pipelines[name] = PIPELINES[name]
+    pipelines.update(args.pipeline)
+
+    results = evaluate(pipelines, args.images, annotations, args.workers, args.chunk_size, args.iou)
+
+    print(f"\n{'pipeline':<26} {'img/s':>8} {'p50 ms':>8} {'best IoU':>9} "
+          f"{'prec':>7} {'recall':>7} {'loc':>7}")
+    for name, result in results.items():
+        print(f"{name:<26} {result['images_per_s']:>8} {result['latency_p50_ms']:>8} "
+              f"{result['best_iou']:>9} {result['precision']:>7} {result['recall']:>7} "
+              f"{result['localization_rate']:>7}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'images': args.images, 'iou_threshold': args.iou,
+                       'results': results}, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
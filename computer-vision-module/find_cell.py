@@ -29,6 +29,26 @@ def return_coordinates(image_path):
     return (x, y, w, h)
 
 
+def return_coordinates_tiled(image_path, tile_size=2048, overlap=64, workers=None):
+    # Same as return_coordinates for very large (stitched) images: the image is
+    # read as grayscale and the edge map is computed tile by tile in parallel
+    from tiling import tiled_edges
+    gray = opencv.imread(image_path, opencv.IMREAD_GRAYSCALE)
+    edges = tiled_edges(gray, tile_size, overlap, workers)
+    del gray
+    contours, _ = opencv.findContours(edges, opencv.RETR_EXTERNAL,
+                                      opencv.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    largest_contour = max(contours, key=opencv.contourArea)
+    x, y, w, h = opencv.boundingRect(largest_contour)
+    return (x, y, w, h)
+
+
+def find_cell_tiled(image_path, tile_size=2048, overlap=64, workers=None):
+    return return_coordinates_tiled(image_path, tile_size, overlap, workers) is not None
+
+
 def segmentation(image_path):
     # Draw a green rectangle that covers the cell
     image = opencv.imread(image_path)
@@ -0,0 +1,151 @@
+"""
+Mask cache for CellDetector
+Stores bit-packed binary masks keyed by frame index and preprocessing parameters
+so contour filtering and tracking can be re-run without recomputing them
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+
+def params_key(params):
+    """Stable short hash of a preprocessing parameter dict"""
+    encoded = json.dumps(params, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def source_identity(path, resize=None):
+    """
+    The video a cache belongs to and the frame size its masks were made at
+
+    Absolute path, file size and modification time, so a changed file gets
+    new masks too.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path) if os.path.exists(path) else None
+    return {
+        "path": path,
+        "size": stat.st_size if stat else None,
+        "mtime": stat.st_mtime_ns if stat else None,
+        "resize": list(resize) if resize else None,
+    }
+
+
+def source_key(path, resize=None):
+    """Stable short hash of source_identity(), the per-video cache subdirectory"""
+    return params_key(source_identity(path, resize))
+
+
+def pack_mask(mask):
+    """Bit-pack a binary mask (8 pixels per byte)"""
+    return mask.shape, np.packbits(mask > 0, axis=None)
+
+
+def unpack_mask(shape, packed):
+    """Inverse of pack_mask, returns a 0/255 uint8 mask"""
+    count = int(np.prod(shape))
+    bits = np.unpackbits(packed, count=count)
+    return (bits.reshape(shape) * 255).astype(np.uint8)
+
+
+class MaskCache:
+    """
+    Bit-packed binary mask cache
+
+    Masks are kept in memory (optionally bounded, least recently used first
+    out) and, if cache_dir is given, also written to disk so several sweep
+    runs or worker processes can share them. Keys only hold the frame index
+    and preprocessing parameters, so one cache (or cache_dir) serves one
+    video at one frame size; use a subdirectory per source_key().
+    """
+
+    def __init__(self, cache_dir=None, max_entries=None, source=None):
+        """
+        Args:
+            cache_dir (str): Directory for the on-disk masks (None = memory only)
+            max_entries (int): Masks kept in memory (None = unbounded)
+            source (dict): source_identity() of the video; recorded in cache_dir,
+                opening the directory for another video raises ValueError
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # {(params_key, frame_index): (shape, packed)}
+        self.hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            if source is not None:
+                self._check_source(source)
+
+    def _check_source(self, source):
+        path = os.path.join(self.cache_dir, "source.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                recorded = json.load(f)
+            if recorded != source:
+                raise ValueError(f"Mask cache {self.cache_dir} belongs to {recorded['path']} "
+                                 f"(resize {recorded['resize']}), not {source['path']} "
+                                 f"(resize {source['resize']})")
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(source, f)
+        os.replace(tmp_path, path)
+
+    def _path(self, key, frame_index):
+        return os.path.join(self.cache_dir, key, f"{frame_index:08d}.npz")
+
+    def get(self, frame_index, params):
+        """Return the cached mask or None"""
+        key = params_key(params)
+        entry = self.entries.get((key, frame_index))
+
+        if entry is None and self.cache_dir:
+            path = self._path(key, frame_index)
+            if os.path.exists(path):
+                with np.load(path) as data:
+                    entry = (tuple(data["shape"]), data["packed"])
+                self._remember(key, frame_index, entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end((key, frame_index))
+        self.hits += 1
+        return unpack_mask(*entry)
+
+    def put(self, frame_index, params, mask):
+        """Store a mask for a frame index and parameter set"""
+        key = params_key(params)
+        entry = pack_mask(mask)
+        self._remember(key, frame_index, entry)
+
+        if self.cache_dir:
+            os.makedirs(os.path.join(self.cache_dir, key), exist_ok=True)
+            path = self._path(key, frame_index)
+            if os.path.exists(path):
+                return
+            tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+            np.savez(tmp_path, shape=np.array(entry[0]), packed=entry[1])
+            os.replace(tmp_path, path)  # Atomic for concurrent readers
+
+    def _remember(self, key, frame_index, entry):
+        self.entries[(key, frame_index)] = entry
+        self.entries.move_to_end((key, frame_index))
+        if self.max_entries is not None:
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def nbytes(self):
+        """Memory used by the in-memory masks"""
+        return sum(packed.nbytes for _, packed in self.entries.values())
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,86 @@
+"""
+Motion gate for incremental CellDetector processing
+Finds the regions of a frame that changed since they were last segmented
+using a cheap downsampled frame difference
+"""
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Downsampled frame differencing on a block grid
+
+    changed_rects() compares the frame with a reference image holding, for
+    each block, the pixels at the time the block was last segmented, so slow
+    drift is caught as well as sudden motion. Every refresh_interval frames
+    it requests a full refresh.
+    """
+
+    def __init__(self, downscale=4, threshold=15, block_size=64, refresh_interval=100,
+                 min_changed_pixels=2, margin=16):
+        self.downscale = downscale
+        self.threshold = threshold
+        self.block_size = block_size  # In full-resolution pixels
+        self.refresh_interval = refresh_interval
+        self.min_changed_pixels = min_changed_pixels
+        self.margin = margin  # Context added around regions when re-segmenting
+        self.reference = None
+        self.frames_since_refresh = 0
+
+    def reset(self):
+        self.reference = None
+        self.frames_since_refresh = 0
+
+    def _small(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, None, fx=1 / self.downscale, fy=1 / self.downscale,
+                          interpolation=cv2.INTER_AREA)
+
+    def changed_rects(self, frame):
+        """
+        Regions to re-segment as (x1, y1, x2, y2) in frame coordinates
+
+        Returns None when the whole frame must be processed (first frame,
+        size change or periodic refresh) and [] when nothing changed.
+        """
+        small = self._small(frame)
+        height, width = frame.shape[:2]
+
+        if (self.reference is None or self.reference.shape != small.shape or
+                self.frames_since_refresh >= self.refresh_interval):
+            self.reference = small
+            self.frames_since_refresh = 0
+            return None
+        self.frames_since_refresh += 1
+
+        changed = cv2.absdiff(small, self.reference) > self.threshold
+
+        # Count changed pixels per block
+        block = max(1, self.block_size // self.downscale)
+        rows = -(-small.shape[0] // block)
+        cols = -(-small.shape[1] // block)
+        padded = np.zeros((rows * block, cols * block), dtype=np.uint16)
+        padded[:small.shape[0], :small.shape[1]] = changed
+        counts = padded.reshape(rows, block, cols, block).sum(axis=(1, 3))
+        blocks = (counts >= self.min_changed_pixels).astype(np.uint8)
+
+        if not blocks.any():
+            return []
+
+        # Include neighbouring blocks so cells moving across a block border are whole
+        blocks = cv2.dilate(blocks, np.ones((3, 3), np.uint8))
+
+        rects = []
+        count, _, stats, _ = cv2.connectedComponentsWithStats(blocks, connectivity=8)
+        for left, top, w, h, _ in stats[1:count]:
+            # Update the reference for the blocks that will be re-segmented
+            sy1, sy2 = top * block, (top + h) * block
+            sx1, sx2 = left * block, (left + w) * block
+            self.reference[sy1:sy2, sx1:sx2] = small[sy1:sy2, sx1:sx2]
+
+            full_block = block * self.downscale
+            rects.append((left * full_block, top * full_block,
+                          min(width, (left + w) * full_block),
+                          min(height, (top + h) * full_block)))
+        return rects
@@ -0,0 +1,172 @@
+"""
+Regions of interest for CellDetector
+Loads, draws or estimates ROI masks and splits them into bounding
+sub-rectangles so preprocessing and contour search can skip empty regions
+
+Usage:
+    python roi.py video.mp4 roi.json      # Draw ROI polygons on the first frame
+"""
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+
+
+def polygons_to_mask(polygons, shape):
+    """Rasterize [[(x, y), ...], ...] polygons to a 0/255 mask of the given (h, w)"""
+    mask = np.zeros(shape[:2], dtype=np.uint8)
+    points = [np.asarray(polygon, dtype=np.int32).reshape(-1, 1, 2) for polygon in polygons]
+    if points:
+        cv2.fillPoly(mask, points, 255)
+    return mask
+
+
+def load_roi(path, shape):
+    """
+    Load an ROI as a mask of the given frame shape
+
+    JSON files contain {"polygons": [[[x, y], ...], ...]} in frame pixels;
+    image files are masks where non-zero pixels are inside the ROI.
+    """
+    if path.lower().endswith(".json"):
+        with open(path) as f:
+            data = json.load(f)
+        return polygons_to_mask(data["polygons"], shape)
+
+    mask = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if mask is None:
+        raise IOError(f"Could not read ROI mask: {path}")
+    if mask.shape != tuple(shape[:2]):
+        mask = cv2.resize(mask, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST)
+    return np.where(mask > 0, 255, 0).astype(np.uint8)
+
+
+def save_roi(path, polygons):
+    with open(path, "w") as f:
+        json.dump({"polygons": [[list(map(int, point)) for point in polygon]
+                                for polygon in polygons]}, f, indent=2)
+
+
+def roi_rects(mask, margin=16):
+    """
+    Bounding sub-rectangles (x1, y1, x2, y2) of the ROI components
+
+    Rectangles are padded by margin (context for blur/threshold near the ROI
+    border) and overlapping rectangles are merged so no contour is split.
+    """
+    height, width = mask.shape[:2]
+    contours, _ = cv2.findContours((mask > 0).astype(np.uint8), cv2.RETR_EXTERNAL,
+                                   cv2.CHAIN_APPROX_SIMPLE)
+    rects = []
+    for cnt in contours:
+        x, y, w, h = cv2.boundingRect(cnt)
+        rects.append([max(0, x - margin), max(0, y - margin),
+                      min(width, x + w + margin), min(height, y + h + margin)])
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                a, b = rects[i], rects[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = [min(a[0], b[0]), min(a[1], b[1]),
+                                max(a[2], b[2]), max(a[3], b[3])]
+                    del rects[j]
+                    merged = True
+                    break
+            if merged:
+                break
+
+    return [tuple(rect) for rect in rects]
+
+
+def auto_roi(frames, downscale=4, min_std=None, dilate=15):
+    """
+    Estimate the ROI from sample frames as the regions with temporal activity
+
+    Static channel walls and background have a low per-pixel standard
+    deviation over time; the threshold defaults to Otsu on the std map.
+    """
+    small = []
+    for frame in frames:
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small.append(cv2.resize(gray, None, fx=1 / downscale, fy=1 / downscale,
+                                interpolation=cv2.INTER_AREA))
+    if len(small) < 2:
+        raise ValueError("auto_roi needs at least two frames")
+
+    std = np.std(np.stack(small).astype(np.float32), axis=0)
+    std = cv2.normalize(std, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    if min_std is None:
+        _, active = cv2.threshold(std, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    else:
+        _, active = cv2.threshold(std, min_std, 255, cv2.THRESH_BINARY)
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (dilate, dilate))
+    active = cv2.morphologyEx(active, cv2.MORPH_CLOSE, kernel)
+    active = cv2.dilate(active, kernel)
+
+    height, width = frames[0].shape[:2]
+    return cv2.resize(active, (width, height), interpolation=cv2.INTER_NEAREST)
+
+
+def draw_roi(frame, window_name="Bio-Oracle: Draw ROI"):
+    """
+    Draw ROI polygons on a frame with the mouse
+
+    Left click adds a vertex, right click closes the polygon, 'u' undoes the
+    last vertex, Enter or 'q' finishes. Returns the list of polygons.
+    """
+    polygons = []
+    current = []
+
+    def on_mouse(event, x, y, flags, param):
+        if event == cv2.EVENT_LBUTTONDOWN:
+            current.append((x, y))
+        elif event == cv2.EVENT_RBUTTONDOWN and len(current) >= 3:
+            polygons.append(list(current))
+            current.clear()
+
+    cv2.namedWindow(window_name)
+    cv2.setMouseCallback(window_name, on_mouse)
+
+    while True:
+        canvas = frame.copy()
+        for polygon in polygons:
+            cv2.polylines(canvas, [np.array(polygon, dtype=np.int32)], True, (0, 255, 0), 2)
+        if current:
+            cv2.polylines(canvas, [np.array(current, dtype=np.int32)], False, (0, 255, 255), 2)
+        cv2.imshow(window_name, canvas)
+
+        key = cv2.waitKey(30) & 0xFF
+        if key == ord('u') and current:
+            current.pop()
+        elif key in (13, ord('q')):
+            break
+
+    if len(current) >= 3:
+        polygons.append(list(current))
+    cv2.destroyWindow(window_name)
+    return polygons
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python roi.py <video> <roi.json>")
+        sys.exit(1)
+
+    video_path, roi_path = sys.argv[1], sys.argv[2]
+    cap = cv2.VideoCapture(video_path)
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        print("Error: Video file not found!")
+        sys.exit(1)
+
+    frame = cv2.resize(frame, (1024, 768))
+    polygons = draw_roi(frame)
+    save_roi(roi_path, polygons)
+    print(f"Saved {len(polygons)} polygons to {os.path.abspath(roi_path)}")
@@ -0,0 +1,263 @@
+"""
+Parameter sweep runner for CellDetector
+Evaluates a grid of detector/tracker parameters over a set of videos in a
+process pool and writes a results table (CSV or JSON)
+
+Usage:
+    python sweep.py video1.mp4 video2.mp4 --param min_area=600,800,1000 \
+        --param stability_threshold=2,3,5 --workers 4 --output sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+from detector import CellDetector
+from mask_cache import MaskCache, params_key, source_identity, source_key
+from roi import load_roi
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.settings import Settings, merge, validate
+from modules.sources import open_source
+
+
+RESULT_FIELDS = [
+    "video", "params", "frames",
+    "mean_locked", "max_locked", "final_locked", "mean_candidates",
+    "ids_created", "ids_removed", "id_churn_per_frame",
+    "latency_mean_ms", "latency_p50_ms", "latency_p99_ms",
+    "preprocess_mean_ms", "preprocess_p99_ms", "update_mean_ms", "update_p99_ms",
+]
+
+
+def expand_grid(grid):
+    """{'min_area': [600, 800], ...} -> list of parameter dicts"""
+    if not grid:
+        return [{}]
+    names = sorted(grid)
+    values = [grid[name] if isinstance(grid[name], list) else [grid[name]] for name in names]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def classical_settings(params):
+    """
+    Validated ClassicalSettings with the given overrides
+
+    Same names, type conversion and range checks as --set classical.*
+
+    Raises:
+        ValueError: For unknown names or invalid values
+    """
+    return validate(merge(Settings(), {"classical": params})).classical
+
+
+def make_detector(params, mask_cache=None):
+    """Create a CellDetector with the given ClassicalSettings overrides"""
+    detector = CellDetector(classical_settings(params), mask_cache=mask_cache)
+    detector.verbose = False
+    return detector
+
+
+def run_job(video_path, param_sets, resize=None, max_frames=None, cache_dir=None,
+            roi_path=None):
+    """
+    Evaluate several parameter sets on one video
+
+    The video is decoded once by this worker and every frame is fed to all
+    detectors. Preprocessing is only computed once per frame and distinct
+    set of preprocessing parameters, and its time is charged to every
+    parameter set using that mask, so latencies stay comparable across sets
+    (preprocess and update times are also reported separately). Masks found
+    in an existing cache_dir are loaded instead, preprocess times then
+    measure loading.
+    """
+    # Cached masks are per video and frame size, jobs on other videos share cache_dir
+    if cache_dir:
+        cache_dir = os.path.join(cache_dir, source_key(video_path, resize))
+    mask_cache = MaskCache(cache_dir, max_entries=4 * len(param_sets),
+                           source=source_identity(video_path, resize))
+    detectors = [make_detector(params, mask_cache) for params in param_sets]
+    stats = [{"locked": [], "candidates": [], "preprocess_ns": [], "update_ns": []}
+             for _ in param_sets]
+
+    # Detection only needs the gray image, so decode straight to one channel
+    source = open_source(video_path, prefetch=4, grayscale=True)
+
+    frame_index = 0
+    for frame, _ in source:
+        if max_frames is not None and frame_index >= max_frames:
+            break
+        if resize:
+            frame = cv2.resize(frame, resize)
+        if roi_path and frame_index == 0:
+            roi_mask = load_roi(roi_path, frame.shape)
+            for detector in detectors:
+                detector.set_roi(roi_mask)
+
+        masks = {}  # {params_key: (mask, preprocess_ns)} of this frame
+        for detector, stat in zip(detectors, stats):
+            key = params_key(detector.preprocessing_params())
+            if key not in masks:
+                start = time.perf_counter_ns()
+                mask = detector.get_mask(frame, frame_index)
+                masks[key] = (mask, time.perf_counter_ns() - start)
+            mask, preprocess_ns = masks[key]
+
+            start = time.perf_counter_ns()
+            _, filtered_cells = detector.update(mask)
+            stat["update_ns"].append(time.perf_counter_ns() - start)
+            stat["preprocess_ns"].append(preprocess_ns)
+            stat["locked"].append(len(detector.locked_cells))
+            stat["candidates"].append(len(filtered_cells))
+
+        frame_index += 1
+
+    source.close()
+
+    return [summarize(video_path, params, detector, stat)
+            for params, detector, stat in zip(param_sets, detectors, stats)]
+
+
+def summarize(video_path, params, detector, stat):
+    """Reduce per-frame statistics of one run to a results row"""
+    frames = len(stat["locked"])
+    locked = np.array(stat["locked"] or [0])
+    candidates = np.array(stat["candidates"] or [0])
+    preprocess_ms = np.array(stat["preprocess_ns"] or [0]) / 1e6
+    update_ms = np.array(stat["update_ns"] or [0]) / 1e6
+    latency_ms = preprocess_ms + update_ms
+    ids_created = detector.next_cell_id - 1
+    ids_removed = len(detector.removed_cells)
+
+    return {
+        "video": os.path.basename(video_path),
+        "params": json.dumps(params, sort_keys=True),
+        "frames": frames,
+        "mean_locked": round(float(locked.mean()), 3),
+        "max_locked": int(locked.max()),
+        "final_locked": len(detector.locked_cells),
+        "mean_candidates": round(float(candidates.mean()), 3),
+        "ids_created": ids_created,
+        "ids_removed": ids_removed,
+        "id_churn_per_frame": round((ids_created + ids_removed) / max(frames, 1), 4),
+        "latency_mean_ms": round(float(latency_ms.mean()), 3),
+        "latency_p50_ms": round(float(np.percentile(latency_ms, 50)), 3),
+        "latency_p99_ms": round(float(np.percentile(latency_ms, 99)), 3),
+        "preprocess_mean_ms": round(float(preprocess_ms.mean()), 3),
+        "preprocess_p99_ms": round(float(np.percentile(preprocess_ms, 99)), 3),
+        "update_mean_ms": round(float(update_ms.mean()), 3),
+        "update_p99_ms": round(float(np.percentile(update_ms, 99)), 3),
+    }
+
+
+def run_sweep(videos, grid, workers=None, chunk_size=8, resize=None,
+              max_frames=None, cache_dir=None, roi_path=None):
+    """
+    Distribute (video, parameter chunk) jobs across a process pool
+
+    Returns a list of result rows, one per (video, parameter set).
+    """
+    param_sets = expand_grid(grid)
+    chunks = [param_sets[i:i + chunk_size] for i in range(0, len(param_sets), chunk_size)]
+    jobs = [(video, chunk) for video in videos for chunk in chunks]
+
+    print(f"Sweeping {len(param_sets)} parameter sets over {len(videos)} videos "
+          f"({len(jobs)} jobs)")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_job, video, chunk, resize, max_frames, cache_dir, roi_path):
+                (video, chunk)
+            for video, chunk in jobs
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            video, chunk = futures[future]
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                print(f"Job failed for {video}: {e}")
+            print(f"  [{done}/{len(jobs)}] {os.path.basename(video)} done")
+
+    results.sort(key=lambda row: (row["video"], row["params"]))
+    return results
+
+
+def write_results(results, output_path):
+    """Write results as CSV (default) or JSON depending on the extension"""
+    if output_path.endswith(".json"):
+        with open(output_path, "w") as f:
+            json.dump(results, f, indent=2)
+        return
+
+    with open(output_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def parse_value(text):
+    """Parse a CLI value as int, float or string"""
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CellDetector parameter sweep")
+    parser.add_argument("videos", nargs="+", help="Video files to evaluate")
+    parser.add_argument("--grid", help="JSON file mapping parameter names to value lists")
+    parser.add_argument("--param", action="append", default=[],
+                        help="Grid entry as name=v1,v2,... (repeatable)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--chunk-size", type=int, default=8,
+                        help="Parameter sets evaluated per decoded video pass")
+    parser.add_argument("--resize", type=parse_size, default=(1024, 768),
+                        help="Resize frames to WxH before detection (default 1024x768)")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--cache-dir",
+                        help="Directory for shared on-disk mask cache (one subdirectory per video and size)")
+    parser.add_argument("--roi", help="ROI file (JSON polygons or mask image)")
+    parser.add_argument("--output", default="sweep_results.csv",
+                        help="Results table (.csv or .json)")
+    args = parser.parse_args()
+
+    grid = {}
+    if args.grid:
+        with open(args.grid) as f:
+            grid.update(json.load(f))
+    for entry in args.param:
+        name, values = entry.split("=", 1)
+        grid[name] = [parse_value(value) for value in values.split(",")]
+    # Invalid parameter sets fail here, not in every worker
+    try:
+        for params in expand_grid(grid):
+            classical_settings(params)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = run_sweep(args.videos, grid, workers=args.workers,
+                        chunk_size=args.chunk_size, resize=args.resize,
+                        max_frames=args.max_frames, cache_dir=args.cache_dir,
+                        roi_path=args.roi)
+    write_results(results, args.output)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
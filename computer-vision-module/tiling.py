@@ -0,0 +1,166 @@
+"""
+Tiled processing for very large microscopy frames
+Splits a frame into overlapping tiles, processes the tiles in a thread pool
+(OpenCV releases the GIL) and merges detections across tile seams
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.detections import DetectionBatch
+
+
+def tile_grid(height, width, tile_size=2048, overlap=128):
+    """Overlapping tiles covering the frame as (x1, y1, x2, y2) rectangles"""
+    if overlap >= tile_size:
+        raise ValueError("overlap must be smaller than tile_size")
+
+    step = tile_size - overlap
+    xs = list(range(0, max(width - overlap, 1), step))
+    ys = list(range(0, max(height - overlap, 1), step))
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in ys for x in xs]
+
+
+def touches_seam(boxes, tile, height, width):
+    """Mask of the (x1, y1, x2, y2) boxes touching a tile border that is not the frame border"""
+    boxes = np.asarray(boxes).reshape(-1, 4)
+    x1, y1, x2, y2 = tile
+    return (((boxes[:, 0] <= x1) & (x1 > 0)) | ((boxes[:, 1] <= y1) & (y1 > 0)) |
+            ((boxes[:, 2] >= x2) & (x2 < width)) | ((boxes[:, 3] >= y2) & (y2 < height)))
+
+
+def merge_cells(tile_cells, merge_distance=10):
+    """
+    De-duplicate cells found by several tiles in the overlap band
+
+    Cells are bucketed on a grid of merge_distance so each cell is only
+    compared with cells in neighbouring buckets. The larger contour wins.
+    """
+    all_cells = DetectionBatch.concatenate(tile_cells)
+    order = np.argsort(-all_cells.areas, kind='stable')
+    centers = all_cells.centers.astype(np.int64).tolist()
+
+    merged = []
+    buckets = {}
+    for index in order.tolist():
+        cx, cy = centers[index]
+        bx, by = cx // merge_distance, cy // merge_distance
+        duplicate = False
+        for nx in (bx - 1, bx, bx + 1):
+            for ny in (by - 1, by, by + 1):
+                for ox, oy in buckets.get((nx, ny), ()):
+                    if (cx - ox) ** 2 + (cy - oy) ** 2 < merge_distance ** 2:
+                        duplicate = True
+                        break
+                if duplicate:
+                    break
+            if duplicate:
+                break
+        if not duplicate:
+            buckets.setdefault((bx, by), []).append((cx, cy))
+            merged.append(index)
+    return all_cells[np.array(merged, dtype=np.intp)]
+
+
+class TiledCellDetector:
+    """
+    Runs a CellDetector on overlapping tiles of large frames
+
+    Preprocessing, locked-cell masking and contour extraction run per tile in
+    parallel; tracking runs once on the merged cells. The overlap should be
+    larger than the biggest cell so every cell is whole in at least one tile.
+    CLAHE is computed per tile, so results can differ slightly from
+    processing the frame at once.
+
+    The detector's ROI applies to every tile (tiles outside it are skipped).
+    With a background model or a mask cache the mask is computed for the
+    whole frame through detector.get_mask() and only masking and contour
+    extraction are tiled.
+    """
+
+    def __init__(self, detector, tile_size=2048, overlap=128, workers=None):
+        self.detector = detector
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def close(self):
+        self.pool.shutdown()
+
+    def _tile_mask(self, frame, tile):
+        """Binary mask of one tile, restricted to the ROI like CellDetector.preprocess()"""
+        x1, y1, x2, y2 = tile
+        roi_mask = self.detector.roi_mask
+        if roi_mask is None:
+            return self.detector.segment(frame[y1:y2, x1:x2])
+        roi = roi_mask[y1:y2, x1:x2]
+        if not roi.any():
+            return None
+        return cv2.bitwise_and(self.detector.segment(frame[y1:y2, x1:x2]), roi)
+
+    def _process_tile(self, frame, tile, mask=None):
+        x1, y1, x2, y2 = tile
+        height, width = frame.shape[:2]
+        if mask is None:
+            mask = self._tile_mask(frame, tile)
+            if mask is None:
+                return DetectionBatch.empty()
+        else:
+            mask = mask[y1:y2, x1:x2]
+        search_mask = self.detector.mask_locked(mask, offset=(x1, y1))
+        cells = self.detector.extract_cells(search_mask, offset=(x1, y1))
+        return cells[~touches_seam(cells.boxes, tile, height, width)]
+
+    def detect(self, frame, frame_index=None):
+        """Cells of the whole frame in frame coordinates"""
+        height, width = frame.shape[:2]
+        mask = None
+        if self.detector.background is not None or self.detector.mask_cache is not None:
+            # Background models are stateful per full frame, cached masks are full frames
+            mask = self.detector.get_mask(frame, frame_index)
+        tiles = tile_grid(height, width, self.tile_size, self.overlap)
+        tile_cells = self.pool.map(lambda tile: self._process_tile(frame, tile, mask), tiles)
+        return merge_cells(list(tile_cells))
+
+    def process(self, frame, frame_index=None):
+        """
+        Detect and track cells on a large frame
+
+        Returns the filtered candidate cells, the locked count and the
+        candidate count (no split-screen image is drawn at this scale).
+        """
+        cells = self.detect(frame, frame_index)
+        filtered_cells = self.detector.track(cells)
+        return filtered_cells, len(self.detector.locked_cells), len(filtered_cells)
+
+
+def tiled_edges(gray, tile_size=2048, overlap=64, workers=None):
+    """
+    Blur + Canny edge map of a large grayscale image computed tile by tile
+
+    Each tile writes only its inner part, so the result matches the
+    whole-image edge map up to hysteresis effects right at the seams.
+    """
+    height, width = gray.shape[:2]
+    edges = np.empty_like(gray)
+    half = overlap // 2
+
+    def run(tile):
+        x1, y1, x2, y2 = tile
+        blurred = cv2.GaussianBlur(gray[y1:y2, x1:x2], (5, 5), 0)
+        tile_edges = cv2.Canny(blurred, 50, 150)
+        # Keep the inner part of the tile, the overlap is owned by the neighbour
+        ix1 = x1 + half if x1 > 0 else 0
+        iy1 = y1 + half if y1 > 0 else 0
+        ix2 = x2 - half if x2 < width else width
+        iy2 = y2 - half if y2 < height else height
+        edges[iy1:iy2, ix1:ix2] = tile_edges[iy1 - y1:iy2 - y1, ix1 - x1:ix2 - x1]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(run, tile_grid(height, width, tile_size, overlap)))
+    return edges
@@ -17,6 +17,13 @@ MODEL_PATH = os.path.join(BASE_DIR, "assets", "models", "best.pt")
 INPUT_VIDEOS_DIR = os.path.join(BASE_DIR, "assets", "input_videos")
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
 
+# Optional settings file (.toml, .yaml or .json) overriding the values below,
+# see modules/settings.py; the GUI reloads it while running
+SETTINGS_FILE = os.environ.get("BIO_ORACLE_SETTINGS")
+
+# Seconds between checks of the settings file for changes
+SETTINGS_RELOAD_INTERVAL = 1.0
+
 # ============================================================================
 # DETECTION SETTINGS
 # ============================================================================
@@ -26,9 +33,17 @@ CONFIDENCE_THRESHOLD = 0.5
 # Image size for inference
 IMG_SIZE = 640
 
+# Box area range of accepted detections in px (MAX_CELL_AREA = 0: no upper limit)
+MIN_CELL_AREA = 0
+MAX_CELL_AREA = 0
+
 # Device to use ('cpu' or 'cuda' or '0' for GPU)
 DEVICE = 'cpu'
 
+# Run the full detector every N frames and propagate boxes with optical flow
+# in between (1 = detect on every frame)
+DETECTION_INTERVAL = 1
+
 # ============================================================================
 # TRACKING SETTINGS
 # ============================================================================
@@ -57,6 +72,43 @@ FONT = 1  # cv2.FONT_HERSHEY_SIMPLEX
 FONT_SCALE = 0.6
 FONT_THICKNESS = 2
 
+# Video display: 'opencv' burns the overlay into the frame (VideoWidget),
+# 'pyqtgraph' shows the raw frame with vector overlay items (GraphVideoWidget)
+DISPLAY_BACKEND = 'opencv'
+
+# Annotated video export (modules/exporter.py): 'opencv' (cv2.VideoWriter with
+# EXPORT_CODEC) or 'ffmpeg' (H.264 through an ffmpeg pipe, needs ffmpeg on PATH)
+EXPORT_BACKEND = 'opencv'
+EXPORT_CODEC = 'mp4v'
+
+# Frames waiting for the export writer thread before the pipeline blocks
+EXPORT_QUEUE_SIZE = 32
+
+# Samples kept per analytics chart series (1 hour at 30 fps); charts draw at
+# most 2000 decimated points of it
+ANALYTICS_HISTORY = 108_000
+
+# Delay (ms) after the last detector slider change before the paused frame is reprocessed
+TUNING_DEBOUNCE_MS = 40
+
+# ============================================================================
+# SIMULATION SETTINGS
+# ============================================================================
+# Seed of the environment simulation (None = different outcome every run)
+SIMULATION_SEED = 0
+
+# Temperature (°C) cells do best at, and the range around it without stress
+OPTIMAL_TEMPERATURE = 30
+TEMPERATURE_TOLERANCE = 8
+
+# Deaths per second of an average cell at 100% toxicity, and per (10 °C of
+# temperature stress)^2
+TOXICITY_HAZARD = 0.5
+TEMPERATURE_HAZARD = 0.05
+
+# Cells slower than this fraction of their normal speed are shown as staying
+IMMOBILE_MOTILITY = 0.2
+
 # ============================================================================
 # LOGGING SETTINGS
 # ============================================================================
@@ -66,3 +118,18 @@ ENABLE_LOGGING = True
 # Log file format
 LOG_DATE_FORMAT = "%Y-%m-%d"
 LOG_TIME_FORMAT = "%H:%M:%S"
+
+# Per-stage timing (modules/profiling.py); timers are no-ops when disabled
+ENABLE_PROFILING = False
+
+# Number of recent samples per stage used for the percentiles
+PROFILING_WINDOW = 1000
+
+# ============================================================================
+# INPUT SETTINGS
+# ============================================================================
+# Frames decoded ahead of the pipeline by a background thread (0 = off)
+FRAME_PREFETCH = 4
+
+# Decode monochrome sources to single-channel frames (True, False or 'auto')
+GRAYSCALE_SOURCES = 'auto'
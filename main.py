@@ -1,6 +1,5 @@
 import sys
 import random
-from collections import deque
 from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout
 from PyQt6.QtCore import QTimer
 from src.analytics.chart_ui import LiveChartWidget
@@ -19,10 +18,6 @@ class MainWindow(QMainWindow):
         self.chart_monitor = LiveChartWidget()
         layout.addWidget(self.chart_monitor)
 
-        self.data_buffer = deque(maxlen=200)
-        for _ in range(200):
-            self.data_buffer.append(0)
-
         self.timer = QTimer()
         self.timer.setInterval(33)
         self.timer.timeout.connect(self.update_simulation)
@@ -30,8 +25,7 @@ class MainWindow(QMainWindow):
 
     def update_simulation(self):
         fake_cell_count = random.randint(20, 80)
-        self.data_buffer.append(fake_cell_count)
-        self.chart_monitor.update_chart(list(self.data_buffer))
+        self.chart_monitor.append(fake_cell_count)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
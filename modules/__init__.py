@@ -3,8 +3,23 @@ Bio-Oracle Modules Package
 Contains the core logic for detection, tracking, and logging
 """
 
+from .detections import DetectionBatch, DETECTION_DTYPE
 from .detector import CellDetector
 from .tracker import CellTracker
 from .logger import DataLogger
+from .scheduler import DetectionScheduler
+from .renderer import OverlayRenderer, OverlayLayer
+from .profiling import Profiler, profiler
+from .sources import (FrameSource, VideoSource, ImageDirectorySource, TiffStackSource,
+                      MemmapStackSource, CameraSource, IterableSource, open_source)
+from .stacks import MemmapStack
+from .settings import Settings, SettingsWatcher, load_settings, apply_settings
+from .simulation import EnvironmentSimulation, SimulationRunner
+from .exporter import VideoExporter
 
-__all__ = ['CellDetector', 'CellTracker', 'DataLogger']
+__all__ = ['DetectionBatch', 'DETECTION_DTYPE', 'CellDetector', 'CellTracker', 'DataLogger', 'DetectionScheduler',
+           'OverlayRenderer', 'OverlayLayer', 'Profiler', 'profiler',
+           'FrameSource', 'VideoSource', 'ImageDirectorySource', 'TiffStackSource',
+           'MemmapStackSource', 'CameraSource', 'IterableSource', 'open_source', 'MemmapStack',
+           'Settings', 'SettingsWatcher', 'load_settings', 'apply_settings',
+           'EnvironmentSimulation', 'SimulationRunner', 'VideoExporter']
@@ -0,0 +1,168 @@
+"""
+Detections Module
+Compact detection records shared by the detector, tracker, renderer and logger
+"""
+
+import numpy as np
+
+
+# Status codes of tracked detections
+STATUS_UNKNOWN = 0
+STATUS_MOVING = 1
+STATUS_STAYING = 2
+STATUS_NAMES = ('unknown', 'moving', 'staying')
+
+# One record per detection (48 bytes)
+DETECTION_DTYPE = np.dtype([
+    ('bbox', np.int32, (4,)),       # x1, y1, x2, y2
+    ('center', np.float32, (2,)),   # cx, cy
+    ('area', np.float32),           # Contour area (box area for model detections)
+    ('perimeter', np.float32),      # Contour perimeter (0 for model detections)
+    ('confidence', np.float32),
+    ('class_id', np.int16),
+    ('status', np.int8),            # STATUS_* code
+    ('propagated', np.bool_),       # Box moved by optical flow instead of detected
+    ('track_id', np.int64),         # 0 = not tracked
+])
+
+
+class DetectionBatch:
+    """
+    The detections of one frame in a NumPy structured array
+
+    Columns are array views (boxes, centers, track_ids, statuses...), so a
+    frame with thousands of detections costs a few array allocations
+    instead of one dict or tuple per detection. batch[i] returns one record,
+    a slice, boolean mask or index array returns a new batch.
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data=None):
+        """
+        Args:
+            data (np.ndarray): Structured array of DETECTION_DTYPE (empty if None)
+        """
+        self.data = np.zeros(0, dtype=DETECTION_DTYPE) if data is None else data
+
+    @classmethod
+    def empty(cls, count=0):
+        """Batch of `count` zeroed records"""
+        return cls(np.zeros(count, dtype=DETECTION_DTYPE))
+
+    @classmethod
+    def from_boxes(cls, boxes, confidence=1.0, class_id=0, centers=None, area=None, perimeter=0.0):
+        """
+        Batch from N x 4 (x1, y1, x2, y2) boxes and optional per-detection columns
+
+        Centers default to the box centers and areas to the box areas.
+        """
+        boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        batch = cls.empty(len(boxes))
+        data = batch.data
+        data['bbox'] = boxes
+        data['center'] = (boxes[:, :2] + boxes[:, 2:]) / 2 if centers is None else centers
+        if area is None:
+            area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        data['area'] = area
+        data['perimeter'] = perimeter
+        data['confidence'] = confidence
+        data['class_id'] = class_id
+        return batch
+
+    @classmethod
+    def from_dicts(cls, detections):
+        """Batch from dicts with 'bbox' and optional 'confidence', 'class_id', 'track_id', 'status'"""
+        batch = cls.from_boxes([det['bbox'] for det in detections],
+                               confidence=[det.get('confidence', 1.0) for det in detections],
+                               class_id=[det.get('class_id', 0) for det in detections])
+        batch.data['track_id'] = [det.get('track_id', 0) for det in detections]
+        batch.data['status'] = [STATUS_NAMES.index(det.get('status', 'unknown')) for det in detections]
+        return batch
+
+    @classmethod
+    def coerce(cls, detections):
+        """Pass batches through, convert lists of dicts"""
+        return detections if isinstance(detections, cls) else cls.from_dicts(detections)
+
+    @classmethod
+    def concatenate(cls, batches):
+        batches = [batch.data for batch in batches]
+        return cls(np.concatenate(batches) if batches else None)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.data[index]
+        return DetectionBatch(self.data[index])
+
+    def copy(self):
+        return DetectionBatch(self.data.copy())
+
+    @property
+    def boxes(self):
+        """N x 4 int32 (x1, y1, x2, y2)"""
+        return self.data['bbox']
+
+    @property
+    def centers(self):
+        """N x 2 float32 (cx, cy)"""
+        return self.data['center']
+
+    @property
+    def areas(self):
+        return self.data['area']
+
+    @property
+    def perimeters(self):
+        return self.data['perimeter']
+
+    @property
+    def confidences(self):
+        return self.data['confidence']
+
+    @property
+    def class_ids(self):
+        return self.data['class_id']
+
+    @property
+    def track_ids(self):
+        return self.data['track_id']
+
+    @property
+    def statuses(self):
+        """N int8 STATUS_* codes"""
+        return self.data['status']
+
+    def status_names(self):
+        """N status strings ('unknown', 'moving', 'staying')"""
+        return np.array(STATUS_NAMES)[self.data['status']]
+
+    def counts(self):
+        """
+        Count the detections by status
+
+        Returns:
+            dict: 'moving', 'staying', 'unknown' and 'total' counts
+        """
+        counts = np.bincount(self.data['status'], minlength=3)
+        return {
+            'moving': int(counts[STATUS_MOVING]),
+            'staying': int(counts[STATUS_STAYING]),
+            'unknown': int(counts[STATUS_UNKNOWN]),
+            'total': len(self.data)
+        }
+
+    def to_dicts(self):
+        """List of dicts ('bbox', 'confidence', 'class_id', 'track_id', 'status')"""
+        names = self.status_names()
+        return [{'bbox': tuple(box), 'confidence': confidence, 'class_id': class_id,
+                 'track_id': track_id, 'status': str(status)}
+                for box, confidence, class_id, track_id, status in zip(
+                    self.data['bbox'].tolist(), self.data['confidence'].tolist(),
+                    self.data['class_id'].tolist(), self.data['track_id'].tolist(), names)]
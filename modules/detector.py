@@ -0,0 +1,116 @@
+"""
+Cell Detector Module
+Wraps YOLO11 detection logic
+"""
+
+import cv2
+import numpy as np
+
+import config
+from .detections import DetectionBatch
+
+
+class CellDetector:
+    """YOLO11 cell detector"""
+
+    def __init__(self, model_path=config.MODEL_PATH,
+                 confidence_threshold=config.CONFIDENCE_THRESHOLD,
+                 device=config.DEVICE, img_size=config.IMG_SIZE,
+                 min_area=config.MIN_CELL_AREA, max_area=config.MAX_CELL_AREA):
+        """
+        Load the YOLO model
+
+        Args:
+            model_path (str): Path to the trained weights (best.pt)
+            confidence_threshold (float): Minimum confidence for detections
+            device (str): 'cpu', 'cuda' or a GPU index such as '0'
+            img_size (int): Inference image size
+            min_area (float): Minimum box area (px)
+            max_area (float): Maximum box area (px, 0 = no limit)
+        """
+        # Imported here so the rest of the package works without ultralytics
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        self.confidence_threshold = confidence_threshold
+        self.device = device
+        self.img_size = img_size
+        self.min_area = min_area
+        self.max_area = max_area
+
+    def detect(self, frame):
+        """
+        Detect cells in a frame
+
+        Args:
+            frame: OpenCV BGR or single-channel image (numpy array)
+
+        Returns:
+            DetectionBatch: Boxes (x1, y1, x2, y2), confidences and class IDs
+        """
+        return self.filter(self.infer(frame))
+
+    def infer(self, frame, confidence=None):
+        """
+        Raw model output of a frame, before the area filter
+
+        Args:
+            confidence (float): Confidence threshold of the model run
+                (default confidence_threshold)
+        """
+        if frame.ndim == 2:
+            # The model takes 3-channel input
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        results = self.model.predict(
+            frame,
+            conf=self.confidence_threshold if confidence is None else confidence,
+            imgsz=self.img_size,
+            device=self.device,
+            verbose=False
+        )
+
+        batches = []
+        for result in results:
+            boxes = result.boxes
+            if boxes is None:
+                continue
+            batches.append(DetectionBatch.from_boxes(
+                boxes.xyxy.cpu().numpy().astype(np.int32),
+                confidence=boxes.conf.cpu().numpy(),
+                class_id=boxes.cls.cpu().numpy().astype(np.int16)
+            ))
+
+        return DetectionBatch.concatenate(batches)
+
+    def filter(self, detections):
+        """
+        Detections passing the current confidence threshold and area range
+
+        Re-filtering cached infer() output is how parameter changes are
+        previewed without running the model again.
+        """
+        keep = detections.confidences >= self.confidence_threshold
+        keep &= detections.areas >= self.min_area
+        if self.max_area > 0:
+            keep &= detections.areas <= self.max_area
+        return detections if keep.all() else detections[keep]
+
+    def detect_and_annotate(self, frame):
+        """
+        Detect cells and draw their bounding boxes
+
+        Returns:
+            tuple: (annotated frame, detections)
+        """
+        detections = self.detect(frame)
+        annotated = frame.copy() if frame.ndim == 3 else cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+        for (x1, y1, x2, y2), confidence in zip(detections.boxes.tolist(),
+                                                detections.confidences.tolist()):
+            cv2.rectangle(annotated, (x1, y1), (x2, y2), config.COLOR_UNKNOWN, config.BOX_THICKNESS)
+            cv2.putText(
+                annotated, f"{confidence:.2f}", (x1, y1 - 10),
+                config.FONT, config.FONT_SCALE, config.COLOR_UNKNOWN, config.FONT_THICKNESS
+            )
+
+        return annotated, detections
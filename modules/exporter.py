@@ -0,0 +1,196 @@
+"""
+Video Exporter Module
+Writes annotated frames to a video file from a background thread
+"""
+
+import queue
+import shutil
+import subprocess
+import threading
+
+import cv2
+
+import config
+from .renderer import OverlayRenderer
+
+
+_END = object()
+
+
+def overlay_key(detections):
+    """Key that changes when the drawn overlay of a DetectionBatch changes"""
+    return (detections.boxes.tobytes(), detections.track_ids.tobytes(),
+            detections.statuses.tobytes())
+
+
+class _OpenCVWriter:
+    def __init__(self, path, fps, size, codec):
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, size)
+        if not self.writer.isOpened():
+            raise IOError(f"Could not open video writer: {path}")
+
+    def write(self, frame):
+        self.writer.write(frame)
+
+    def close(self):
+        self.writer.release()
+
+
+class _FFmpegWriter:
+    """Raw BGR frames piped to an ffmpeg process (H.264)"""
+
+    def __init__(self, path, fps, size, codec):
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise IOError("ffmpeg not found on PATH (use the 'opencv' export backend)")
+        width, height = size
+        self.process = subprocess.Popen([
+            ffmpeg, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', str(fps),
+            '-i', '-',
+            # yuv420p needs even dimensions
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+            path
+        ], stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, frame):
+        self.process.stdin.write(frame.tobytes())
+
+    def close(self):
+        self.process.stdin.close()
+        error = self.process.stderr.read().decode(errors='replace').strip()
+        if self.process.wait() != 0:
+            raise IOError(f"ffmpeg failed: {error}")
+
+
+BACKENDS = {'opencv': _OpenCVWriter, 'ffmpeg': _FFmpegWriter}
+
+
+class VideoExporter:
+    """
+    Annotated video export from a dedicated writer thread
+
+    write() only decides whether a frame is exported (every_n, only_changed)
+    and puts it in a bounded queue. Drawing detections, downscaling,
+    encoding and file I/O happen in the writer thread, so the frame loop
+    only waits when the queue is full (the encoder is slower than the
+    pipeline). Frames are used as given, the caller must not modify them
+    after write().
+    """
+
+    def __init__(self, path, fps=30.0, backend=config.EXPORT_BACKEND, codec=config.EXPORT_CODEC,
+                 scale=1.0, every_n=1, only_changed=False, queue_size=config.EXPORT_QUEUE_SIZE,
+                 renderer=None):
+        """
+        Args:
+            path (str): Output video file
+            fps (float): Frame rate of the source
+            backend (str): 'opencv' (cv2.VideoWriter) or 'ffmpeg' (pipe to ffmpeg)
+            codec (str): FourCC of the OpenCV backend
+            scale (float): Downscale factor of the exported frames (1 = full size)
+            every_n (int): Export every Nth frame (the output frame rate is fps / every_n)
+            only_changed (bool): Skip frames whose overlay did not change since
+                the last exported frame
+            queue_size (int): Frames waiting for the writer thread
+            renderer (OverlayRenderer): Draws detections passed to write()
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown export backend: {backend} ({', '.join(BACKENDS)})")
+        if not 0 < scale <= 1:
+            raise ValueError(f"Export scale must be in (0, 1], got {scale}")
+        self.path = path
+        self.fps = fps / max(every_n, 1)
+        self.backend = backend
+        self.codec = codec
+        self.scale = scale
+        self.every_n = max(every_n, 1)
+        self.only_changed = only_changed
+        self.renderer = renderer or OverlayRenderer()
+
+        self.frames_offered = 0
+        self.frames_written = 0
+        self.frames_skipped = 0
+        self.last_key = None
+        self.error = None
+
+        self.writer = None
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, frame, detections=None, key=None):
+        """
+        Queue a frame for export
+
+        Args:
+            frame (np.ndarray): BGR or grayscale frame
+            detections (DetectionBatch): Drawn on the frame in the writer thread
+            key: Overlay state for only_changed (defaults to overlay_key(detections))
+
+        Returns:
+            bool: True if the frame was queued, False if it was skipped
+        """
+        if self.error is not None:
+            raise IOError(f"Video export failed: {self.error}") from self.error
+        index = self.frames_offered
+        self.frames_offered += 1
+        if index % self.every_n:
+            self.frames_skipped += 1
+            return False
+        if self.only_changed:
+            if key is None and detections is not None:
+                key = overlay_key(detections)
+            if key is not None and key == self.last_key:
+                self.frames_skipped += 1
+                return False
+            self.last_key = key
+        self.queue.put((frame, detections))
+        return True
+
+    def close(self):
+        """Write the queued frames and finish the file"""
+        if self.thread.is_alive():
+            self.queue.put(_END)
+            self.thread.join()
+        if self.error is not None:
+            raise IOError(f"Video export failed: {self.error}") from self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is _END:
+                break
+            if self.error is not None:
+                continue  # Keep draining so write() never blocks on a dead writer
+            try:
+                self._export(*item)
+            except Exception as e:
+                self.error = e
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except Exception as e:
+                self.error = self.error or e
+
+    def _export(self, frame, detections):
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        elif detections is not None:
+            frame = frame.copy()
+        if detections is not None:
+            self.renderer.render_batch(frame, detections)
+        if self.scale != 1:
+            frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale,
+                               interpolation=cv2.INTER_AREA)
+        if self.writer is None:
+            height, width = frame.shape[:2]
+            self.writer = BACKENDS[self.backend](self.path, self.fps, (width, height), self.codec)
+        self.writer.write(frame)
+        self.frames_written += 1
@@ -0,0 +1,120 @@
+"""
+Data Logger Module
+Records cell counts and movement data to text files
+"""
+
+import os
+from datetime import datetime
+
+import config
+
+
+class DataLogger:
+    """Writes frame counts, movement details and summaries to the logs directory"""
+
+    def __init__(self, logs_dir=config.LOGS_DIR, date_format=config.LOG_DATE_FORMAT,
+                 time_format=config.LOG_TIME_FORMAT):
+        """
+        Args:
+            logs_dir (str): Directory for the log files
+            date_format (str): strftime format used in the file names
+            time_format (str): strftime format used for timestamps
+        """
+        self.logs_dir = logs_dir
+        self.time_format = time_format
+        os.makedirs(logs_dir, exist_ok=True)
+
+        date = datetime.now().strftime(date_format)
+        self.counts_path = os.path.join(logs_dir, f"{date}_counts.txt")
+        self.movement_path = os.path.join(logs_dir, f"{date}_movement.txt")
+        self.profile_path = os.path.join(logs_dir, f"{date}_profile.json")
+
+        self.counts_file = open(self.counts_path, 'a')
+        self.movement_file = open(self.movement_path, 'a')
+
+        self.frames_logged = 0
+        self.max_total = 0
+        self.sum_total = 0
+
+    def _timestamp(self):
+        return datetime.now().strftime(self.time_format)
+
+    def log_counts(self, frame_number, counts, detection_count):
+        """
+        Record the counts of one frame
+
+        Args:
+            frame_number (int): Frame index
+            counts (dict): 'moving', 'staying' and 'unknown' counts
+            detection_count (int): Raw number of detections in the frame
+        """
+        total = counts.get('total', sum(counts.get(key, 0) for key in ('moving', 'staying', 'unknown')))
+        self.counts_file.write(
+            f"[{self._timestamp()}] Frame {frame_number}: "
+            f"detections={detection_count} total={total} "
+            f"moving={counts.get('moving', 0)} staying={counts.get('staying', 0)} "
+            f"unknown={counts.get('unknown', 0)}\n"
+        )
+        self.frames_logged += 1
+        self.sum_total += total
+        self.max_total = max(self.max_total, total)
+
+    def log_batch(self, frame_number, batch, counts=None):
+        """
+        Record the counts of one frame from a DetectionBatch
+
+        Args:
+            frame_number (int): Frame index
+            batch (DetectionBatch): Detections of the frame
+            counts (dict): Counts to log (e.g. CellTracker.get_counts());
+                defaults to the statuses in the batch
+        """
+        self.log_counts(frame_number, counts if counts is not None else batch.counts(), len(batch))
+
+    def log_movement(self, frame_number, track_id, status, history):
+        """
+        Record the movement of one cell
+
+        Args:
+            frame_number (int): Frame index
+            track_id (int): Track ID
+            status (str): 'moving', 'staying' or 'unknown'
+            history: Sequence of (x, y) centers, oldest first
+        """
+        if len(history) == 0:
+            return
+        start_x, start_y = history[0]
+        end_x, end_y = history[-1]
+        distance = ((end_x - start_x) ** 2 + (end_y - start_y) ** 2) ** 0.5
+        self.movement_file.write(
+            f"[{self._timestamp()}] Frame {frame_number}: Cell {track_id} {status} "
+            f"from ({start_x:.0f}, {start_y:.0f}) to ({end_x:.0f}, {end_y:.0f}) "
+            f"distance={distance:.1f}px over {len(history)} frames\n"
+        )
+
+    def log_summary(self, extra=None):
+        """
+        Write a summary of the session to the counts log
+
+        Args:
+            extra (dict): Additional key/value pairs to include
+        """
+        average = self.sum_total / self.frames_logged if self.frames_logged else 0.0
+        self.counts_file.write("=" * 60 + "\n")
+        self.counts_file.write(f"[{self._timestamp()}] Summary: frames={self.frames_logged} "
+                               f"average_cells={average:.2f} max_cells={self.max_total}\n")
+        for key, value in (extra or {}).items():
+            self.counts_file.write(f"  {key}: {value}\n")
+        self.counts_file.write("=" * 60 + "\n")
+        self.flush()
+
+    def flush(self):
+        self.counts_file.flush()
+        self.movement_file.flush()
+
+    def close(self):
+        """Flush and close the log files"""
+        if not self.counts_file.closed:
+            self.counts_file.close()
+        if not self.movement_file.closed:
+            self.movement_file.close()
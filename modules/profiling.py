@@ -0,0 +1,164 @@
+"""
+Profiling Module
+Per-stage timers with rolling percentiles
+"""
+
+import functools
+import json
+import threading
+import time
+
+import numpy as np
+
+import config
+
+
+class _NullTimer:
+    """Shared no-op context manager returned while profiling is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+class Profiler:
+    """
+    Collects stage durations in a rolling window per stage
+
+    Usage:
+        with profiler.stage('detect'):
+            ...
+
+        @profiler.timed('track')
+        def update(...):
+            ...
+
+    When disabled, stage() returns a shared no-op context manager and
+    timed() functions only pay one attribute check. Stages may be recorded
+    from any thread (tile workers, exporter, simulation runner).
+    """
+
+    def __init__(self, enabled=True, window=1000):
+        """
+        Args:
+            enabled (bool): Record timings
+            window (int): Number of most recent samples kept per stage
+        """
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}  # name -> int64 ring of durations in ns
+        self.counts = {}  # name -> samples recorded since reset()
+        self.lock = threading.Lock()
+
+    def stage(self, name):
+        """Context manager timing the enclosed block as `name`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name)
+
+    def timed(self, name):
+        """Decorator timing every call of the function as `name`"""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter_ns() - start)
+            return wrapper
+        return decorator
+
+    def record(self, name, duration_ns):
+        """Add one duration (ns) to a stage"""
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = np.zeros(self.window, dtype=np.int64)
+                self.counts[name] = 0
+            samples[self.counts[name] % self.window] = duration_ns
+            self.counts[name] += 1
+
+    def last_ms(self, name, default=None):
+        """Most recent duration of a stage in ms"""
+        with self.lock:
+            count = self.counts.get(name, 0)
+            if count == 0:
+                return default
+            return self.samples[name][(count - 1) % self.window] / 1e6
+
+    def stats(self, name, percentiles=(50, 90, 99)):
+        """
+        Rolling statistics of one stage
+
+        Returns:
+            dict: count, mean_ms, max_ms and p<q>_ms for each percentile
+        """
+        with self.lock:
+            count = self.counts.get(name, 0)
+            if count == 0:
+                return {'count': 0}
+            window = self.samples[name][:min(count, self.window)] / 1e6
+        stats = {
+            'count': count,
+            'mean_ms': round(float(window.mean()), 4),
+            'max_ms': round(float(window.max()), 4)
+        }
+        for q, value in zip(percentiles, np.percentile(window, percentiles)):
+            stats[f"p{q}_ms"] = round(float(value), 4)
+        return stats
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """Statistics of all stages, keyed by stage name"""
+        with self.lock:
+            names = list(self.samples)
+        return {name: self.stats(name, percentiles) for name in names}
+
+    def report(self):
+        """Text table of p50/p99 per stage"""
+        lines = [f"{'stage':<16} {'count':>8} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<16} {stats['count']:>8} {stats['mean_ms']:>9.3f} "
+                         f"{stats['p50_ms']:>9.3f} {stats['p99_ms']:>9.3f} {stats['max_ms']:>9.3f}")
+        return "\n".join(lines)
+
+    def dump_json(self, path, extra=None):
+        """Write summary() (and optional extra fields) to a JSON file"""
+        data = {'window': self.window, 'stages': self.summary()}
+        data.update(extra or {})
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def reset(self):
+        with self.lock:
+            self.samples = {}
+            self.counts = {}
+
+
+# Process-wide profiler used by the pipeline modules
+profiler = Profiler(enabled=config.ENABLE_PROFILING, window=config.PROFILING_WINDOW)
@@ -0,0 +1,232 @@
+"""
+Overlay Renderer Module
+Batched drawing of detection boxes, markers and labels
+"""
+
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+import config
+from .detections import STATUS_NAMES
+
+
+def boxes_to_polygons(boxes):
+    """N x 4 (x1, y1, x2, y2) boxes -> N x 4 x 1 x 2 int32 polygons for cv2.polylines"""
+    boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+    x1, y1, x2, y2 = boxes.T
+    corners = np.stack([
+        np.stack([x1, y1], axis=1), np.stack([x2, y1], axis=1),
+        np.stack([x2, y2], axis=1), np.stack([x1, y2], axis=1)
+    ], axis=1)
+    return corners.reshape(-1, 4, 1, 2)
+
+
+def box_corners(boxes):
+    """N x 4 (x1, y1, x2, y2) boxes -> 4N x 2 corner points"""
+    return boxes_to_polygons(boxes).reshape(-1, 2)
+
+
+class OverlayRenderer:
+    """
+    Draws many cells with few OpenCV calls
+
+    Boxes and filled markers of one color are drawn with a single
+    cv2.polylines call each, and
+    labels are pre-rasterized sprites cached by (text, colors) and pasted
+    with a masked copy instead of being rasterized again every frame.
+    """
+
+    def __init__(self, font=config.FONT, font_scale=config.FONT_SCALE,
+                 font_thickness=config.FONT_THICKNESS, max_sprites=4096):
+        self.font = font
+        self.font_scale = font_scale
+        self.font_thickness = font_thickness
+        self.max_sprites = max_sprites
+        self.sprites = OrderedDict()
+
+    def draw_boxes(self, image, boxes, color, thickness=config.BOX_THICKNESS):
+        """Draw all boxes of one color with one polylines call"""
+        if len(boxes) == 0:
+            return image
+        polygons = list(boxes_to_polygons(boxes))
+        cv2.polylines(image, polygons, True, color, thickness)
+        return image
+
+    def draw_points(self, image, points, color, radius=5):
+        """
+        Draw filled disks at all (x, y) points with one polylines call
+
+        A zero-length segment of thickness 2 * radius rasterizes exactly like
+        cv2.circle(image, point, radius, color, -1).
+        """
+        points = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+        if len(points) == 0:
+            return image
+        segments = np.repeat(points, 2, axis=0).reshape(-1, 2, 1, 2)
+        cv2.polylines(image, list(segments), False, color, 2 * radius)
+        return image
+
+    def label_sprite(self, text, text_color, background=None, font_scale=None):
+        """
+        Pre-rasterized label
+
+        Returns:
+            tuple: (sprite image, uint8 mask of pixels to paste or None when
+                   the whole sprite is opaque, (left, top) of the anchor in the sprite)
+        """
+        font_scale = font_scale or self.font_scale
+        key = (text, tuple(text_color), tuple(background) if background is not None else None,
+               font_scale)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+
+        (width, height), baseline = cv2.getTextSize(text, self.font, font_scale, self.font_thickness)
+        if background is not None:
+            # Filled box from (x, y - h - 10) to (x + w + 6, y), text at (x + 3, y - 5)
+            canvas = np.empty((height + 11, width + 7, 3), dtype=np.uint8)
+            canvas[:] = background
+            cv2.putText(canvas, text, (3, height + 5), self.font, font_scale,
+                        text_color, self.font_thickness)
+            sprite = (canvas, None, (0, height + 10))
+        else:
+            # Text only, anchored at its baseline like cv2.putText
+            pad = self.font_thickness + 2
+            mask = np.zeros((height + baseline + 2 * pad, width + 2 * pad), dtype=np.uint8)
+            cv2.putText(mask, text, (pad, height + pad), self.font, font_scale,
+                        255, self.font_thickness)
+            canvas = np.empty(mask.shape + (3,), dtype=np.uint8)
+            canvas[:] = text_color
+            sprite = (canvas, mask, (pad, height + pad))
+
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.max_sprites:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def draw_labels(self, image, anchors, texts, text_color, background=None, font_scale=None,
+                    offset=(0, 0)):
+        """
+        Paste cached label sprites
+
+        Args:
+            anchors: (x, y) per label; with a background the box sits above the
+                anchor, without one the text baseline is at the anchor
+            offset: (dx, dy) added to every anchor
+        """
+        img_h, img_w = image.shape[:2]
+        for (x, y), text in zip(anchors, texts):
+            canvas, mask, (left, top) = self.label_sprite(text, text_color, background, font_scale)
+            x0, y0 = int(x) + offset[0] - left, int(y) + offset[1] - top
+            h, w = canvas.shape[:2]
+            if x0 < 0 or y0 < 0 or x0 + w > img_w or y0 + h > img_h:
+                # Clip the sprite to the image
+                sx0, sy0 = max(0, -x0), max(0, -y0)
+                sx1, sy1 = min(w, img_w - x0), min(h, img_h - y0)
+                if sx0 >= sx1 or sy0 >= sy1:
+                    continue
+                canvas = canvas[sy0:sy1, sx0:sx1]
+                mask = mask[sy0:sy1, sx0:sx1] if mask is not None else None
+                x0, y0 = x0 + sx0, y0 + sy0
+                h, w = canvas.shape[:2]
+
+            region = image[y0:y0 + h, x0:x0 + w]
+            if mask is None:
+                region[:] = canvas
+            else:
+                # Writes through the image view
+                cv2.copyTo(canvas, mask, region)
+        return image
+
+    def render_detections(self, image, boxes, track_ids, statuses):
+        """
+        Draw tracked detections colored by status (moving/staying/unknown)
+
+        Args:
+            boxes: N x 4 (x1, y1, x2, y2)
+            track_ids: N track IDs
+            statuses: N STATUS_* codes or status strings
+        """
+        boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        statuses = np.asarray(statuses)
+        if statuses.dtype.kind in 'iu':
+            statuses = np.array(STATUS_NAMES)[statuses]
+        track_ids = np.asarray(track_ids)
+        colors = {
+            'moving': config.COLOR_MOVING,
+            'staying': config.COLOR_STAYING,
+            'unknown': config.COLOR_UNKNOWN
+        }
+        for status, color in colors.items():
+            selected = statuses == status if len(statuses) else np.zeros(0, dtype=bool)
+            if not selected.any():
+                continue
+            self.draw_boxes(image, boxes[selected], color)
+            anchors = boxes[selected][:, :2]
+            texts = [f"ID:{track_id} {status}" for track_id in track_ids[selected]]
+            self.draw_labels(image, anchors, texts, color, offset=(0, -10))
+        return image
+
+    def render_batch(self, image, batch):
+        """Draw a tracked DetectionBatch colored by status"""
+        return self.render_detections(image, batch.boxes, batch.track_ids, batch.statuses)
+
+
+class OverlayLayer:
+    """
+    Overlay kept in a separate layer
+
+    The layer is only re-rendered when its content key changes; compositing
+    copies just the pixels inside the layer's bounding box. Black layer pixels
+    are treated as transparent.
+    """
+
+    def __init__(self):
+        self.key = None
+        self.layer = None
+        self.mask = None
+        self.bounds = None
+
+    def update(self, shape, key, draw):
+        """
+        Re-render the layer if the key changed
+
+        Args:
+            shape: Frame shape
+            key: Hashable description of the overlay content
+            draw: Callable drawing onto a blank BGR image
+
+        Returns:
+            bool: True if the layer was re-rendered
+        """
+        if self.layer is not None and self.layer.shape == tuple(shape) and key == self.key:
+            return False
+
+        if self.layer is not None and self.layer.shape == tuple(shape):
+            layer = self.layer
+            if self.bounds is not None:
+                y1, y2, x1, x2 = self.bounds
+                layer[y1:y2, x1:x2] = 0
+        else:
+            layer = np.zeros(shape, dtype=np.uint8)
+        draw(layer)
+        mask = (layer.max(axis=2) if layer.ndim == 3 else layer) > 0
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        self.bounds = None if len(rows) == 0 else (rows[0], rows[-1] + 1, cols[0], cols[-1] + 1)
+        self.layer = layer
+        self.mask = mask.view(np.uint8)
+        self.key = key
+        return True
+
+    def composite(self, frame):
+        """Copy the layer onto the frame (in place)"""
+        if self.bounds is None:
+            return frame
+        y1, y2, x1, x2 = self.bounds
+        # Writes through the frame view
+        cv2.copyTo(self.layer[y1:y2, x1:x2], self.mask[y1:y2, x1:x2], frame[y1:y2, x1:x2])
+        return frame
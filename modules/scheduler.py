@@ -0,0 +1,148 @@
+"""
+Detection Scheduler Module
+Runs the full detector every Nth frame and propagates boxes in between
+with sparse optical flow
+"""
+
+import warnings
+
+import cv2
+import numpy as np
+
+from .detections import DetectionBatch
+
+
+class DetectionScheduler:
+    """
+    Detection-skipping wrapper with the same detect() interface as CellDetector
+
+    Between keyframes each box is moved by the median Lucas-Kanade flow of a
+    grid of points inside it. A new full detection runs every `interval`
+    frames, or earlier when the tracking quality of the propagated boxes
+    drops below `min_track_quality`.
+    """
+
+    def __init__(self, detector, interval=5, min_track_quality=0.5,
+                 max_flow_error=20.0, grid_size=3):
+        """
+        Args:
+            detector: Object with detect(frame) returning a DetectionBatch (or dicts with 'bbox')
+            interval (int): Run the full detector every `interval` frames
+            min_track_quality (float): Mean fraction of well-tracked points
+                below which the detector runs immediately
+            max_flow_error (float): Maximum LK error for a point to count as tracked
+            grid_size (int): Points per box side used for optical flow
+        """
+        self.detector = detector
+        self.interval = max(1, interval)
+        self.min_track_quality = min_track_quality
+        self.max_flow_error = max_flow_error
+        self.grid_size = grid_size
+
+        self.prev_gray = None
+        self.detections = DetectionBatch()
+        self.frames_since_detection = 0
+        self.detector_runs = 0
+        self.frames = 0
+
+        self.lk_params = dict(
+            winSize=(21, 21),
+            maxLevel=3,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03)
+        )
+
+    def reset(self):
+        """Forget all state (e.g. when a new video is loaded)"""
+        self.prev_gray = None
+        self.detections = DetectionBatch()
+        self.frames_since_detection = 0
+        self.detector_runs = 0
+        self.frames = 0
+
+    def detect(self, frame):
+        """
+        Detect cells, running the full detector only when needed
+
+        Returns:
+            DetectionBatch: Detections, `propagated` is set for boxes that
+                came from optical flow
+        """
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.frames += 1
+
+        run_detector = (
+            self.prev_gray is None
+            or self.prev_gray.shape != gray.shape
+            or self.frames_since_detection + 1 >= self.interval
+        )
+
+        if not run_detector:
+            propagated, quality = self._propagate(gray)
+            if propagated is not None and quality >= self.min_track_quality:
+                self.detections = propagated
+                self.frames_since_detection += 1
+                self.prev_gray = gray
+                return self.detections
+
+        self.detections = DetectionBatch.coerce(self.detector.detect(frame))
+        self.detector_runs += 1
+        self.frames_since_detection = 0
+        self.prev_gray = gray
+        return self.detections
+
+    def _propagate(self, gray):
+        """Move the current boxes with optical flow, returns (detections, quality)"""
+        if len(self.detections) == 0:
+            return self.detections, 1.0
+
+        boxes = self.detections.boxes.astype(np.float32)
+        count = len(boxes)
+
+        # Grid of points inside each box (inset so points stay on the cell)
+        steps = (np.arange(self.grid_size, dtype=np.float32) + 1) / (self.grid_size + 1)
+        gx, gy = np.meshgrid(steps, steps)
+        gx, gy = gx.ravel(), gy.ravel()
+        widths = (boxes[:, 2] - boxes[:, 0])[:, None]
+        heights = (boxes[:, 3] - boxes[:, 1])[:, None]
+        xs = boxes[:, 0:1] + widths * gx
+        ys = boxes[:, 1:2] + heights * gy
+        points = np.stack([xs, ys], axis=-1).reshape(-1, 1, 2).astype(np.float32)
+
+        next_points, status, error = cv2.calcOpticalFlowPyrLK(
+            self.prev_gray, gray, points, None, **self.lk_params)
+        if next_points is None:
+            return None, 0.0
+
+        per_box = self.grid_size * self.grid_size
+        good = ((status.ravel() == 1) & (error.ravel() < self.max_flow_error)).reshape(count, per_box)
+        motion = (next_points - points).reshape(count, per_box, 2)
+
+        quality = good.mean(axis=1)
+        masked = np.where(good[..., None], motion, np.nan)
+        with warnings.catch_warnings():
+            # Boxes without any tracked point give all-NaN slices (shift 0)
+            warnings.simplefilter('ignore', RuntimeWarning)
+            shift = np.nan_to_num(np.nanmedian(masked, axis=1))
+
+        height, width = gray.shape[:2]
+        offsets = np.round(shift).astype(np.int32)
+        new_boxes = self.detections.boxes + np.tile(offsets, 2)
+        # Drop boxes that left the frame
+        inside = ((new_boxes[:, 2] > 0) & (new_boxes[:, 3] > 0)
+                  & (new_boxes[:, 0] < width) & (new_boxes[:, 1] < height))
+        # Boolean indexing copies, the current detections stay untouched
+        propagated = self.detections[inside]
+        propagated.data['bbox'] = new_boxes[inside]
+        propagated.data['center'] += offsets[inside]
+        propagated.data['confidence'] *= quality[inside]
+        propagated.data['propagated'] = True
+
+        return propagated, float(quality.mean())
+
+    def get_stats(self):
+        """Fraction of frames on which the full detector ran"""
+        return {
+            'frames': self.frames,
+            'detector_runs': self.detector_runs,
+            'detector_ratio': self.detector_runs / self.frames if self.frames else 0.0
+        }
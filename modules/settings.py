@@ -0,0 +1,414 @@
+"""
+Settings Module
+Typed, hierarchical pipeline settings loaded from TOML/YAML/JSON files with
+command line overrides, and applied to a running pipeline between frames
+
+The defaults come from config.py. A settings file only lists what differs:
+
+    # run.toml
+    [classical]
+    min_area = 600
+    search_radius = 200
+
+    [tracking]
+    movement_threshold = 30
+
+Overrides use the same names: --set classical.min_area=600
+"""
+
+import argparse
+import dataclasses
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Union
+
+import config
+
+
+@dataclass
+class DetectionSettings:
+    """YOLO detector and detection scheduling"""
+    model_path: str = config.MODEL_PATH
+    confidence_threshold: float = config.CONFIDENCE_THRESHOLD
+    img_size: int = config.IMG_SIZE
+    min_area: float = config.MIN_CELL_AREA  # Box area range (px), max 0 = no limit
+    max_area: float = config.MAX_CELL_AREA
+    device: str = config.DEVICE
+    interval: int = config.DETECTION_INTERVAL  # Full detection every N frames
+
+
+@dataclass
+class TrackingSettings:
+    """CellTracker"""
+    movement_threshold: float = config.MOVEMENT_THRESHOLD
+    staying_frame_count: int = config.STAYING_FRAME_COUNT
+    max_history: int = config.MAX_TRACKING_HISTORY
+    max_match_distance: float = 50.0
+    max_missed_frames: int = 5
+
+
+@dataclass
+class ClassicalSettings:
+    """Classical (contour) CellDetector, names match its attributes"""
+    # Contour area range (px)
+    min_area: float = 800
+    max_area: float = 2000
+    # Frames a candidate must be seen before it is locked
+    stability_threshold: int = 3
+
+    # Contour filtering
+    min_track_aspect: float = 0.2
+    max_track_aspect: float = 6.0
+    min_candidate_aspect: float = 0.1
+    max_candidate_aspect: float = 10.0
+    min_circularity: float = 0.05
+
+    # Locked cell tracking
+    search_radius: float = 150      # Max distance to the predicted position (px)
+    min_area_ratio: float = 0.4     # Min area similarity to keep following a cell
+    lock_distance: float = 50       # Candidates closer than this are the same cell (px)
+    lock_padding: int = 10          # Locked cells are masked out with this margin (px)
+
+    # Candidate de-duplication
+    duplicate_iou: float = 0.3
+    duplicate_distance: float = 30
+    duplicate_overlap: float = 0.4  # Of the smaller box
+
+    # Preprocessing
+    blur_size: int = 5
+    clahe_clip_limit: float = 2.0
+    clahe_grid_size: int = 8
+    threshold_block_size: int = 11
+    threshold_c: float = 2
+    morph_kernel_size: int = 3
+
+
+@dataclass
+class InputSettings:
+    """Frame sources"""
+    frame_prefetch: int = config.FRAME_PREFETCH
+    grayscale: Union[bool, str] = config.GRAYSCALE_SOURCES  # True, False or 'auto'
+
+
+@dataclass
+class Settings:
+    detection: DetectionSettings = field(default_factory=DetectionSettings)
+    tracking: TrackingSettings = field(default_factory=TrackingSettings)
+    classical: ClassicalSettings = field(default_factory=ClassicalSettings)
+    input: InputSettings = field(default_factory=InputSettings)
+
+    def to_dict(self):
+        return dataclasses.asdict(self)
+
+
+# Changes to these only take effect when the pipeline is rebuilt (new video)
+RESTART_FIELDS = {
+    'detection.model_path', 'detection.device', 'tracking.max_history',
+    'input.frame_prefetch', 'input.grayscale'
+}
+
+# Classical preprocessing parameters (a change invalidates cached masks)
+PREPROCESSING_FIELDS = (
+    'blur_size', 'clahe_clip_limit', 'clahe_grid_size',
+    'threshold_block_size', 'threshold_c', 'morph_kernel_size'
+)
+
+
+def _coerce(value, type_, name):
+    """Convert a file or command line value to the field type"""
+    if type_ == Union[bool, str]:
+        if isinstance(value, str) and value.lower() in ('true', 'false'):
+            return value.lower() == 'true'
+        return value
+    if type_ is bool:
+        if isinstance(value, str):
+            if value.lower() not in ('true', 'false', '1', '0', 'yes', 'no'):
+                raise ValueError(f"{name}: expected true/false, got {value!r}")
+            return value.lower() in ('true', '1', 'yes')
+        return bool(value)
+    if type_ is int:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = None
+        if number is None or not math.isfinite(number) or number != int(number):
+            raise ValueError(f"{name}: expected an integer, got {value!r}")
+        return int(number)
+    try:
+        value = type_(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: expected {type_.__name__}, got {value!r}") from None
+    if type_ is float and not math.isfinite(value):
+        # inf/nan would pass the range checks in validate()
+        raise ValueError(f"{name}: expected a finite number, got {value!r}")
+    return value
+
+
+def _section_fields(settings, section):
+    if section not in {f.name for f in dataclasses.fields(settings)}:
+        raise ValueError(f"Unknown settings section: {section}")
+    return {f.name: f for f in dataclasses.fields(getattr(settings, section))}
+
+
+def merge(settings, values):
+    """
+    New Settings with nested {section: {name: value}} values applied
+
+    Raises:
+        ValueError: For unknown sections/names or values of the wrong type
+    """
+    sections = {}
+    for section, entries in values.items():
+        fields = _section_fields(settings, section)
+        if not isinstance(entries, dict):
+            raise ValueError(f"Settings section {section} must be a table")
+        changes = {}
+        for name, value in entries.items():
+            if name not in fields:
+                raise ValueError(f"Unknown setting: {section}.{name}")
+            changes[name] = _coerce(value, fields[name].type, f"{section}.{name}")
+        sections[section] = dataclasses.replace(getattr(settings, section), **changes)
+    return dataclasses.replace(settings, **sections)
+
+
+def parse_overrides(overrides):
+    """['section.name=value', ...] -> {section: {name: 'value'}}"""
+    values = {}
+    for override in overrides:
+        key, separator, value = override.partition('=')
+        section, dot, name = key.strip().partition('.')
+        if not separator or not dot:
+            raise ValueError(f"Expected section.name=value, got {override!r}")
+        values.setdefault(section, {})[name] = value.strip()
+    return values
+
+
+def read_settings_file(path):
+    """Nested dict from a .toml, .yaml/.yml or .json file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.toml':
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("tomli is required for TOML settings files on Python < 3.11 "
+                                  "(pip install tomli)") from None
+        with open(path, 'rb') as f:
+            try:
+                return tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"Invalid TOML: {e}") from None
+    if extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is required for YAML settings files (pip install pyyaml)") from None
+        with open(path) as f:
+            try:
+                return yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                raise ValueError(f"Invalid YAML: {e}") from None
+    if extension == '.json':
+        with open(path) as f:
+            return json.load(f)
+    raise ValueError(f"Unsupported settings file: {path} (use .toml, .yaml or .json)")
+
+
+def validate(settings):
+    """
+    Check value ranges
+
+    Raises:
+        ValueError: Listing every invalid value
+    """
+    errors = []
+    classical = settings.classical
+    if not 0 <= classical.min_area < classical.max_area:
+        errors.append("classical: need 0 <= min_area < max_area")
+    for name in ('blur_size', 'threshold_block_size'):
+        value = getattr(classical, name)
+        if value < 1 or value % 2 == 0 or (name == 'threshold_block_size' and value < 3):
+            errors.append(f"classical.{name} must be an odd number (>= 3 for the block size)")
+    if classical.morph_kernel_size < 1 or classical.clahe_grid_size < 1:
+        errors.append("classical: morph_kernel_size and clahe_grid_size must be >= 1")
+    if classical.stability_threshold < 1:
+        errors.append("classical.stability_threshold must be >= 1")
+
+    detection = settings.detection
+    if not 0 <= detection.confidence_threshold <= 1:
+        errors.append("detection.confidence_threshold must be in [0, 1]")
+    if detection.interval < 1:
+        errors.append("detection.interval must be >= 1")
+    if detection.min_area < 0 or (detection.max_area and detection.max_area <= detection.min_area):
+        errors.append("detection: need 0 <= min_area < max_area (or max_area = 0)")
+
+    tracking = settings.tracking
+    if tracking.staying_frame_count < 1 or tracking.max_history < 2:
+        errors.append("tracking: staying_frame_count must be >= 1 and max_history >= 2")
+    if tracking.max_missed_frames < 0:
+        errors.append("tracking.max_missed_frames must be >= 0")
+
+    if settings.input.grayscale not in (True, False, 'auto'):
+        errors.append("input.grayscale must be true, false or 'auto'")
+    if errors:
+        raise ValueError("Invalid settings:\n  " + "\n  ".join(errors))
+    return settings
+
+
+def load_settings(path=None, overrides=(), base=None):
+    """
+    Build validated Settings: defaults (or `base`), then the file, then overrides
+
+    Args:
+        path (str): Optional .toml/.yaml/.json settings file
+        overrides (list): 'section.name=value' strings
+        base (Settings): Starting point instead of the config.py defaults
+
+    Raises:
+        ValueError: For unknown names or invalid values
+    """
+    settings = base or Settings()
+    if path:
+        settings = merge(settings, read_settings_file(path))
+    if overrides:
+        settings = merge(settings, parse_overrides(overrides))
+    return validate(settings)
+
+
+def changed_fields(old, new):
+    """'section.name' of every value that differs"""
+    changed = []
+    for section in dataclasses.fields(new):
+        old_section, new_section = getattr(old, section.name), getattr(new, section.name)
+        for f in dataclasses.fields(new_section):
+            if getattr(old_section, f.name) != getattr(new_section, f.name):
+                changed.append(f"{section.name}.{f.name}")
+    return changed
+
+
+def apply_settings(settings, previous=None, detector=None, tracker=None, classical=None):
+    """
+    Apply settings to live pipeline objects, in place
+
+    Call between frames (from the thread running the pipeline) so a frame
+    never sees half-applied settings. The model, tracks and locked cells
+    are kept.
+
+    Args:
+        settings (Settings): New settings
+        previous (Settings): Settings currently in effect, used to report
+            changes that need a rebuild
+        detector: YOLO CellDetector, optionally wrapped in a DetectionScheduler
+        tracker (CellTracker): Tracker
+        classical: Classical (contour) CellDetector
+
+    Returns:
+        list: Changed 'section.name' fields that only apply after a rebuild
+    """
+    if detector is not None:
+        inner = getattr(detector, 'detector', None)
+        if inner is not None:
+            # DetectionScheduler
+            detector.interval = max(1, settings.detection.interval)
+            detector = inner
+        detector.confidence_threshold = settings.detection.confidence_threshold
+        detector.img_size = settings.detection.img_size
+        detector.min_area = settings.detection.min_area
+        detector.max_area = settings.detection.max_area
+
+    if tracker is not None:
+        tracker.configure(**{name: getattr(settings.tracking, name) for name in (
+            'movement_threshold', 'staying_frame_count', 'max_match_distance', 'max_missed_frames')})
+
+    if classical is not None:
+        classical.configure(settings.classical)
+
+    if previous is None:
+        return []
+    return [name for name in changed_fields(previous, settings) if name in RESTART_FIELDS]
+
+
+class SettingsWatcher:
+    """
+    Reloads a settings file when it changes
+
+    poll() is cheap (one stat call at most every `interval` seconds) and is
+    meant to be called between frames; it returns the new settings, and the
+    caller applies them with apply_settings(). An invalid file keeps the
+    current settings and stores the message in `error`.
+    """
+
+    def __init__(self, path, overrides=(), interval=1.0, settings=None):
+        """
+        Args:
+            path (str): Settings file to watch
+            overrides (list): 'section.name=value' strings, re-applied on every reload
+            interval (float): Minimum seconds between file checks
+            settings (Settings): Current settings (loaded from `path` if None)
+        """
+        self.path = path
+        self.overrides = list(overrides)
+        self.interval = interval
+        self.error = None
+        self.mtime = self._mtime()
+        self.settings = settings or load_settings(path, self.overrides)
+        self.last_check = time.monotonic()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self, force=False):
+        """New Settings if the file changed (or `force`) and is valid, else None"""
+        now = time.monotonic()
+        if not force and now - self.last_check < self.interval:
+            return None
+        self.last_check = now
+
+        mtime = self._mtime()
+        if not force and (mtime is None or mtime == self.mtime):
+            return None
+        self.mtime = mtime
+
+        try:
+            settings = load_settings(self.path, self.overrides)
+        except (OSError, ValueError, ImportError) as e:
+            self.error = f"{self.path}: {e}"
+            return None
+        self.error = None
+        if settings == self.settings:
+            return None
+        self.settings = settings
+        return settings
+
+
+def add_settings_arguments(parser):
+    """Add --config and --set to an argparse parser"""
+    parser.add_argument("--config", default=config.SETTINGS_FILE,
+                        help="Settings file (.toml, .yaml or .json)")
+    parser.add_argument("--set", dest="overrides", action="append", default=[],
+                        metavar="SECTION.NAME=VALUE",
+                        help="Override one setting, e.g. --set classical.min_area=600")
+    return parser
+
+
+def settings_from_args(args, parser=None):
+    """Settings from parsed --config/--set arguments (parser.error on invalid input)"""
+    try:
+        return load_settings(args.config, args.overrides)
+    except (OSError, ValueError, ImportError) as e:
+        if parser is None:
+            raise
+        parser.error(str(e))
+
+
+def settings_argument_parser():
+    """Parser with only the settings arguments (for parse_known_args)"""
+    return add_settings_arguments(argparse.ArgumentParser(add_help=False))
@@ -0,0 +1,363 @@
+"""
+Environment Simulation Module
+Survival and motility of cells under toxicity and temperature
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import config
+from .detections import STATUS_STAYING
+
+
+def temperature_stress(temperature, optimum=config.OPTIMAL_TEMPERATURE,
+                       tolerance=config.TEMPERATURE_TOLERANCE):
+    """Distance from the tolerated range around the optimum, in units of 10 °C"""
+    return max(abs(temperature - optimum) - tolerance, 0.0) / 10.0
+
+
+def death_rate(toxicity, temperature):
+    """
+    Deaths per second of a cell with average sensitivity
+
+    Args:
+        toxicity (float): Poison level in % (0-100)
+        temperature (float): Temperature in °C
+    """
+    return (config.TOXICITY_HAZARD * (toxicity / 100.0) ** 2 +
+            config.TEMPERATURE_HAZARD * temperature_stress(temperature) ** 2)
+
+
+def motility_factor(toxicity, temperature):
+    """Speed of a cell with average sensitivity relative to ideal conditions (0-1)"""
+    return float(np.exp(-temperature_stress(temperature)) * (1.0 - 0.8 * toxicity / 100.0))
+
+
+class EnvironmentSimulation:
+    """
+    Vectorized survival and motility model
+
+    Cells live in NumPy arrays indexed by slot, like the tracker's state.
+    Each cell draws a log-normal sensitivity at birth; every step it dies
+    with probability 1 - exp(-death_rate * sensitivity * dt) and its
+    motility becomes motility_factor ** sensitivity. Cells are either
+    tracked cells (registered by track id through track(), freed by retain()
+    once their track ends) or virtual cells created by spawn() that move
+    inside `bounds`, for headless what-if runs.
+    All randomness comes from one seeded generator, so a run is reproducible
+    for a given seed and sequence of calls.
+    """
+
+    def __init__(self, toxicity=0.0, temperature=25.0, seed=config.SIMULATION_SEED,
+                 bounds=(640, 480), initial_capacity=256):
+        """
+        Args:
+            toxicity (float): Poison level in % (0-100)
+            temperature (float): Temperature in °C
+            seed (int): Random seed (None = not reproducible)
+            bounds (tuple): (width, height) of the area virtual cells move in
+            initial_capacity (int): Initial number of cell slots
+        """
+        self.toxicity = toxicity
+        self.temperature = temperature
+        self.bounds = np.asarray(bounds, dtype=np.float32)
+        self.rng = np.random.default_rng(seed)
+        self.time = 0.0
+        self.count = 0
+        self.next_virtual_id = -1  # Virtual cells get negative ids, track ids are positive
+        self._allocate(initial_capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.sensitivity = np.ones(capacity, dtype=np.float32)
+        self.motility = np.ones(capacity, dtype=np.float32)
+        self.positions = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 2), dtype=np.float32)
+
+    def _grow(self, needed):
+        """Double the slot arrays until `needed` slots fit"""
+        capacity = max(self.capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        old = {name: getattr(self, name) for name in (
+            'ids', 'alive', 'sensitivity', 'motility', 'positions', 'velocities')}
+        count = self.count
+        self._allocate(capacity)
+        for name, values in old.items():
+            getattr(self, name)[:count] = values[:count]
+
+    def _add(self, ids):
+        """Append cells with the given ids, returns their slots"""
+        count = len(ids)
+        self._grow(self.count + count)
+        slots = np.arange(self.count, self.count + count)
+        self.count += count
+        self.ids[slots] = ids
+        self.alive[slots] = True
+        self.sensitivity[slots] = self.rng.lognormal(0.0, 0.5, count)
+        self.motility[slots] = motility_factor(self.toxicity, self.temperature) ** self.sensitivity[slots]
+        return slots
+
+    def spawn(self, count, speed=20.0):
+        """
+        Create virtual cells at random positions
+
+        Args:
+            count (int): Number of cells
+            speed (float): Mean speed (px/s) under ideal conditions
+
+        Returns:
+            np.ndarray: Ids of the new cells
+        """
+        ids = np.arange(self.next_virtual_id, self.next_virtual_id - count, -1)
+        self.next_virtual_id -= count
+        slots = self._add(ids)
+        self.positions[slots] = self.rng.random((count, 2)) * self.bounds
+        angles = self.rng.random(count) * 2 * np.pi
+        speeds = self.rng.exponential(speed, count)
+        self.velocities[slots, 0] = np.cos(angles) * speeds
+        self.velocities[slots, 1] = np.sin(angles) * speeds
+        return ids
+
+    def track(self, track_ids):
+        """
+        Slots of tracked cells, registering ids seen for the first time
+
+        Args:
+            track_ids (np.ndarray): Track ids (0 = untracked, ignored)
+
+        Returns:
+            np.ndarray: Slot per id (-1 for untracked detections)
+        """
+        track_ids = np.asarray(track_ids, dtype=np.int64)
+        slots = np.full(len(track_ids), -1, dtype=np.int64)
+        tracked = track_ids > 0
+        if not tracked.any():
+            return slots
+
+        ids = self.ids[:self.count]
+        order = np.argsort(ids, kind='stable')
+        index = np.searchsorted(ids[order], track_ids[tracked])
+        index = np.minimum(index, max(len(ids) - 1, 0))
+        known = np.zeros(int(tracked.sum()), dtype=bool)
+        if len(ids):
+            known = ids[order][index] == track_ids[tracked]
+        found = np.full(len(known), -1, dtype=np.int64)
+        found[known] = order[index[known]]
+
+        new_ids, first = np.unique(track_ids[tracked][~known], return_index=True)
+        if len(new_ids):
+            new_slots = self._add(new_ids)
+            # Duplicates of a new id map to the slot of its first occurrence
+            _, inverse = np.unique(track_ids[tracked][~known], return_inverse=True)
+            found[~known] = new_slots[inverse]
+        slots[tracked] = found
+        return slots
+
+    def retain(self, track_ids):
+        """
+        Free the slots of tracked cells whose track ended
+
+        Args:
+            track_ids (np.ndarray): Ids of the tracks still active (virtual
+                cells are always kept)
+
+        Returns:
+            int: Cells removed
+        """
+        count = self.count
+        ids = self.ids[:count]
+        keep = (ids < 0) | np.isin(ids, np.asarray(track_ids, dtype=np.int64))
+        kept = np.flatnonzero(keep)
+        if len(kept) == count:
+            return 0
+        # Compact the slot arrays, the order of the kept cells is unchanged
+        for name in ('ids', 'alive', 'sensitivity', 'motility', 'positions', 'velocities'):
+            values = getattr(self, name)
+            values[:len(kept)] = values[kept]
+        self.count = len(kept)
+        return count - len(kept)
+
+    def step(self, dt):
+        """
+        Advance all cells by dt seconds
+
+        Returns:
+            int: Cells that died during the step
+        """
+        count = self.count
+        alive = self.alive[:count]
+        sensitivity = self.sensitivity[:count]
+
+        # Per-cell hazard, independent draws
+        hazard = death_rate(self.toxicity, self.temperature) * dt
+        if hazard > 0:
+            survival = np.exp(-hazard * sensitivity)
+            dies = alive & (self.rng.random(count, dtype=np.float32) >= survival)
+            alive &= ~dies
+            deaths = int(np.count_nonzero(dies))
+        else:
+            deaths = 0
+
+        factor = motility_factor(self.toxicity, self.temperature)
+        np.power(np.float32(factor), sensitivity, out=self.motility[:count])
+        self.motility[:count][~alive] = 0.0
+
+        # Virtual cells move and wrap around the bounds, tracked cells have no velocity
+        positions = self.positions[:count]
+        positions += self.velocities[:count] * (self.motility[:count, None] * dt)
+        np.mod(positions, self.bounds, out=positions)
+
+        self.time += dt
+        return deaths
+
+    def run(self, steps, dt):
+        """
+        Advance `steps` steps of dt seconds
+
+        Returns:
+            np.ndarray: Living cells after each step
+        """
+        living = np.empty(steps, dtype=np.int64)
+        for index in range(steps):
+            self.step(dt)
+            living[index] = self.living()
+        return living
+
+    def kill(self, ids=None):
+        """Kill the given cells (all cells if None), returns the number killed"""
+        if ids is None:
+            targets = self.alive[:self.count]
+        else:
+            slots = self.track(ids)
+            targets = np.zeros(self.count, dtype=bool)
+            targets[slots[slots >= 0]] = True
+            targets &= self.alive[:self.count]
+        killed = int(np.count_nonzero(targets))
+        self.alive[:self.count][targets] = False
+        self.motility[:self.count][targets] = 0.0
+        return killed
+
+    def living(self):
+        return int(np.count_nonzero(self.alive[:self.count]))
+
+    def dead_ids(self):
+        """Sorted ids of dead cells"""
+        count = self.count
+        return np.sort(self.ids[:count][~self.alive[:count]])
+
+    def immobile_ids(self):
+        """Sorted ids of living cells slower than IMMOBILE_MOTILITY"""
+        count = self.count
+        slow = self.alive[:count] & (self.motility[:count] < config.IMMOBILE_MOTILITY)
+        return np.sort(self.ids[:count][slow])
+
+
+class SimulationRunner:
+    """
+    Steps an EnvironmentSimulation in a worker thread
+
+    step() queues one step and returns immediately (a step still running
+    is not queued again, so a slow simulation never holds up frames).
+    After each step the ids of dead and immobile cells are published, and
+    apply() reads the latest published state from the pipeline thread, so
+    effects show up at most one frame late.
+    """
+
+    def __init__(self, simulation):
+        """
+        Args:
+            simulation (EnvironmentSimulation): Model to step (only touched by the worker)
+        """
+        self.simulation = simulation
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='simulation')
+        self.pending = None
+        self.dead = np.empty(0, dtype=np.int64)
+        self.immobile = np.empty(0, dtype=np.int64)
+
+    def set_conditions(self, toxicity=None, temperature=None):
+        """Change the conditions, used from the next step on"""
+        self.executor.submit(self._set_conditions, toxicity, temperature)
+
+    def step(self, dt, track_ids=(), active_ids=None):
+        """
+        Queue one step for the cells of the current frame
+
+        Args:
+            dt (float): Seconds to advance
+            track_ids (np.ndarray): Track ids of the current detections
+            active_ids (np.ndarray): Ids of all active tracks; cells of other
+                (ended) tracks are freed, None keeps every cell
+
+        Returns:
+            bool: False if the previous step was still running (skipped)
+        """
+        if self.pending is not None and not self.pending.done():
+            return False
+        if active_ids is not None:
+            active_ids = np.array(active_ids, dtype=np.int64)
+        self.pending = self.executor.submit(self._step, dt, np.array(track_ids, dtype=np.int64),
+                                            active_ids)
+        return True
+
+    def kill(self, track_ids=None):
+        """Queue killing the given cells (all cells if None)"""
+        return self.executor.submit(self._kill, None if track_ids is None
+                                    else np.array(track_ids, dtype=np.int64))
+
+    def apply(self, detections):
+        """
+        Drop dead cells and mark immobile cells as staying
+
+        Args:
+            detections (DetectionBatch): Tracked detections
+
+        Returns:
+            DetectionBatch: The surviving detections
+        """
+        track_ids = detections.track_ids
+        dead, immobile = self.dead, self.immobile
+        if len(dead):
+            detections = detections[~np.isin(track_ids, dead, assume_unique=False)]
+            track_ids = detections.track_ids
+        if len(immobile):
+            slow = np.isin(track_ids, immobile)
+            if slow.any():
+                detections = detections.copy()
+                detections.statuses[slow] = STATUS_STAYING
+        return detections
+
+    def wait(self):
+        """Block until queued work is done"""
+        self.executor.submit(lambda: None).result()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def _set_conditions(self, toxicity, temperature):
+        if toxicity is not None:
+            self.simulation.toxicity = toxicity
+        if temperature is not None:
+            self.simulation.temperature = temperature
+
+    def _step(self, dt, track_ids, active_ids):
+        self.simulation.track(track_ids)
+        if active_ids is not None:
+            self.simulation.retain(active_ids)
+        self.simulation.step(dt)
+        self._publish()
+
+    def _kill(self, track_ids):
+        killed = self.simulation.kill(track_ids)
+        self._publish()
+        return killed
+
+    def _publish(self):
+        # Whole-array swaps, readers see either the old or the new state
+        self.dead = self.simulation.dead_ids()
+        self.immobile = self.simulation.immobile_ids()
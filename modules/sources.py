@@ -0,0 +1,479 @@
+"""
+Frame Sources Module
+Streams frames with metadata from video files, image directories,
+multi-page TIFF and NumPy stacks and cameras behind one interface
+"""
+
+import hashlib
+import itertools
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from .stacks import MemmapStack, UnsupportedStackError
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+
+_END = object()
+
+
+def is_mono(frame, tolerance=8):
+    """True for single-channel frames and color frames whose channels are equal"""
+    if frame.ndim == 2 or frame.shape[2] == 1:
+        return True
+    # YUV decoding leaves differences of a few levels between the channels
+    # of gray content, stained samples differ by tens
+    sample = frame[::4, ::4, :3].astype(np.int16)
+    return int(np.abs(sample - sample[..., :1]).max()) <= tolerance
+
+
+class _Prefetcher:
+    """Background thread reading a frame generator ahead into a bounded queue"""
+
+    def __init__(self, generator, size):
+        self.generator = generator
+        self.queue = queue.Queue(maxsize=size)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            for item in self.generator:
+                if not self._put(item):
+                    return
+        except Exception as e:
+            self._put(e)
+            return
+        self._put(_END)
+
+    def _put(self, item):
+        # Poll so stop() is noticed while the queue is full
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.generator.close()
+
+
+class FrameSource:
+    """
+    Base class of all frame sources
+
+    Subclasses implement _frames(start), a generator of frames from frame
+    `start` on, and fill self.metadata. Iterating a source yields
+    (frame, info) pairs, where info holds the frame 'index' and its
+    'timestamp' in seconds (plus e.g. the 'path' of an image file). read()
+    returns the next pair for pull-style consumers such as the GUI timer.
+
+    Frames are BGR uint8, or single-channel uint8 when the source is opened
+    with grayscale=True. grayscale='auto' picks single-channel frames when
+    the first frame is monochrome (metadata 'mono'), which cuts the memory
+    traffic of every later stage to a third.
+
+    With prefetch > 0 frames are decoded by a background thread up to
+    `prefetch` frames ahead (OpenCV releases the GIL while decoding), so
+    decoding overlaps with processing. Only the prefetched frames are held
+    in memory.
+    """
+
+    kind = 'source'
+
+    def __init__(self, prefetch=0, grayscale=False):
+        """
+        Args:
+            prefetch (int): Frames decoded ahead in a background thread (0 = off)
+            grayscale (bool or str): Single-channel frames (True, False or 'auto')
+        """
+        self.prefetch = prefetch
+        self.grayscale = grayscale
+        self.metadata = {'kind': self.kind, 'fps': None, 'width': None, 'height': None,
+                         'frame_count': None, 'channels': None, 'mono': None}
+        self._stream = None
+        self._prefetcher = None
+
+    def _set_format(self, first):
+        """Resolve grayscale='auto' from the first frame"""
+        mono = is_mono(first)
+        if self.grayscale == 'auto':
+            self.grayscale = mono
+        self.grayscale = bool(self.grayscale)
+        self.metadata.update({'width': first.shape[1], 'height': first.shape[0],
+                              'channels': 1 if self.grayscale else 3, 'mono': mono})
+
+    def _convert(self, frame):
+        """Decoded frame -> output format"""
+        if self.grayscale:
+            return frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame if frame.ndim == 3 else cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+    def _frames(self, start=0):
+        raise NotImplementedError
+
+    def frame_info(self, index):
+        """Per-frame metadata, computed in the decoding thread"""
+        fps = self.metadata.get('fps')
+        return {'index': index, 'timestamp': index / fps if fps else None}
+
+    def _items(self, start):
+        for index, frame in enumerate(self._frames(start), start):
+            yield frame, self.frame_info(index)
+
+    def __iter__(self):
+        """Stream all frames from the start as (frame, info) pairs"""
+        self.rewind()
+        yield from self._stream
+
+    def read(self):
+        """
+        Next frame
+
+        Returns:
+            tuple: (frame, info), or (None, None) at the end of the source
+        """
+        if self._stream is None:
+            self.rewind()
+        return next(self._stream, (None, None))
+
+    def rewind(self):
+        """Restart from the first frame"""
+        self.seek(0)
+
+    def seek(self, index):
+        """Continue reading at frame `index` (cameras continue the live stream)"""
+        self._stop()
+        generator = self._items(index)
+        if self.prefetch > 0:
+            self._prefetcher = _Prefetcher(generator, self.prefetch)
+            self._stream = iter(self._prefetcher)
+        else:
+            self._stream = generator
+
+    def _stop(self):
+        if self._prefetcher is not None:
+            self._prefetcher.stop()
+            self._prefetcher = None
+        elif self._stream is not None:
+            self._stream.close()
+        self._stream = None
+
+    def close(self):
+        """Stop the prefetch thread and release the underlying resources"""
+        self._stop()
+
+    def __len__(self):
+        return self.metadata.get('frame_count') or 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __del__(self):
+        try:
+            self._stop()
+        except Exception:
+            pass
+
+
+class VideoSource(FrameSource):
+    """Video file decoded with cv2.VideoCapture"""
+
+    kind = 'video'
+
+    def __init__(self, path, prefetch=0, grayscale=False):
+        super().__init__(prefetch, grayscale)
+        self.path = path
+        capture = cv2.VideoCapture(path)
+        ret, first = capture.read()
+        if not ret:
+            capture.release()
+            raise IOError(f"Could not open video: {path}")
+        self.metadata.update({
+            'source': path,
+            'fps': capture.get(cv2.CAP_PROP_FPS) or None,
+            'frame_count': int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+        })
+        capture.release()
+        self._set_format(first)
+
+    def _frames(self, start=0):
+        capture = cv2.VideoCapture(self.path)
+        if start:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+        try:
+            while True:
+                ret, frame = capture.read()
+                if not ret:
+                    return
+                # Decoders output BGR, the conversion runs in the prefetch thread
+                yield self._convert(frame)
+        finally:
+            capture.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Image files of a directory in name order (e.g. EMDS5-Original)"""
+
+    kind = 'images'
+
+    def __init__(self, path, fps=None, extensions=IMAGE_EXTENSIONS, prefetch=0, grayscale=False):
+        """
+        Args:
+            path (str): Directory with the images
+            fps (float): Frame rate used for timestamps (None = no timestamps)
+        """
+        super().__init__(prefetch, grayscale)
+        self.paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(tuple(extensions)))
+        if not self.paths:
+            raise IOError(f"No images found in: {path}")
+        first = cv2.imread(self.paths[0], cv2.IMREAD_ANYCOLOR)
+        if first is None:
+            raise IOError(f"Could not read image: {self.paths[0]}")
+        self.metadata.update({'source': path, 'fps': fps, 'frame_count': len(self.paths)})
+        self._set_format(first)
+
+    def frame_info(self, index):
+        info = super().frame_info(index)
+        info['path'] = self.paths[index]
+        return info
+
+    def _frames(self, start=0):
+        for path in self.paths[start:]:
+            # Gray files decode to one channel; color files are converted like
+            # the detector would, IMREAD_GRAYSCALE rounds differently
+            frame = cv2.imread(path, cv2.IMREAD_ANYCOLOR)
+            if frame is None:
+                raise IOError(f"Could not read image: {path}")
+            yield self._convert(frame)
+
+
+class TiffStackSource(FrameSource):
+    """Multi-page TIFF decoded one page at a time"""
+
+    kind = 'tiff'
+
+    def __init__(self, path, fps=None, prefetch=0, grayscale=False):
+        super().__init__(prefetch, grayscale)
+        self.path = path
+        pages = cv2.imcount(path)
+        if pages <= 0:
+            raise IOError(f"Could not open TIFF stack: {path}")
+        self.metadata.update({'source': path, 'fps': fps, 'frame_count': pages})
+        self._set_format(self._page(0))
+
+    def _page(self, index):
+        ret, pages = cv2.imreadmulti(self.path, start=index, count=1, flags=cv2.IMREAD_ANYCOLOR)
+        if not ret or not pages:
+            raise IOError(f"Could not read page {index} of {self.path}")
+        return pages[0]
+
+    def _frames(self, start=0):
+        for index in range(start, self.metadata['frame_count']):
+            yield self._convert(self._page(index))
+
+
+class MemmapStackSource(FrameSource):
+    """
+    Uncompressed TIFF stack or .npy dump mapped into memory
+
+    Frames are accessed by index in O(1) without decoding: source[i] is a
+    read-only view of the raw page in the file. Iteration and frame(i)
+    return the uint8 frame the pipeline expects, which only copies when
+    the page has to be scaled (16-bit/float data) or converted (RGB pages,
+    or single-channel pages without grayscale). 8-bit mono stacks opened
+    with grayscale are passed through zero-copy.
+    """
+
+    kind = 'stack'
+
+    def __init__(self, path, fps=None, value_range=None, prefetch=0, grayscale=False):
+        """
+        Args:
+            path (str): .npy file (N x H x W [x C]) or uncompressed TIFF
+            fps (float): Frame rate used for timestamps (None = no timestamps)
+            value_range (tuple): (low, high) of non-8-bit data mapped to 0-255;
+                None = range of the first frame
+
+        Raises:
+            UnsupportedStackError: For compressed or tiled TIFFs (use TiffStackSource)
+        """
+        super().__init__(prefetch, grayscale)
+        self.path = path
+        self.stack = MemmapStack(path)
+        if len(self.stack) == 0:
+            raise IOError(f"Empty stack: {path}")
+        self.channels = self.stack.shape[2] if len(self.stack.shape) > 2 else 1
+        self.metadata.update({
+            'source': path, 'fps': fps, 'frame_count': len(self.stack),
+            'dtype': str(self.stack.dtype)
+        })
+        self._set_format(self.stack[0])
+
+        self.scale = None
+        if self.stack.dtype != np.uint8:
+            if value_range is None:
+                sample = np.asarray(self.stack[0][::4, ::4], dtype=np.float64)
+                value_range = (float(sample.min()), float(sample.max()))
+            low, high = value_range
+            self.scale = (255.0 / (high - low) if high > low else 1.0, low)
+
+    def __getitem__(self, index):
+        """Raw page `index` (zero-copy view)"""
+        return self.stack[index]
+
+    def frame(self, index):
+        """Page `index` as a uint8 frame (BGR, or single-channel with grayscale)"""
+        page = self.stack[index]
+        if self.scale is not None:
+            alpha, low = self.scale
+            page = cv2.convertScaleAbs(page, alpha=alpha, beta=-low * alpha)
+        if self.channels == 1:
+            page = page if self.grayscale else cv2.cvtColor(page, cv2.COLOR_GRAY2BGR)
+        elif self.grayscale:
+            page = cv2.cvtColor(page, cv2.COLOR_RGB2GRAY if self.stack.rgb else cv2.COLOR_BGR2GRAY)
+        elif self.stack.rgb:
+            page = cv2.cvtColor(page, cv2.COLOR_RGB2BGR)
+        return page
+
+    def _frames(self, start=0):
+        for index in range(start, len(self.stack)):
+            yield self.frame(index)
+
+
+class CameraSource(FrameSource):
+    """Live stream (camera index or stream URL), timestamps are wall-clock"""
+
+    kind = 'camera'
+
+    def __init__(self, device=0, width=None, height=None, prefetch=0, grayscale=False):
+        super().__init__(prefetch, grayscale)
+        self.device = device
+        self.capture = cv2.VideoCapture(device)
+        if not self.capture.isOpened():
+            raise IOError(f"Could not open camera: {device}")
+        if width and height:
+            self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        ret, first = self.capture.read()
+        if not ret:
+            self.capture.release()
+            raise IOError(f"Could not read from camera: {device}")
+        self.metadata.update({'source': device, 'fps': self.capture.get(cv2.CAP_PROP_FPS) or None})
+        self._set_format(first)
+
+    def frame_info(self, index):
+        return {'index': index, 'timestamp': time.time()}
+
+    def _frames(self, start=0):
+        # A camera cannot restart or seek, it continues with the live stream
+        while self.capture.isOpened():
+            ret, frame = self.capture.read()
+            if not ret:
+                return
+            yield self._convert(frame)
+
+    def close(self):
+        super().close()
+        self.capture.release()
+
+
+class IterableSource(FrameSource):
+    """Frames from any iterable or generator function (e.g. synthetic videos)"""
+
+    kind = 'stream'
+
+    def __init__(self, frames, fps=None, frame_count=None, prefetch=0, grayscale=False):
+        """
+        Args:
+            frames: Iterable of frames, or a callable returning a new iterable
+                (then the source can be rewound, and grayscale='auto' can
+                look at the first frame; otherwise 'auto' keeps BGR)
+        """
+        super().__init__(prefetch, grayscale)
+        self.frames = frames
+        self.metadata.update({'source': getattr(frames, '__name__', 'stream'), 'fps': fps,
+                              'frame_count': frame_count})
+        if callable(frames):
+            self._set_format(next(iter(frames())))
+        else:
+            self.grayscale = self.grayscale is True
+            self.metadata['channels'] = 1 if self.grayscale else 3
+
+    def _frames(self, start=0):
+        frames = self.frames() if callable(self.frames) else self.frames
+        for frame in itertools.islice(frames, start, None):
+            yield self._convert(frame)
+
+
+def source_name(source):
+    """
+    Output file name for a source: its stem plus a short hash of its directory
+
+    Same-named files in different directories get different names, and a
+    source always gets the same name (resumable runs find their outputs).
+    Camera indices are named 'camera<N>'.
+    """
+    source = str(source)
+    if source.isdigit():
+        return f"camera{source}"
+    path = os.path.abspath(os.path.normpath(source))
+    stem = os.path.splitext(os.path.basename(path))[0]
+    directory = hashlib.sha1(os.path.dirname(path).encode('utf-8')).hexdigest()[:6]
+    return f"{stem}_{directory}"
+
+
+def open_source(source, prefetch=0, **kwargs):
+    """
+    Frame source for a path or camera
+
+    Args:
+        source: Camera index (int or digit string), image directory, TIFF
+            stack, .npy stack or video file
+        prefetch (int): Frames decoded ahead in a background thread
+        **kwargs: Passed to the source class (e.g. fps, grayscale)
+
+    Returns:
+        FrameSource
+    """
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return CameraSource(int(source), prefetch=prefetch, **kwargs)
+    if os.path.isdir(source):
+        return ImageDirectorySource(source, prefetch=prefetch, **kwargs)
+    if source.lower().endswith('.npy'):
+        return MemmapStackSource(source, prefetch=prefetch, **kwargs)
+    if source.lower().endswith(TIFF_EXTENSIONS):
+        # Uncompressed stacks are mapped, the others decoded page by page
+        try:
+            return MemmapStackSource(source, prefetch=prefetch, **kwargs)
+        except UnsupportedStackError:
+            kwargs.pop('value_range', None)
+            return TiffStackSource(source, prefetch=prefetch, **kwargs)
+    if '://' in source:
+        return CameraSource(source, prefetch=prefetch, **kwargs)
+    return VideoSource(source, prefetch=prefetch, **kwargs)
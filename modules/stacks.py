@@ -0,0 +1,192 @@
+"""
+Memory-Mapped Stacks Module
+Zero-copy, O(1) random access to the frames of uncompressed TIFF stacks
+and NumPy (.npy) dumps
+"""
+
+import re
+import struct
+
+import numpy as np
+
+
+# TIFF tags
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+BITS_PER_SAMPLE = 258
+COMPRESSION = 259
+PHOTOMETRIC = 262
+IMAGE_DESCRIPTION = 270
+STRIP_OFFSETS = 273
+SAMPLES_PER_PIXEL = 277
+STRIP_BYTE_COUNTS = 279
+PLANAR_CONFIGURATION = 284
+TILE_WIDTH = 322
+SAMPLE_FORMAT = 339
+
+# Field type -> struct format
+FIELD_TYPES = {1: 'B', 2: 's', 3: 'H', 4: 'I', 6: 'b', 7: 'B', 8: 'h', 9: 'i',
+               11: 'f', 12: 'd', 16: 'Q', 17: 'q'}
+
+# SampleFormat -> numpy kind
+SAMPLE_KINDS = {1: 'u', 2: 'i', 3: 'f'}
+
+PHOTOMETRIC_RGB = 2
+
+
+class UnsupportedStackError(ValueError):
+    """The file cannot be memory-mapped (e.g. compressed or tiled TIFF)"""
+
+
+def _read_ifd(f, offset, byte_order, big):
+    """Tags of one IFD and the offset of the next one"""
+    count_format, entry_size, value_size = ('Q', 20, 8) if big else ('H', 12, 4)
+    f.seek(offset)
+    (entries,) = struct.unpack(byte_order + count_format, f.read(8 if big else 2))
+    data = f.read(entries * entry_size)
+    (next_offset,) = struct.unpack(byte_order + ('Q' if big else 'I'), f.read(value_size))
+
+    tags = {}
+    for i in range(entries):
+        entry = data[i * entry_size:(i + 1) * entry_size]
+        tag, field_type = struct.unpack(byte_order + 'HH', entry[:4])
+        (count,) = struct.unpack(byte_order + ('Q' if big else 'I'), entry[4:4 + value_size])
+        fmt = FIELD_TYPES.get(field_type)
+        if fmt is None:
+            continue
+        size = struct.calcsize(fmt) * count
+        raw = entry[4 + value_size:]
+        if size > value_size:
+            (pointer,) = struct.unpack(byte_order + ('Q' if big else 'I'), raw)
+            position = f.tell()
+            f.seek(pointer)
+            raw = f.read(size)
+            f.seek(position)
+        if fmt == 's':
+            tags[tag] = raw[:count].rstrip(b'\0').decode('latin-1')
+        else:
+            tags[tag] = struct.unpack(f"{byte_order}{count}{fmt}", raw[:size])
+    return tags, next_offset
+
+
+def _page_layout(tags, byte_order):
+    """(data offset, shape, dtype, photometric) of one IFD, contiguous pages only"""
+    if tags.get(COMPRESSION, (1,))[0] != 1:
+        raise UnsupportedStackError("Compressed TIFF pages cannot be memory-mapped")
+    if TILE_WIDTH in tags:
+        raise UnsupportedStackError("Tiled TIFF pages cannot be memory-mapped")
+
+    width, height = tags[IMAGE_WIDTH][0], tags[IMAGE_LENGTH][0]
+    samples = tags.get(SAMPLES_PER_PIXEL, (1,))[0]
+    bits = tags.get(BITS_PER_SAMPLE, (1,))[0]
+    kind = SAMPLE_KINDS.get(tags.get(SAMPLE_FORMAT, (1,))[0])
+    if bits % 8 or kind is None:
+        raise UnsupportedStackError(f"Unsupported sample type: {bits} bit")
+    if samples > 1 and tags.get(PLANAR_CONFIGURATION, (1,))[0] != 1:
+        raise UnsupportedStackError("Planar TIFF pages cannot be memory-mapped")
+
+    offsets, counts = tags[STRIP_OFFSETS], tags[STRIP_BYTE_COUNTS]
+    # Strips must follow each other to view the page as one array
+    for i in range(len(offsets) - 1):
+        if offsets[i] + counts[i] != offsets[i + 1]:
+            raise UnsupportedStackError("TIFF strips are not contiguous")
+
+    dtype = np.dtype(f"{byte_order}{kind}{bits // 8}")
+    shape = (height, width, samples) if samples > 1 else (height, width)
+    photometric = tags.get(PHOTOMETRIC, (1,))[0]
+    return offsets[0], shape, dtype, photometric
+
+
+def read_tiff_layout(path):
+    """
+    Locate the pixel data of every page of an uncompressed TIFF
+
+    ImageJ writes stacks over 4 GB with a single IFD and the remaining pages
+    stored contiguously after the first; those are expanded from the
+    'images=' entry of the ImageJ description.
+
+    Returns:
+        tuple: (list of page data offsets, shape, dtype, photometric)
+
+    Raises:
+        UnsupportedStackError: For compressed, tiled or mixed-shape stacks
+    """
+    with open(path, 'rb') as f:
+        header = f.read(16)
+        byte_order = {b'II': '<', b'MM': '>'}.get(header[:2])
+        if byte_order is None:
+            raise UnsupportedStackError(f"Not a TIFF file: {path}")
+        (magic,) = struct.unpack(byte_order + 'H', header[2:4])
+        if magic == 42:
+            big = False
+            (offset,) = struct.unpack(byte_order + 'I', header[4:8])
+        elif magic == 43:
+            big = True
+            (offset,) = struct.unpack(byte_order + 'Q', header[8:16])
+        else:
+            raise UnsupportedStackError(f"Not a TIFF file: {path}")
+
+        offsets, layout, first_tags = [], None, None
+        while offset:
+            tags, offset = _read_ifd(f, offset, byte_order, big)
+            page_offset, *page_layout = _page_layout(tags, byte_order)
+            if layout is None:
+                layout, first_tags = page_layout, tags
+            elif page_layout != layout:
+                raise UnsupportedStackError("TIFF pages differ in shape or type")
+            offsets.append(page_offset)
+
+        f.seek(0, 2)
+        file_size = f.tell()
+
+    shape, dtype, photometric = layout
+    description = first_tags.get(IMAGE_DESCRIPTION, '')
+    match = re.search(r'images=(\d+)', description) if description.startswith('ImageJ') else None
+    if len(offsets) == 1 and match:
+        page_bytes = int(np.prod(shape)) * dtype.itemsize
+        images = min(int(match.group(1)), (file_size - offsets[0]) // page_bytes)
+        offsets = [offsets[0] + i * page_bytes for i in range(images)]
+    return offsets, shape, dtype, photometric
+
+
+class MemmapStack:
+    """
+    Read-only stack of frames mapped from a file
+
+    stack[i] is a view into the mapped file (no copy, no decoding); pages are
+    only read from disk when their pixels are touched.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): .npy file (N x H x W [x C]) or uncompressed TIFF stack
+
+        Raises:
+            UnsupportedStackError: If the file cannot be memory-mapped
+        """
+        self.path = path
+        self.rgb = False
+        if path.lower().endswith('.npy'):
+            array = np.load(path, mmap_mode='r')
+            if array.ndim == 2:
+                array = array[None]
+            if array.ndim not in (3, 4):
+                raise UnsupportedStackError(f"Expected N x H x W [x C] array, got {array.shape}")
+            self.array = array
+            self.offsets = None
+            self.shape, self.dtype = array.shape[1:], array.dtype
+        else:
+            self.offsets, self.shape, self.dtype, photometric = read_tiff_layout(path)
+            self.rgb = photometric == PHOTOMETRIC_RGB
+            self.array = np.memmap(path, dtype=np.uint8, mode='r')
+            self.page_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def __len__(self):
+        return len(self.array) if self.offsets is None else len(self.offsets)
+
+    def __getitem__(self, index):
+        if self.offsets is None:
+            return self.array[index]
+        offset = self.offsets[index]
+        return self.array[offset:offset + self.page_bytes].view(self.dtype).reshape(self.shape)
@@ -0,0 +1,338 @@
+"""
+Cell Tracker Module
+Tracks cells across frames and classifies them as moving or staying
+"""
+
+import numpy as np
+
+import config
+from .detections import DetectionBatch, STATUS_UNKNOWN, STATUS_MOVING, STATUS_STAYING
+from .profiling import profiler
+
+
+def _cell_keys(cx, cy):
+    """Single int64 key per grid cell (cells may be negative)"""
+    return (cx + (1 << 30)) * (1 << 31) + (cy + (1 << 30))
+
+
+class CellTracker:
+    """
+    Array-backed multi-cell tracker
+
+    Track state lives in NumPy arrays indexed by slot (freed slots are
+    reused), and positions are written into a ring buffer shared by all
+    tracks, so each frame costs O(tracks) regardless of history length.
+    The displacement over the last `staying_frame_count` frames (the sum of
+    the steps in the rolling window) is the difference between the current
+    position and the ring buffer entry `staying_frame_count` frames back.
+    """
+
+    def __init__(self, movement_threshold=config.MOVEMENT_THRESHOLD,
+                 staying_frame_count=config.STAYING_FRAME_COUNT,
+                 max_history=config.MAX_TRACKING_HISTORY,
+                 max_match_distance=50, max_missed_frames=5, initial_capacity=256):
+        """
+        Args:
+            movement_threshold (float): Displacement (px) over the window to be "moving"
+            staying_frame_count (int): Window length (frames) of the classification
+            max_history (int): Positions kept per track
+            max_match_distance (float): Maximum center distance to match a detection
+            max_missed_frames (int): Frames a track survives without detection
+            initial_capacity (int): Initial number of track slots
+        """
+        self.movement_threshold = movement_threshold
+        self.max_history = max(2, max_history)
+        self.window = max(1, min(staying_frame_count, self.max_history - 1))
+        self.max_match_distance = max_match_distance
+        self.max_missed_frames = max_missed_frames
+
+        self.frame_count = 0
+        self.next_track_id = 1
+        self._allocate(initial_capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.active = np.zeros(capacity, dtype=bool)
+        self.track_ids = np.zeros(capacity, dtype=np.int64)
+        self.centers = np.zeros((capacity, 2), dtype=np.float32)
+        self.start_centers = np.zeros((capacity, 2), dtype=np.float32)
+        self.bboxes = np.zeros((capacity, 4), dtype=np.int32)
+        self.ages = np.zeros(capacity, dtype=np.int32)  # Frames since the track started
+        self.missed = np.zeros(capacity, dtype=np.int32)
+        self.status = np.zeros(capacity, dtype=np.int8)
+        self.displacement = np.zeros(capacity, dtype=np.float32)
+        self.history = np.zeros((capacity, self.max_history, 2), dtype=np.float32)
+
+    def _grow(self, needed):
+        """Double the slot arrays until `needed` slots fit"""
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        old = {name: getattr(self, name) for name in (
+            'active', 'track_ids', 'centers', 'start_centers', 'bboxes',
+            'ages', 'missed', 'status', 'displacement', 'history')}
+        old_capacity = self.capacity
+        self._allocate(capacity)
+        for name, values in old.items():
+            getattr(self, name)[:old_capacity] = values
+
+    def configure(self, movement_threshold=None, staying_frame_count=None,
+                  max_match_distance=None, max_missed_frames=None):
+        """
+        Change parameters of a running tracker, tracks are kept
+
+        The classification window is limited by max_history, which is fixed
+        at construction (it sizes the ring buffer).
+        """
+        if movement_threshold is not None:
+            self.movement_threshold = movement_threshold
+        if staying_frame_count is not None:
+            self.window = max(1, min(staying_frame_count, self.max_history - 1))
+        if max_match_distance is not None:
+            self.max_match_distance = max_match_distance
+        if max_missed_frames is not None:
+            self.max_missed_frames = max_missed_frames
+        if movement_threshold is not None or staying_frame_count is not None:
+            self.reclassify()
+
+    def reset(self):
+        """Remove all tracks"""
+        self.frame_count = 0
+        self.next_track_id = 1
+        self._allocate(self.capacity)
+
+    def update(self, detections):
+        """
+        Update tracks with the detections of a new frame
+
+        Args:
+            detections (DetectionBatch): Detections (a list of dicts with
+                'bbox' (x1, y1, x2, y2) is converted)
+
+        Returns:
+            DetectionBatch: Copy of the detections with track_id and status filled
+        """
+        tracked = DetectionBatch.coerce(detections).copy()
+        slots = self.update_arrays(tracked.boxes)
+        tracked.data['track_id'] = self.track_ids[slots]
+        tracked.data['status'] = self.status[slots]
+        return tracked
+
+    def preview(self, detections):
+        """
+        Track IDs and statuses the current tracks give to detections, without
+        updating them
+
+        Used to show the last frame again with other detector parameters;
+        detections no track matches get track_id 0 and STATUS_UNKNOWN.
+        """
+        tracked = DetectionBatch.coerce(detections).copy()
+        boxes = tracked.boxes
+        centers = np.empty((len(boxes), 2), dtype=np.float32)
+        centers[:, 0] = (boxes[:, 0] + boxes[:, 2]) / 2
+        centers[:, 1] = (boxes[:, 1] + boxes[:, 3]) / 2
+
+        matched_tracks, matched_dets = self._associate(np.flatnonzero(self.active), centers)
+        tracked.data['track_id'] = 0
+        tracked.data['status'] = STATUS_UNKNOWN
+        tracked.data['track_id'][matched_dets] = self.track_ids[matched_tracks]
+        tracked.data['status'][matched_dets] = self.status[matched_tracks]
+        return tracked
+
+    def update_arrays(self, boxes):
+        """
+        Array version of update()
+
+        Args:
+            boxes (np.ndarray): N x 4 (x1, y1, x2, y2) detection boxes
+
+        Returns:
+            np.ndarray: Track slot of each detection
+        """
+        boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        centers = np.empty((len(boxes), 2), dtype=np.float32)
+        centers[:, 0] = (boxes[:, 0] + boxes[:, 2]) / 2
+        centers[:, 1] = (boxes[:, 1] + boxes[:, 3]) / 2
+
+        track_slots = np.flatnonzero(self.active)
+        with profiler.stage('associate'):
+            matched_tracks, matched_dets = self._associate(track_slots, centers)
+
+        # Matched tracks
+        self.centers[matched_tracks] = centers[matched_dets]
+        self.bboxes[matched_tracks] = boxes[matched_dets]
+        self.missed[matched_tracks] = 0
+
+        # Unmatched tracks keep their last position until they expire
+        unmatched = np.ones(len(track_slots), dtype=bool)
+        unmatched[np.searchsorted(track_slots, matched_tracks)] = False
+        lost = track_slots[unmatched]
+        self.missed[lost] += 1
+        expired = lost[self.missed[lost] > self.max_missed_frames]
+        self.active[expired] = False
+
+        # New tracks for unmatched detections
+        det_slots = np.empty(len(boxes), dtype=np.int64)
+        det_slots[matched_dets] = matched_tracks
+        new_dets = np.ones(len(boxes), dtype=bool)
+        new_dets[matched_dets] = False
+        new_dets = np.flatnonzero(new_dets)
+        det_slots[new_dets] = self._start_tracks(boxes[new_dets], centers[new_dets])
+
+        self._record_and_classify()
+        self.frame_count += 1
+        return det_slots
+
+    def _associate(self, track_slots, centers):
+        """
+        Greedy nearest-neighbour matching, vectorized
+
+        Candidate pairs are found with a uniform grid of cell size
+        max_match_distance (each track only looks at detections in its own
+        and the 8 neighbouring cells); pairs that are each other's nearest
+        candidate are accepted in rounds until none remain.
+        """
+        empty = np.empty(0, dtype=np.int64)
+        if len(track_slots) == 0 or len(centers) == 0:
+            return empty, empty
+
+        track_centers = self.centers[track_slots]
+        cell_size = max(float(self.max_match_distance), 1.0)
+        det_cells = np.floor(centers / cell_size).astype(np.int64)
+        track_cells = np.floor(track_centers / cell_size).astype(np.int64)
+
+        det_keys = _cell_keys(det_cells[:, 0], det_cells[:, 1])
+        det_order = np.argsort(det_keys, kind='stable')
+        sorted_keys = det_keys[det_order]
+
+        # Sorted track keys stay sorted when shifted to a neighbouring cell,
+        # which keeps searchsorted fast
+        track_keys = _cell_keys(track_cells[:, 0], track_cells[:, 1])
+        track_order = np.argsort(track_keys, kind='stable')
+        sorted_track_keys = track_keys[track_order]
+
+        pair_tracks, pair_dets = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                keys = sorted_track_keys + (dx * (1 << 31) + dy)
+                lo = np.searchsorted(sorted_keys, keys, side='left')
+                hi = np.searchsorted(sorted_keys, keys, side='right')
+                counts = hi - lo
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+                pair_tracks.append(np.repeat(track_order, counts))
+                pair_dets.append(det_order[starts + np.arange(total)])
+
+        if not pair_tracks:
+            return empty, empty
+
+        tracks = np.concatenate(pair_tracks)
+        dets = np.concatenate(pair_dets)
+        diff = track_centers[tracks] - centers[dets]
+        dist = np.einsum('ij,ij->i', diff, diff)
+        within = dist <= self.max_match_distance ** 2
+        tracks, dets, dist = tracks[within], dets[within], dist[within]
+
+        matched_t, matched_d = [], []
+        while len(dist):
+            order = np.argsort(dist, kind='stable')
+            tracks, dets, dist = tracks[order], dets[order], dist[order]
+            # First occurrence = nearest candidate of each track / detection
+            _, best_for_track = np.unique(tracks, return_index=True)
+            _, best_for_det = np.unique(dets, return_index=True)
+            mutual = np.intersect1d(best_for_track, best_for_det, assume_unique=True)
+            matched_t.append(tracks[mutual])
+            matched_d.append(dets[mutual])
+            keep = ~(np.isin(tracks, tracks[mutual]) | np.isin(dets, dets[mutual]))
+            tracks, dets, dist = tracks[keep], dets[keep], dist[keep]
+
+        matched_tracks = track_slots[np.concatenate(matched_t)]
+        matched_dets = np.concatenate(matched_d)
+        order = np.argsort(matched_tracks)
+        return matched_tracks[order], matched_dets[order]
+
+    def _start_tracks(self, boxes, centers):
+        """Create tracks in free slots, returns their slots"""
+        count = len(boxes)
+        if count == 0:
+            return np.empty(0, dtype=np.int64)
+
+        free = np.flatnonzero(~self.active)
+        if len(free) < count:
+            self._grow(self.capacity + count - len(free))
+            free = np.flatnonzero(~self.active)
+        slots = free[:count]
+
+        self.active[slots] = True
+        self.track_ids[slots] = np.arange(self.next_track_id, self.next_track_id + count)
+        self.next_track_id += count
+        self.centers[slots] = centers
+        self.start_centers[slots] = centers
+        self.bboxes[slots] = boxes
+        self.ages[slots] = 0
+        self.missed[slots] = 0
+        self.status[slots] = STATUS_UNKNOWN
+        self.history[slots] = centers[:, None, :]
+        return slots
+
+    def _record_and_classify(self):
+        """Write positions to the ring buffer and reclassify all active tracks"""
+        slots = np.flatnonzero(self.active)
+        position = self.frame_count % self.max_history
+        self.history[slots, position] = self.centers[slots]
+        self.ages[slots] += 1
+        self._classify(slots, position)
+
+    def reclassify(self):
+        """Classify the active tracks again at the last frame (after a parameter change)"""
+        if self.frame_count:
+            self._classify(np.flatnonzero(self.active), (self.frame_count - 1) % self.max_history)
+
+    def _classify(self, slots, position):
+        """Status of the tracks in `slots`, `position` is the ring buffer entry of the current frame"""
+        # Position `window` frames ago (or the start for younger tracks)
+        past = self.history[slots, (position - self.window) % self.max_history]
+        young = self.ages[slots] <= self.window
+        past[young] = self.start_centers[slots[young]]
+        displacement = np.hypot(*(self.centers[slots] - past).T)
+        self.displacement[slots] = displacement
+
+        status = np.full(len(slots), STATUS_UNKNOWN, dtype=np.int8)
+        status[displacement > self.movement_threshold] = STATUS_MOVING
+        status[~young & (displacement <= self.movement_threshold)] = STATUS_STAYING
+        self.status[slots] = status
+
+    def get_counts(self):
+        """
+        Count active tracks by status
+
+        Returns:
+            dict: 'moving', 'staying', 'unknown' and 'total' counts
+        """
+        counts = np.bincount(self.status[self.active], minlength=3)
+        return {
+            'moving': int(counts[STATUS_MOVING]),
+            'staying': int(counts[STATUS_STAYING]),
+            'unknown': int(counts[STATUS_UNKNOWN]),
+            'total': int(counts.sum())
+        }
+
+    def get_history(self, track_id):
+        """
+        Position history of a track, oldest first
+
+        Returns:
+            np.ndarray: K x 2 centers (empty if the track is not active)
+        """
+        slots = np.flatnonzero(self.active & (self.track_ids == track_id))
+        if len(slots) == 0:
+            return np.empty((0, 2), dtype=np.float32)
+        slot = slots[0]
+        length = min(int(self.ages[slot]), self.max_history)
+        newest = (self.frame_count - 1) % self.max_history
+        order = (newest - np.arange(length)[::-1]) % self.max_history
+        return self.history[slot, order].copy()
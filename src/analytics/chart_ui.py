@@ -1,9 +1,59 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout
+from PyQt6.QtCore import QTimer
 import pyqtgraph as pg
 import numpy as np
 
+import config
+from src.analytics.ring_buffer import RingBuffer, minmax_decimate
+
+
+class ThrottledCurve:
+    """
+    Repaints curves from RingBuffers at most `max_rate` times per second
+
+    Appending data only marks the curves dirty; the timer decimates each
+    buffer to `max_points` (min-max per bucket) and hides the symbols when
+    more than `symbol_limit` points are shown. More curves can share the
+    timer through add().
+    """
+
+    def __init__(self, curve, buffer, parent=None, max_points=2000, symbol_limit=300, max_rate=10):
+        self.max_points = max_points
+        self.symbol_limit = symbol_limit
+        self.entries = []
+        self.dirty = False
+        self.add(curve, buffer)
+
+        self.timer = QTimer(parent)
+        self.timer.setInterval(int(1000 / max_rate))
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+
+    def add(self, curve, buffer):
+        symbol = curve.opts.get('symbol')
+        self.entries.append({'curve': curve, 'buffer': buffer, 'symbol': symbol,
+                             'symbols_shown': symbol is not None})
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def refresh(self, force=False):
+        if not (self.dirty or force):
+            return
+        self.dirty = False
+
+        for entry in self.entries:
+            curve, buffer, symbol = entry['curve'], entry['buffer'], entry['symbol']
+            x, y = minmax_decimate(buffer.indices(), buffer.view(), self.max_points)
+            show_symbols = symbol is not None and len(y) <= self.symbol_limit
+            if show_symbols != entry['symbols_shown']:
+                curve.setSymbol(symbol if show_symbols else None)
+                entry['symbols_shown'] = show_symbols
+            curve.setData(x, y, connect='finite')
+
+
 class LiveChartWidget(QWidget):
-    def __init__(self):
+    def __init__(self, capacity=config.ANALYTICS_HISTORY, max_points=2000):
         super().__init__()
 
         self.layout = QVBoxLayout()
@@ -18,8 +68,16 @@ class LiveChartWidget(QWidget):
         self.plot_widget.showGrid(x=True, y=True, alpha=0.3)
 
         self.curve = self.plot_widget.plot(pen=pg.mkPen('c', width=2))
+        self.buffer = RingBuffer(capacity)
+        self.updater = ThrottledCurve(self.curve, self.buffer, parent=self, max_points=max_points)
 
         self.layout.addWidget(self.plot_widget)
-        
+
+    def append(self, value):
+        self.buffer.append(value)
+        self.updater.mark_dirty()
+
     def update_chart(self, data_list):
-        self.curve.setData(data_list)
\ No newline at end of file
+        self.buffer.clear()
+        self.buffer.extend(np.asarray(data_list))
+        self.updater.mark_dirty()
@@ -0,0 +1,117 @@
+import numpy as np
+
+import config
+
+
+class RingBuffer:
+    """
+    Preallocated ring buffer for a time series
+
+    Every value is written twice (at i and i + capacity), so the newest
+    `len(self)` values are always one contiguous slice and view() never
+    copies. float32 halves that storage, plenty for counts and timings.
+    """
+
+    def __init__(self, capacity=config.ANALYTICS_HISTORY, dtype=np.float32):
+        self.capacity = int(capacity)
+        self.data = np.zeros(2 * self.capacity, dtype=dtype)
+        self.total = 0  # Values appended since the last clear()
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, value):
+        position = self.total % self.capacity
+        self.data[position] = value
+        self.data[position + self.capacity] = value
+        self.total += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype).ravel()
+        skipped = max(0, len(values) - self.capacity)  # Would be overwritten anyway
+        positions = (self.total + skipped + np.arange(len(values) - skipped)) % self.capacity
+        self.data[positions] = values[skipped:]
+        self.data[positions + self.capacity] = values[skipped:]
+        self.total += len(values)
+
+    def view(self):
+        """Stored values, oldest first (read-only view)"""
+        end = self.total % self.capacity + self.capacity if self.total >= self.capacity else self.total
+        view = self.data[end - len(self):end]
+        view.flags.writeable = False
+        return view
+
+    def indices(self):
+        """Sample index (0 = first value since clear()) of each stored value"""
+        return np.arange(self.total - len(self), self.total)
+
+    def last(self, default=0):
+        return self.data[(self.total - 1) % self.capacity] if self.total else default
+
+    def clear(self):
+        self.total = 0
+
+
+class MetricsBuffer:
+    """
+    Named series sampled together, one row per frame
+
+    Series missing from a record() call get NaN, so all series stay aligned
+    on the same sample indices.
+    """
+
+    def __init__(self, names, capacity=config.ANALYTICS_HISTORY):
+        self.series = {name: RingBuffer(capacity) for name in names}
+
+    def __getitem__(self, name):
+        return self.series[name]
+
+    def __contains__(self, name):
+        return name in self.series
+
+    def record(self, **values):
+        for name, buffer in self.series.items():
+            buffer.append(values.get(name, np.nan))
+
+    def latest(self):
+        return {name: buffer.last(np.nan) for name, buffer in self.series.items()}
+
+    def clear(self):
+        for buffer in self.series.values():
+            buffer.clear()
+
+
+def minmax_decimate(x, y, max_points):
+    """
+    Reduce a series to at most `max_points` points, keeping the minimum and
+    maximum of each bucket in their original order so spikes stay visible
+
+    Returns:
+        tuple: (x, y) decimated arrays (the inputs if already small enough)
+    """
+    count = len(y)
+    if count <= max_points or max_points < 4:
+        return x, y
+
+    # One bucket is kept free for the remainder
+    bucket_size = -(-count // ((max_points - 2) // 2))
+    buckets = count // bucket_size
+    usable = buckets * bucket_size
+    blocks = y[:usable].reshape(buckets, bucket_size)
+    missing = np.isnan(blocks)
+    if missing.any():
+        # Ignore gaps unless the whole bucket is a gap
+        low = np.where(missing, np.inf, blocks).argmin(axis=1)
+        high = np.where(missing, -np.inf, blocks).argmax(axis=1)
+    else:
+        low = blocks.argmin(axis=1)
+        high = blocks.argmax(axis=1)
+    starts = np.arange(buckets) * bucket_size
+    order = np.stack([starts + np.minimum(low, high), starts + np.maximum(low, high)], axis=1).ravel()
+
+    if usable < count:
+        tail = y[usable:]
+        ends = [np.where(np.isnan(tail), np.inf, tail).argmin(), np.where(np.isnan(tail), -np.inf, tail).argmax()]
+        order = np.concatenate([order, usable + np.sort(ends)])
+
+    return x[order], y[order]
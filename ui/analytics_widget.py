@@ -1,25 +1,51 @@
 """
 Analytics Widget
-Displays the live cell count chart
+Displays the live cell count and performance charts
 """
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel
 from PyQt6.QtCore import Qt
 import pyqtgraph as pg
-from collections import deque
+
+import config
+from src.analytics.ring_buffer import MetricsBuffer
+from src.analytics.chart_ui import ThrottledCurve
+
+
+# Series of the count chart and their colors
+COUNT_SERIES = {
+    'total': '#00FFFF',
+    'moving': '#00FF00',
+    'staying': '#FF4040'
+}
+
+# Series of the performance chart (fps and per-stage latency in ms)
+PERFORMANCE_SERIES = {
+    'fps': '#FFFF00',
+    'detect_ms': '#FF00FF',
+    'track_ms': '#FF8000',
+    'render_ms': '#FFFFFF',
+    'display_ms': '#00C0FF'
+}
+
+# Colors for additional performance series
+EXTRA_COLORS = ['#8080FF', '#80FF80', '#FF8080', '#C0C0C0']
 
 
 class AnalyticsWidget(QWidget):
-    """Widget for displaying analytics chart"""
+    """Widget for displaying analytics charts"""
     
-    def __init__(self, parent=None, max_points=200):
+    def __init__(self, parent=None, max_points=2000, capacity=config.ANALYTICS_HISTORY, metrics=None):
+        """
+        Args:
+            max_points (int): Points drawn per series after min-max decimation
+            capacity (int): Samples kept per series
+            metrics (MetricsBuffer): Shared buffer to plot; series other than
+                the counts are drawn on the performance chart
+        """
         super().__init__(parent)
         self.max_points = max_points
-        self.data_buffer = deque(maxlen=max_points)
-        
-        # Initialize with zeros
-        for _ in range(max_points):
-            self.data_buffer.append(0)
+        self.metrics = metrics or MetricsBuffer(list(COUNT_SERIES) + list(PERFORMANCE_SERIES), capacity)
         
         self.setup_ui()
     
@@ -44,40 +70,71 @@ class AnalyticsWidget(QWidget):
         """)
         layout.addWidget(title)
         
-        # Plot widget
-        self.plot_widget = pg.PlotWidget()
-        self.plot_widget.setBackground('#000000')
-        self.plot_widget.setLabel('left', 'Cell Count', color='#00FF00', size='12pt')
-        self.plot_widget.setLabel('bottom', 'Time', color='#00FF00', size='12pt')
-        self.plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        charts = QHBoxLayout()
+        charts.setSpacing(10)
         
-        # Style the axes
-        self.plot_widget.getAxis('left').setPen(pg.mkPen(color='#00FF00', width=2))
-        self.plot_widget.getAxis('bottom').setPen(pg.mkPen(color='#00FF00', width=2))
-        self.plot_widget.getAxis('left').setTextPen(pg.mkPen(color='#00FF00'))
-        self.plot_widget.getAxis('bottom').setTextPen(pg.mkPen(color='#00FF00'))
+        # Count chart
+        self.plot_widget = self._make_plot('Cell Count')
         
         # Set Y-axis range
         self.plot_widget.setYRange(0, 120, padding=0)
         
-        # Create plot curve
-        self.curve = self.plot_widget.plot(
-            pen=pg.mkPen(color='#00FFFF', width=3),
-            symbol='o',
-            symbolSize=8,
-            symbolBrush='#00FFFF'
-        )
+        # Create plot curves
+        self.curves = {}
+        self.updater = None
+        for name, color in COUNT_SERIES.items():
+            if name in self.metrics:
+                options = dict(symbol='o', symbolSize=8, symbolBrush=color) if name == 'total' else {}
+                self._add_curve(self.plot_widget, name, color, **options)
+        self.curve = self.curves.get('total')
+        
+        # Performance chart: every other series in the metrics buffer
+        self.performance_widget = self._make_plot('FPS / Latency (ms)')
+        extra_colors = iter(EXTRA_COLORS * len(self.metrics.series))
+        for name in self.metrics.series:
+            if name not in COUNT_SERIES:
+                color = PERFORMANCE_SERIES.get(name) or next(extra_colors)
+                self._add_curve(self.performance_widget, name, color)
+        
+        charts.addWidget(self.plot_widget, 1)
+        charts.addWidget(self.performance_widget, 1)
+        layout.addLayout(charts)
+        self.setLayout(layout)
+    
+    def _make_plot(self, y_label):
+        """Plot widget in the analytics style"""
+        plot_widget = pg.PlotWidget()
+        plot_widget.setBackground('#000000')
+        plot_widget.setLabel('left', y_label, color='#00FF00', size='12pt')
+        plot_widget.setLabel('bottom', 'Time', color='#00FF00', size='12pt')
+        plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        plot_widget.addLegend(offset=(10, 10), labelTextColor='#00FF00')
+        
+        # Style the axes
+        plot_widget.getAxis('left').setPen(pg.mkPen(color='#00FF00', width=2))
+        plot_widget.getAxis('bottom').setPen(pg.mkPen(color='#00FF00', width=2))
+        plot_widget.getAxis('left').setTextPen(pg.mkPen(color='#00FF00'))
+        plot_widget.getAxis('bottom').setTextPen(pg.mkPen(color='#00FF00'))
         
         # Add border to plot widget
-        self.plot_widget.setStyleSheet("""
+        plot_widget.setStyleSheet("""
             QWidget {
                 border: 2px solid #00FF00;
                 background-color: #000000;
             }
         """)
-        
-        layout.addWidget(self.plot_widget)
-        self.setLayout(layout)
+        return plot_widget
+    
+    def _add_curve(self, plot_widget, name, color, **options):
+        """Curve fed from the metrics buffer, repainted by the shared throttled updater"""
+        curve = plot_widget.plot(pen=pg.mkPen(color=color, width=2), name=name, **options)
+        self.curves[name] = curve
+        # Repaint at most 10 times per second, symbols only for short series
+        if self.updater is None:
+            self.updater = ThrottledCurve(curve, self.metrics[name], parent=self,
+                                          max_points=self.max_points)
+        else:
+            self.updater.add(curve, self.metrics[name])
     
     def update_data(self, cell_count):
         """
@@ -86,12 +143,19 @@ class AnalyticsWidget(QWidget):
         Args:
             cell_count (int): Current cell count
         """
-        self.data_buffer.append(cell_count)
-        self.curve.setData(list(self.data_buffer))
+        self.record(total=cell_count)
+    
+    def record(self, **values):
+        """
+        Add one sample of every series (missing series are left as gaps)
+        
+        Args:
+            **values: e.g. total, moving, staying, fps, detect_ms, track_ms, render_ms
+        """
+        self.metrics.record(**values)
+        self.updater.mark_dirty()
     
     def clear_data(self):
-        """Clear all data from the chart"""
-        self.data_buffer.clear()
-        for _ in range(self.max_points):
-            self.data_buffer.append(0)
-        self.curve.setData(list(self.data_buffer))
+        """Clear all data from the charts"""
+        self.metrics.clear()
+        self.updater.refresh(force=True)
@@ -1,6 +1,7 @@
 """
 Control Panel Widget
-Provides controls for toxicity, temperature, and kill button
+Provides controls for toxicity, temperature, the kill button and the
+detector parameters
 """
 
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
@@ -8,13 +9,47 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt6.QtCore import Qt, pyqtSignal
 
 
+SLIDER_STYLE = """
+    QSlider::groove:horizontal {
+        border: 1px solid #00FF00;
+        height: 8px;
+        background: #000000;
+        margin: 2px 0;
+    }
+    QSlider::handle:horizontal {
+        background: #00FF00;
+        border: 1px solid #00FF00;
+        width: 18px;
+        margin: -5px 0;
+        border-radius: 9px;
+    }
+"""
+
+PARAMETER_LABEL_STYLE = """
+    QLabel {
+        color: #00FF00;
+        font-size: 12px;
+        font-family: 'Courier New', monospace;
+    }
+"""
+
+# Detector parameters: settings name -> (label, slider min, slider max, value per slider step)
+DETECTOR_PARAMETERS = {
+    'detection.confidence_threshold': ("Confidence", 1, 99, 0.01),
+    'detection.min_area': ("Min area (px)", 0, 100, 50),
+    'detection.max_area': ("Max area (px, 0 = off)", 0, 200, 100),
+    'tracking.movement_threshold': ("Movement threshold (px)", 1, 200, 1),
+}
+
+
 class ControlPanel(QWidget):
-    """Control panel for environmental parameters"""
+    """Control panel for environmental and detector parameters"""
     
     # Signals
     toxicity_changed = pyqtSignal(int)
     temperature_changed = pyqtSignal(int)
     kill_button_clicked = pyqtSignal()
+    parameter_changed = pyqtSignal(str, float)  # Settings name ('section.name'), value
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -213,8 +248,62 @@ class ControlPanel(QWidget):
         control_group.setLayout(control_layout)
         layout.addWidget(control_group)
         
+        # Detector parameters (applied live, a paused frame is reprocessed)
+        detector_group = QGroupBox()
+        detector_group.setStyleSheet(control_group.styleSheet())
+        detector_layout = QVBoxLayout()
+        detector_layout.setSpacing(4)
+        self.parameter_sliders = {}
+        for name, (text, minimum, maximum, step) in DETECTOR_PARAMETERS.items():
+            label = QLabel(text)
+            label.setStyleSheet(PARAMETER_LABEL_STYLE)
+            slider = QSlider(Qt.Orientation.Horizontal)
+            slider.setRange(minimum, maximum)
+            slider.setStyleSheet(SLIDER_STYLE)
+            value_label = QLabel()
+            value_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+            value_label.setStyleSheet(PARAMETER_LABEL_STYLE)
+            slider.valueChanged.connect(
+                lambda position, name=name: self.on_parameter_changed(name, position))
+            
+            row = QHBoxLayout()
+            row.addWidget(label)
+            row.addWidget(value_label)
+            detector_layout.addLayout(row)
+            detector_layout.addWidget(slider)
+            self.parameter_sliders[name] = (slider, value_label, step)
+        detector_group.setLayout(detector_layout)
+        layout.addWidget(detector_group)
+        
         self.setLayout(layout)
     
+    def set_parameters(self, values):
+        """
+        Move the detector sliders without emitting parameter_changed
+        
+        Args:
+            values (dict): Settings name ('section.name') -> value
+        """
+        for name, value in values.items():
+            if name not in self.parameter_sliders:
+                continue
+            slider, value_label, step = self.parameter_sliders[name]
+            slider.blockSignals(True)
+            slider.setValue(round(value / step))
+            slider.blockSignals(False)
+            value_label.setText(self._format_parameter(slider.value() * step, step))
+    
+    @staticmethod
+    def _format_parameter(value, step):
+        return f"{value:.2f}" if step < 1 else f"{value:.0f}"
+    
+    def on_parameter_changed(self, name, position):
+        """Handle detector slider change"""
+        slider, value_label, step = self.parameter_sliders[name]
+        value = round(position * step, 6)
+        value_label.setText(self._format_parameter(value, step))
+        self.parameter_changed.emit(name, value)
+    
     def on_toxicity_changed(self, value):
         """Handle toxicity slider change"""
         self.toxicity_value_label.setText(f"{value}%")
@@ -0,0 +1,211 @@
+"""
+Graph Video Display Widget
+Shows the raw frame as a pyqtgraph ImageItem with detections drawn as
+vector items on top, so overlays never touch the pixel buffer
+"""
+
+from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout
+from PyQt6.QtCore import Qt
+import pyqtgraph as pg
+import numpy as np
+
+
+STATUSES = ('moving', 'staying', 'unknown')
+
+# Status of each STATUS_* code (modules.detections.STATUS_NAMES; kept here so
+# the widget also works in demo mode without the modules package)
+STATUS_NAMES = ('unknown', 'moving', 'staying')
+
+# Same colors as the OpenCV overlay (config colors are BGR)
+DEFAULT_COLORS = {
+    'moving': (0, 255, 0),
+    'staying': (0, 0, 255),
+    'unknown': (255, 0, 0)
+}
+
+
+def box_path(boxes):
+    """
+    Outline of all boxes as one NaN-separated polyline
+
+    Args:
+        boxes: N x 4 (x1, y1, x2, y2)
+
+    Returns:
+        tuple: (xs, ys) with 6 points per box (closed outline + NaN break)
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    x1, y1, x2, y2 = boxes.T
+    nan = np.full(len(boxes), np.nan)
+    xs = np.stack([x1, x2, x2, x1, x1, nan], axis=1).ravel()
+    ys = np.stack([y1, y1, y2, y2, y1, nan], axis=1).ravel()
+    return xs, ys
+
+
+class GraphVideoWidget(QWidget):
+    """
+    Drop-in alternative to VideoWidget
+
+    update_frame() only hands the frame to an ImageItem (no color
+    conversion copy, no scaling); set_detections() replaces the data of one
+    PlotCurveItem per status. Toggling the overlay or changing colors only
+    changes the vector items.
+    """
+
+    def __init__(self, parent=None, colors=None, box_width=2, show_labels=True, max_labels=200):
+        super().__init__(parent)
+        self.colors = dict(DEFAULT_COLORS, **(colors or {}))
+        self.box_width = box_width
+        self.show_labels = show_labels
+        self.max_labels = max_labels
+        self.overlay_visible = True
+        self.frame_shape = None
+        self.label_pool = []
+        self.visible_labels = 0
+        self.setup_ui()
+
+        # Video frame holder
+        self.current_frame = None
+
+    def setup_ui(self):
+        """Setup the UI components"""
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # Title label
+        self.title_label = QLabel("[ VIDEO FEED ]")
+        self.title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.title_label.setStyleSheet("""
+            QLabel {
+                color: #00FF00;
+                font-size: 16px;
+                font-weight: bold;
+                font-family: 'Courier New', monospace;
+                background-color: #1a1a1a;
+                padding: 10px;
+                border: 2px solid #00FF00;
+            }
+        """)
+
+        # Image view: image rows top to bottom, square pixels, no mouse interaction
+        self.graphics = pg.GraphicsLayoutWidget()
+        self.graphics.setBackground('#000000')
+        self.graphics.setMinimumSize(640, 480)
+        self.graphics.setStyleSheet("border: 2px solid #00FF00;")
+        self.view = self.graphics.addViewBox(lockAspect=True, invertY=True, enableMouse=False)
+        self.view.setMenuEnabled(False)
+
+        self.image_item = pg.ImageItem(axisOrder='row-major')
+        self.view.addItem(self.image_item)
+
+        # One curve per status holds all boxes of that status
+        self.box_items = {}
+        for status in STATUSES:
+            item = pg.PlotCurveItem(connect='finite', antialias=False)
+            item.setZValue(10)
+            self.view.addItem(item)
+            self.box_items[status] = item
+        self._apply_colors()
+
+        layout.addWidget(self.title_label)
+        layout.addWidget(self.graphics, 1)
+
+        self.setLayout(layout)
+
+    def _apply_colors(self):
+        for status, item in self.box_items.items():
+            b, g, r = self.colors[status]
+            item.setPen(pg.mkPen(color=(r, g, b), width=self.box_width))
+
+    def update_frame(self, frame):
+        """
+        Update the video display with a new frame
+
+        Args:
+            frame: OpenCV BGR or single-channel image (numpy array)
+        """
+        if frame is None:
+            return
+
+        self.current_frame = frame
+
+        # BGR -> RGB as a view; fixed levels skip the min/max scan
+        rgb_view = frame[..., ::-1] if frame.ndim == 3 else frame
+        self.image_item.setImage(rgb_view, autoLevels=False, levels=(0, 255))
+
+        if frame.shape[:2] != self.frame_shape:
+            self.frame_shape = frame.shape[:2]
+            height, width = self.frame_shape
+            self.view.setRange(xRange=(0, width), yRange=(0, height), padding=0)
+
+    def set_detections(self, boxes, track_ids=None, statuses=None):
+        """
+        Replace the displayed detections
+
+        Args:
+            boxes: N x 4 (x1, y1, x2, y2) in frame pixels
+            track_ids: N track IDs (labels are only drawn when given)
+            statuses: N STATUS_* codes or status strings ('moving', 'staying', 'unknown')
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        statuses = np.asarray(statuses if statuses is not None else ['unknown'] * len(boxes))
+        if statuses.dtype.kind in 'iu':
+            statuses = np.array(STATUS_NAMES)[statuses]
+
+        for status, item in self.box_items.items():
+            selected = statuses == status
+            if len(boxes) and selected.any():
+                xs, ys = box_path(boxes[selected])
+                item.setData(x=xs, y=ys, connect='finite')
+            else:
+                item.setData(x=np.empty(0), y=np.empty(0))
+
+        self._update_labels(boxes, track_ids, statuses)
+
+    def _update_labels(self, boxes, track_ids, statuses):
+        """Reuse a pool of TextItems for the first `max_labels` detections"""
+        count = 0 if track_ids is None or not self.show_labels else min(len(boxes), self.max_labels)
+
+        while len(self.label_pool) < count:
+            label = pg.TextItem(anchor=(0, 1))
+            label.setZValue(11)
+            self.view.addItem(label)
+            self.label_pool.append(label)
+
+        for index in range(count):
+            label = self.label_pool[index]
+            status = str(statuses[index])
+            b, g, r = self.colors.get(status, self.colors['unknown'])
+            label.setText(f"ID:{track_ids[index]} {status}", color=(r, g, b))
+            label.setPos(boxes[index, 0], boxes[index, 1])
+            label.setVisible(self.overlay_visible)
+
+        for label in self.label_pool[count:]:
+            label.setVisible(False)
+        self.visible_labels = count
+
+    def set_overlay_visible(self, visible):
+        """Show or hide all detection overlays without redrawing the frame"""
+        self.overlay_visible = visible
+        for item in self.box_items.values():
+            item.setVisible(visible)
+        for label in self.label_pool[:self.visible_labels]:
+            label.setVisible(visible)
+
+    def set_status_color(self, status, color):
+        """
+        Change the overlay color of a status (labels pick it up on the next
+        set_detections call)
+
+        Args:
+            status (str): 'moving', 'staying' or 'unknown'
+            color: BGR tuple, like the config colors
+        """
+        self.colors[status] = tuple(color)
+        self._apply_colors()
+
+    def clear_frame(self):
+        """Clear the video display"""
+        self.image_item.clear()
+        self.set_detections(np.empty((0, 4)))
+        self.current_frame = None
@@ -7,10 +7,13 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QFileDialog, QMessageBox, QStatusBar)
 from PyQt6.QtCore import QTimer, Qt
 from PyQt6.QtGui import QAction
+import contextlib
 import cv2
 import os
+import time
 
 from .video_widget import VideoWidget
+from .graph_video_widget import GraphVideoWidget
 from .control_panel import ControlPanel
 from .analytics_widget import AnalyticsWidget
 
@@ -19,24 +22,66 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from modules import CellDetector, CellTracker, DataLogger
+    from modules import (CellDetector, CellTracker, DataLogger, DetectionScheduler,
+                         OverlayRenderer, OverlayLayer, profiler, open_source,
+                         EnvironmentSimulation, SimulationRunner)
+    from modules.settings import SettingsWatcher, apply_settings, load_settings, merge, validate
     import config
     MODULES_AVAILABLE = True
 except ImportError:
     MODULES_AVAILABLE = False
     print("Warning: Detection modules not available. Running in demo mode.")
 
+    class _DisabledProfiler:
+        """Demo mode: stage timers are no-ops"""
+        enabled = False
+
+        def stage(self, name):
+            return contextlib.nullcontext()
+
+        def last_ms(self, name, default=None):
+            return default
+
+    profiler = _DisabledProfiler()
+
+    class _DemoVideoSource:
+        """Demo mode: video files through cv2.VideoCapture with the FrameSource read interface"""
+        metadata = {'kind': 'video'}
+
+        def __init__(self, path, prefetch=0):
+            self.capture = cv2.VideoCapture(path)
+            if not self.capture.isOpened():
+                raise IOError(f"Could not open video: {path}")
+
+        def read(self):
+            ret, frame = self.capture.read()
+            return (frame, {}) if ret else (None, None)
+
+        def rewind(self):
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+        def close(self):
+            self.capture.release()
+
+    open_source = _DemoVideoSource
+
 
 class BioOracleWindow(QMainWindow):
     """Main application window"""
     
-    def __init__(self):
+    def __init__(self, settings=None, settings_path=None, overrides=()):
+        """
+        Args:
+            settings (Settings): Pipeline settings (loaded from settings_path if None)
+            settings_path (str): Settings file, reloaded while running when given
+            overrides (list): 'section.name=value' strings applied on top of the file
+        """
         super().__init__()
         self.setWindowTitle("Bio-Oracle v1.0")
         self.setMinimumSize(1200, 800)
         
         # State variables
-        self.video_capture = None
+        self.source = None
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
         self.is_playing = False
@@ -46,15 +91,39 @@ class BioOracleWindow(QMainWindow):
         self.detector = None
         self.tracker = None
         self.logger = None
+        self.renderer = None
+        self.overlay = None
         self.frame_count = 0
+        self.last_frame_time = None
         
-        # Environmental parameters
+        # Pipeline settings, edits to the settings file are applied between frames
+        self.settings = None
+        self.settings_watcher = None
+        if MODULES_AVAILABLE:
+            self.settings = settings or load_settings(settings_path, overrides)
+            if settings_path:
+                self.settings_watcher = SettingsWatcher(
+                    settings_path, overrides, interval=config.SETTINGS_RELOAD_INTERVAL,
+                    settings=self.settings)
+        
+        # Last decoded frame and its raw model output, so a paused frame can be
+        # reprocessed with new detector parameters without running the model again
+        self.current_frame = None
+        self.raw_detections = None
+        self.raw_confidence = None
+        self.tuning_timer = QTimer()
+        self.tuning_timer.setSingleShot(True)
+        self.tuning_timer.timeout.connect(self.reprocess_paused_frame)
+        
+        # Environmental parameters, the simulation steps in a worker thread
         self.toxicity = 0
         self.temperature = 25
+        self.simulation = None
         
         self.setup_ui()
         self.setup_menu_bar()
         self.setup_connections()
+        self.sync_control_panel()
         
         # Apply dark theme
         self.setStyleSheet("""
@@ -95,7 +164,8 @@ class BioOracleWindow(QMainWindow):
         top_layout.setSpacing(10)
         
         # Video widget (left side)
-        self.video_widget = VideoWidget()
+        self.overlay_in_widget = MODULES_AVAILABLE and config.DISPLAY_BACKEND == 'pyqtgraph'
+        self.video_widget = GraphVideoWidget() if self.overlay_in_widget else VideoWidget()
         top_layout.addWidget(self.video_widget, 2)
         
         # Control panel (right side)
@@ -106,7 +176,7 @@ class BioOracleWindow(QMainWindow):
         main_layout.addLayout(top_layout, 2)
         
         # Bottom section: Analytics
-        self.analytics_widget = AnalyticsWidget(max_points=200)
+        self.analytics_widget = AnalyticsWidget()
         self.analytics_widget.setMaximumHeight(300)
         main_layout.addWidget(self.analytics_widget, 1)
         
@@ -130,6 +200,19 @@ class BioOracleWindow(QMainWindow):
         open_action.triggered.connect(self.open_video)
         file_menu.addAction(open_action)
         
+        open_folder_action = QAction('Open Image &Folder', self)
+        open_folder_action.triggered.connect(self.open_image_folder)
+        file_menu.addAction(open_folder_action)
+        
+        open_camera_action = QAction('Open &Camera', self)
+        open_camera_action.triggered.connect(lambda: self.load_video("0"))
+        file_menu.addAction(open_camera_action)
+        
+        reload_action = QAction('&Reload Settings', self)
+        reload_action.setShortcut('Ctrl+R')
+        reload_action.triggered.connect(lambda: self.poll_settings(force=True))
+        file_menu.addAction(reload_action)
+        
         file_menu.addSeparator()
         
         exit_action = QAction('&Exit', self)
@@ -161,6 +244,7 @@ class BioOracleWindow(QMainWindow):
         self.control_panel.toxicity_changed.connect(self.on_toxicity_changed)
         self.control_panel.temperature_changed.connect(self.on_temperature_changed)
         self.control_panel.kill_button_clicked.connect(self.on_kill_button_clicked)
+        self.control_panel.parameter_changed.connect(self.on_parameter_changed)
     
     def open_video(self):
         """Open a video file"""
@@ -168,45 +252,88 @@ class BioOracleWindow(QMainWindow):
             self,
             "Select Video",
             "",
-            "Video Files (*.mp4 *.avi *.mov *.mkv);;All Files (*.*)"
+            "Video Files (*.mp4 *.avi *.mov *.mkv);;"
+            "Image Stacks (*.tif *.tiff *.npy);;All Files (*.*)"
         )
         
         if file_path:
             self.load_video(file_path)
     
+    def open_image_folder(self):
+        """Open a directory of images as a frame sequence"""
+        folder = QFileDialog.getExistingDirectory(self, "Select Image Folder")
+        if folder:
+            self.load_video(folder)
+    
     def load_video(self, video_path):
-        """Load a video file"""
+        """
+        Load a frame source
+        
+        Args:
+            video_path (str): Video file, image directory, TIFF stack or camera index
+        """
         # Stop current video if playing
         if self.is_playing:
             self.stop_video()
         
-        # Release previous capture
-        if self.video_capture:
-            self.video_capture.release()
-        
-        # Open new video
-        self.video_capture = cv2.VideoCapture(video_path)
-        
-        if not self.video_capture.isOpened():
+        # Release previous source
+        if self.source:
+            self.source.close()
+            self.source = None
+        
+        # Close previous log files
+        if self.logger:
+            self.logger.close()
+            self.logger = None
+        
+        # New video, new cells
+        if self.simulation:
+            self.simulation.close()
+            self.simulation = None
+        
+        # Open new source (frames are decoded ahead in a background thread)
+        try:
+            if MODULES_AVAILABLE:
+                self.source = open_source(video_path, prefetch=self.settings.input.frame_prefetch,
+                                          grayscale=self.settings.input.grayscale)
+            else:
+                self.source = open_source(video_path)
+        except IOError:
             QMessageBox.critical(self, "Error", f"Could not open video: {video_path}")
             return
         
         self.current_video_path = video_path
         self.frame_count = 0
+        self.current_frame = None
+        self.raw_detections = None
+        if profiler.enabled:
+            profiler.reset()  # Timing statistics per video
         
         # Initialize detection modules if available
         if MODULES_AVAILABLE:
             try:
+                detection, tracking = self.settings.detection, self.settings.tracking
                 self.detector = CellDetector(
-                    model_path=config.MODEL_PATH,
-                    confidence_threshold=config.CONFIDENCE_THRESHOLD,
-                    device=config.DEVICE
+                    model_path=detection.model_path,
+                    confidence_threshold=detection.confidence_threshold,
+                    device=detection.device,
+                    img_size=detection.img_size
                 )
+                if detection.interval > 1:
+                    self.detector = DetectionScheduler(
+                        self.detector, interval=detection.interval
+                    )
                 self.tracker = CellTracker(
-                    movement_threshold=config.MOVEMENT_THRESHOLD,
-                    staying_frame_count=config.STAYING_FRAME_COUNT,
-                    max_history=config.MAX_TRACKING_HISTORY
+                    movement_threshold=tracking.movement_threshold,
+                    staying_frame_count=tracking.staying_frame_count,
+                    max_history=tracking.max_history,
+                    max_match_distance=tracking.max_match_distance,
+                    max_missed_frames=tracking.max_missed_frames
                 )
+                self.renderer = OverlayRenderer()
+                self.overlay = OverlayLayer()
+                self.simulation = SimulationRunner(EnvironmentSimulation(
+                    toxicity=self.toxicity, temperature=self.temperature))
                 self.logger = DataLogger(
                     logs_dir=config.LOGS_DIR,
                     date_format=config.LOG_DATE_FORMAT,
@@ -229,8 +356,9 @@ class BioOracleWindow(QMainWindow):
     
     def start_playback(self):
         """Start video playback"""
-        if self.video_capture and self.video_capture.isOpened():
+        if self.source:
             self.is_playing = True
+            self.last_frame_time = None  # No fps sample across a pause
             self.timer.start(33)  # ~30 FPS
     
     def toggle_playback(self):
@@ -250,25 +378,47 @@ class BioOracleWindow(QMainWindow):
         self.is_playing = False
         self.timer.stop()
         
-        if self.video_capture:
-            self.video_capture.release()
-            self.video_capture = None
+        if self.source:
+            self.source.close()
+            self.source = None
+        
+        if self.logger:
+            self.logger.log_summary(self.timing_summary())
+            if profiler.enabled:
+                profiler.dump_json(self.logger.profile_path)
         
         self.video_widget.clear_frame()
         self.frame_count = 0
         self.status_bar.showMessage("Stopped")
     
+    def timing_summary(self):
+        """p50/p99 latency per stage for the session summary"""
+        if not profiler.enabled:
+            return {}
+        return {
+            f"{name} p50/p99 ms": f"{stats['p50_ms']:.2f}/{stats['p99_ms']:.2f}"
+            for name, stats in profiler.summary().items()
+        }
+    
     def update_frame(self):
         """Update video frame and perform detection"""
-        if not self.video_capture or not self.video_capture.isOpened():
+        if not self.source:
             self.stop_video()
             return
         
-        ret, frame = self.video_capture.read()
+        if self.settings_watcher is not None:
+            self.poll_settings()
         
-        if not ret:
+        with profiler.stage('decode'):
+            frame, _ = self.source.read()
+        
+        if frame is None:
+            if self.source.metadata['kind'] == 'camera':
+                # Live stream ended
+                self.stop_video()
+                return
             # Video ended, loop back
-            self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.source.rewind()
             self.frame_count = 0
             return
         
@@ -276,47 +426,43 @@ class BioOracleWindow(QMainWindow):
         
         # Perform detection if modules available
         cell_count = 0
+        metrics = {}
         
         if self.detector and self.tracker:
             try:
                 # Detect cells
-                detections = self.detector.detect(frame)
+                self.current_frame = frame
+                with profiler.stage('detect'):
+                    if hasattr(self.detector, 'infer'):
+                        # Raw model output is kept for reprocessing the frame while paused
+                        self.raw_detections = self.detector.infer(frame)
+                        self.raw_confidence = self.detector.confidence_threshold
+                        detections = self.detector.filter(self.raw_detections)
+                    else:
+                        self.raw_detections = None
+                        detections = self.detector.detect(frame)
                 
                 # Track cells
-                tracked_detections = self.tracker.update(detections)
+                with profiler.stage('track'):
+                    tracked_detections = self.tracker.update(detections)
                 
                 # Apply environmental effects (simulation)
                 tracked_detections = self.apply_environmental_effects(tracked_detections)
                 
-                # Draw detections on frame
-                for det in tracked_detections:
-                    x1, y1, x2, y2 = det['bbox']
-                    status = det.get('status', 'unknown')
-                    
-                    # Choose color based on status
-                    if status == 'moving':
-                        color = config.COLOR_MOVING
-                    elif status == 'staying':
-                        color = config.COLOR_STAYING
-                    else:
-                        color = config.COLOR_UNKNOWN
-                    
-                    # Draw bounding box
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, config.BOX_THICKNESS)
-                    
-                    # Draw label
-                    label = f"ID:{det['track_id']} {status}"
-                    cv2.putText(
-                        frame, label, (x1, y1 - 10),
-                        config.FONT, config.FONT_SCALE, color, config.FONT_THICKNESS
-                    )
+                with profiler.stage('render'):
+                    frame = self.render_detections(frame, tracked_detections)
                 
                 cell_count = len(tracked_detections)
+                status_counts = tracked_detections.counts()
+                metrics['moving'] = status_counts['moving']
+                metrics['staying'] = status_counts['staying']
+                for stage in ('detect', 'track', 'render'):
+                    metrics[f"{stage}_ms"] = profiler.last_ms(stage)
                 
                 # Log data
                 if config.ENABLE_LOGGING and self.logger:
-                    counts = self.tracker.get_counts()
-                    self.logger.log_counts(self.frame_count, counts, len(detections))
+                    with profiler.stage('log'):
+                        self.logger.log_batch(self.frame_count, detections, self.tracker.get_counts())
                 
             except Exception as e:
                 print(f"Detection error: {e}")
@@ -327,10 +473,18 @@ class BioOracleWindow(QMainWindow):
             cell_count = random.randint(20, 80)
         
         # Update display
-        self.video_widget.update_frame(frame)
+        with profiler.stage('display'):
+            self.video_widget.update_frame(frame)
+        metrics['display_ms'] = profiler.last_ms('display')
         
-        # Update analytics
-        self.analytics_widget.update_data(cell_count)
+        # Processing rate from the interval between displayed frames
+        now = time.perf_counter()
+        if self.last_frame_time is not None:
+            metrics['fps'] = 1.0 / max(now - self.last_frame_time, 1e-6)
+        self.last_frame_time = now
+        
+        # Update analytics (the charts repaint on their own throttled timer)
+        self.analytics_widget.record(total=cell_count, **metrics)
         
         # Update status bar
         self.status_bar.showMessage(
@@ -338,22 +492,165 @@ class BioOracleWindow(QMainWindow):
             f"Toxicity: {self.toxicity}% | Temp: {self.temperature}°C"
         )
     
-    def apply_environmental_effects(self, detections):
+    def render_detections(self, frame, tracked_detections):
+        """Show tracked detections, returns the frame to display"""
+        boxes = tracked_detections.boxes
+        track_ids = tracked_detections.track_ids
+        statuses = tracked_detections.statuses
+        if self.overlay_in_widget:
+            # Vector overlay items, the frame is displayed untouched
+            self.video_widget.set_detections(boxes, track_ids, statuses)
+            return frame
+        
+        # Draw detections on frame (the overlay is only re-rendered when it changes)
+        overlay_key = (boxes.tobytes(), track_ids.tobytes(), statuses.tobytes())
+        self.overlay.update(
+            frame.shape[:2] + (3,), overlay_key,
+            lambda layer: self.renderer.render_detections(layer, boxes, track_ids, statuses)
+        )
+        if self.overlay.bounds is not None:
+            # Grayscale frames only get color when there is an overlay to show; color
+            # frames are copied so the decoded frame stays clean for reprocessing
+            if frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            else:
+                frame = frame.copy()
+            self.overlay.composite(frame)
+        return frame
+    
+    def on_parameter_changed(self, name, value):
+        """
+        Handle a detector slider change
+        
+        The new value is applied to the pipeline right away; while paused the
+        current frame is reprocessed once the slider has rested for
+        TUNING_DEBOUNCE_MS.
+        """
+        if self.settings is None:
+            return
+        section, key = name.split('.')
+        try:
+            settings = validate(merge(self.settings, {section: {key: value}}))
+        except ValueError as e:
+            # Snap the slider back to the value in effect
+            self.sync_control_panel()
+            self.status_bar.showMessage(str(e).replace("\n", " "))
+            return
+        self.apply_settings(settings)
+        if not self.is_playing:
+            self.tuning_timer.start(config.TUNING_DEBOUNCE_MS)
+    
+    def reprocess_paused_frame(self):
+        """Run the current frame again with the current detector parameters (while paused)"""
+        if self.is_playing or self.current_frame is None or not (self.detector and self.tracker):
+            return
+        start = time.perf_counter()
+        # The model behind a DetectionScheduler
+        detector = getattr(self.detector, 'detector', self.detector)
+        try:
+            if hasattr(detector, 'infer'):
+                if self.raw_detections is None or detector.confidence_threshold < self.raw_confidence:
+                    # The cached output lacks boxes below its threshold, run the model once
+                    self.raw_detections = detector.infer(self.current_frame)
+                    self.raw_confidence = detector.confidence_threshold
+                detections = detector.filter(self.raw_detections)
+            else:
+                detections = detector.detect(self.current_frame)
+            # Statuses from the current tracks, the tracker does not advance
+            tracked_detections = self.tracker.preview(detections)
+            tracked_detections = self.apply_environmental_effects(tracked_detections, step=False)
+            frame = self.render_detections(self.current_frame, tracked_detections)
+        except Exception as e:
+            print(f"Reprocessing error: {e}")
+            return
+        self.video_widget.update_frame(frame)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.status_bar.showMessage(
+            f"Frame: {self.frame_count} | Cells: {len(tracked_detections)} | "
+            f"Reprocessed in {elapsed_ms:.0f} ms"
+        )
+    
+    def sync_control_panel(self):
+        """Move the detector sliders to the current settings"""
+        if self.settings is None:
+            return
+        self.control_panel.set_parameters({
+            'detection.confidence_threshold': self.settings.detection.confidence_threshold,
+            'detection.min_area': self.settings.detection.min_area,
+            'detection.max_area': self.settings.detection.max_area,
+            'tracking.movement_threshold': self.settings.tracking.movement_threshold,
+        })
+    
+    def poll_settings(self, force=False):
+        """Reload the settings file if it changed (runs between frames)"""
+        if self.settings_watcher is None:
+            if force:
+                self.status_bar.showMessage("No settings file (start with --config)")
+            return
+        settings = self.settings_watcher.poll(force)
+        if settings is not None:
+            self.apply_settings(settings)
+        elif self.settings_watcher.error:
+            self.status_bar.showMessage(f"Settings not applied: {self.settings_watcher.error}")
+            print(f"Settings not applied: {self.settings_watcher.error}")
+            self.settings_watcher.error = None
+    
+    def apply_settings(self, settings):
+        """
+        Apply new settings to the running pipeline without reloading the model
+        
+        Detector thresholds, detection interval and tracker parameters change
+        in place (tracks are kept); model, device, history length and input
+        settings take effect with the next loaded video.
+        """
+        previous = self.settings
+        self.settings = settings
+        self.sync_control_panel()
+        if self.detector is None:
+            return
+        
+        interval = settings.detection.interval
+        if isinstance(self.detector, DetectionScheduler):
+            if interval <= 1:
+                self.detector = self.detector.detector
+        elif interval > 1:
+            self.detector = DetectionScheduler(self.detector, interval=interval)
+        
+        pending = apply_settings(settings, previous, detector=self.detector, tracker=self.tracker)
+        message = "Settings applied"
+        if pending:
+            message += f" ({', '.join(pending)} apply to the next video)"
+        self.status_bar.showMessage(message)
+    
+    def apply_environmental_effects(self, detections, step=True):
         """
         Simulate environmental effects on cells
-        This is a placeholder for future simulation logic
+        
+        Dead cells are dropped and immobilized cells are shown as staying.
+        The effects come from the last finished simulation step; with
+        step=True the next step (one frame interval) is queued for the
+        cells of this frame.
         """
-        # TODO: Implement actual simulation based on toxicity and temperature
-        # For now, just return detections as-is
-        return detections
+        if self.simulation is None:
+            return detections
+        if step:
+            fps = self.source.metadata.get('fps') if self.source else None
+            # Cells of ended tracks are freed, so the state stays the size of the live population
+            active_ids = self.tracker.track_ids[self.tracker.active]
+            self.simulation.step(1.0 / (fps or 30.0), detections.track_ids, active_ids)
+        return self.simulation.apply(detections)
     
     def on_toxicity_changed(self, value):
         """Handle toxicity slider change"""
         self.toxicity = value
+        if self.simulation:
+            self.simulation.set_conditions(toxicity=value)
     
     def on_temperature_changed(self, value):
         """Handle temperature slider change"""
         self.temperature = value
+        if self.simulation:
+            self.simulation.set_conditions(temperature=value)
     
     def on_kill_button_clicked(self):
         """Handle kill button click"""
@@ -366,9 +663,12 @@ class BioOracleWindow(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            # TODO: Implement kill logic
-            self.status_bar.showMessage("⚠️ Kill function activated!")
-            QMessageBox.information(self, "Info", "Kill function activated! (Simulation)")
+            if self.simulation is None:
+                QMessageBox.information(self, "Info", "No cells to kill, detection is not active.")
+                return
+            killed = self.simulation.kill().result()
+            self.reprocess_paused_frame()
+            self.status_bar.showMessage(f"⚠️ Kill function activated! {killed} cells killed")
     
     def show_about(self):
         """Show about dialog"""
@@ -388,6 +688,10 @@ class BioOracleWindow(QMainWindow):
     
     def closeEvent(self, event):
         """Handle window close event"""
-        if self.video_capture:
-            self.video_capture.release()
+        if self.source:
+            self.source.close()
+        if self.logger:
+            self.logger.close()
+        if self.simulation:
+            self.simulation.close()
         event.accept()
@@ -64,22 +64,28 @@ class VideoWidget(QWidget):
         Update the video display with a new frame
         
         Args:
-            frame: OpenCV BGR image (numpy array)
+            frame: OpenCV BGR or single-channel image (numpy array)
         """
         if frame is None:
             return
         
         self.current_frame = frame
         
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if frame.ndim == 2:
+            # Grayscale frames are shown as they are, without a color conversion
+            display_frame = np.ascontiguousarray(frame)
+            image_format = QImage.Format.Format_Grayscale8
+        else:
+            # Convert BGR to RGB
+            display_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            image_format = QImage.Format.Format_RGB888
         
         # Get dimensions
-        h, w, ch = rgb_frame.shape
-        bytes_per_line = ch * w
+        h, w = display_frame.shape[:2]
+        bytes_per_line = display_frame.strides[0]
         
         # Convert to QImage
-        qt_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
+        qt_image = QImage(display_frame.data, w, h, bytes_per_line, image_format)
         
         # Scale to fit label while maintaining aspect ratio
         pixmap = QPixmap.fromImage(qt_image)